@@ -0,0 +1,235 @@
+# app/archive.py
+import sqlite3
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .storage import read_export
+
+ARCHIVE_FILE = "audits.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audits (
+    id             INTEGER PRIMARY KEY,
+    source         TEXT UNIQUE,
+    generated_at   TEXT,
+    auditor        TEXT,
+    language       TEXT,
+    schema_version TEXT,
+    final          REAL,
+    schema_id      TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_audits_generated_at ON audits(generated_at);
+CREATE INDEX IF NOT EXISTS ix_audits_auditor ON audits(auditor, generated_at);
+CREATE INDEX IF NOT EXISTS ix_audits_language ON audits(language, generated_at);
+CREATE INDEX IF NOT EXISTS ix_audits_final ON audits(final);
+
+CREATE TABLE IF NOT EXISTS topic_scores (
+    audit_id INTEGER NOT NULL REFERENCES audits(id) ON DELETE CASCADE,
+    topic_id TEXT NOT NULL,
+    score    REAL,
+    PRIMARY KEY (audit_id, topic_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_topic_scores_topic ON topic_scores(topic_id, score);
+
+CREATE TABLE IF NOT EXISTS responses (
+    audit_id    INTEGER NOT NULL REFERENCES audits(id) ON DELETE CASCADE,
+    question_id TEXT NOT NULL,
+    value       TEXT,
+    comment     TEXT,
+    PRIMARY KEY (audit_id, question_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_responses_question ON responses(question_id, value);
+"""
+
+# Colunas acrescentadas depois da primeira versão: (nome, tipo, índice)
+_MIGRATIONS = [
+    ("schema_id", "TEXT", "CREATE INDEX IF NOT EXISTS ix_audits_schema ON audits(schema_id, generated_at)"),
+]
+
+# Colunas aceitas em order_by (nunca interpolar texto do usuário no SQL)
+ORDER_COLUMNS = {"generated_at", "final", "auditor", "language", "id"}
+
+DateLike = Union[str, date, datetime]
+
+def _iso(value: DateLike) -> str:
+    return value.isoformat() if isinstance(value, (date, datetime)) else str(value)
+
+class AuditArchive:
+    """
+    Arquivo local das auditorias exportadas (SQLite no aparelho): metadados,
+    score por tópico e respostas em tabelas indexadas, com consulta por filtros,
+    ordenação e paginação. Ex.: tópico 1 abaixo de 70% desde o início do trimestre:
+
+        archive.query(since="2026-10-01", topic_max={"1": 70}, order_by="final")
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # a exportação grava a partir da thread de fundo: uma conexão, protegida por lock
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        self._db.executescript(_SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        columns = {r["name"] for r in self._db.execute("PRAGMA table_info(audits)")}
+        with self._db:
+            for name, sql_type, index in _MIGRATIONS:
+                if name not in columns:
+                    self._db.execute(f"ALTER TABLE audits ADD COLUMN {name} {sql_type}")
+                self._db.execute(index)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # ---------- Escrita ----------
+    def _insert(self, payload: Dict[str, Any], source: Optional[str], replace: bool = False) -> Optional[int]:
+        meta = payload.get("metadata") or {}
+        scores = payload.get("scores") or {}
+        if replace and source is not None:
+            self._db.execute("DELETE FROM audits WHERE source = ?", (source,))
+        cur = self._db.execute(
+            "INSERT OR IGNORE INTO audits (source, generated_at, auditor, language, schema_version, final, "
+            "schema_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (source, meta.get("generated_at"), meta.get("auditor") or "", meta.get("language"),
+             meta.get("schema_version"), scores.get("final"), (meta.get("schema") or {}).get("id")),
+        )
+        if cur.rowcount == 0:
+            return None  # mesma origem já arquivada
+        audit_id = cur.lastrowid
+        self._db.executemany(
+            "INSERT OR REPLACE INTO topic_scores (audit_id, topic_id, score) VALUES (?, ?, ?)",
+            [(audit_id, t["id"], t.get("score")) for t in scores.get("topics", [])],
+        )
+        self._db.executemany(
+            "INSERT OR REPLACE INTO responses (audit_id, question_id, value, comment) VALUES (?, ?, ?, ?)",
+            [(audit_id, r["id"], r.get("value"), r.get("comment")) for r in payload.get("responses", [])],
+        )
+        return audit_id
+
+    def add(self, payload: Dict[str, Any], source: Optional[str] = None) -> Optional[int]:
+        """Arquiva um payload de build_result; se `source` já existia (arquivo sobrescrito), substitui."""
+        with self._lock, self._db:
+            return self._insert(payload, source, replace=True)
+
+    def import_files(self, paths: Iterable[Union[str, Path]], batch_size: int = 200,
+                     compiled=None) -> Dict[str, int]:
+        """
+        Importa exportações (.json/.json.gz; .kaud com `compiled`) em transações de
+        `batch_size` arquivos. Arquivos já arquivados (mesmo caminho) são pulados.
+        """
+        stats = {"imported": 0, "skipped": 0, "errors": 0}
+        batch: List[Tuple[Dict[str, Any], str]] = []
+
+        def commit():
+            with self._lock, self._db:
+                for payload, source in batch:
+                    if self._insert(payload, source) is None:
+                        stats["skipped"] += 1
+                    else:
+                        stats["imported"] += 1
+            batch.clear()
+
+        for p in paths:
+            try:
+                batch.append((read_export(p, compiled), str(Path(p).resolve())))
+            except Exception as e:
+                print(f"[ARCHIVE] ignorando {p}: {e.__class__.__name__}: {e}")
+                stats["errors"] += 1
+                continue
+            if len(batch) >= batch_size:
+                commit()
+        if batch:
+            commit()
+        return stats
+
+    # ---------- Consulta ----------
+    def _where(self, since=None, until=None, auditor=None, language=None, min_final=None,
+               max_final=None, topic_min=None, topic_max=None, schema_id=None) -> Tuple[str, List[Any]]:
+        clauses: List[str] = []
+        args: List[Any] = []
+        if schema_id is not None:
+            clauses.append("a.schema_id = ?")
+            args.append(schema_id)
+        if since is not None:
+            clauses.append("a.generated_at >= ?")
+            args.append(_iso(since))
+        if until is not None:
+            clauses.append("a.generated_at < ?")
+            args.append(_iso(until))
+        if auditor is not None:
+            clauses.append("a.auditor = ?")
+            args.append(auditor)
+        if language is not None:
+            clauses.append("a.language = ?")
+            args.append(language)
+        if min_final is not None:
+            clauses.append("a.final >= ?")
+            args.append(min_final)
+        if max_final is not None:
+            clauses.append("a.final < ?")
+            args.append(max_final)
+        for op, limits in ((">=", topic_min or {}), ("<", topic_max or {})):
+            for topic_id, limit in limits.items():
+                clauses.append("EXISTS (SELECT 1 FROM topic_scores ts WHERE ts.audit_id = a.id "
+                               f"AND ts.topic_id = ? AND ts.score {op} ?)")
+                args.extend([topic_id, limit])
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+    def query(self, since: Optional[DateLike] = None, until: Optional[DateLike] = None,
+              auditor: Optional[str] = None, language: Optional[str] = None,
+              min_final: Optional[float] = None, max_final: Optional[float] = None,
+              topic_min: Optional[Dict[str, float]] = None,
+              topic_max: Optional[Dict[str, float]] = None,
+              schema_id: Optional[str] = None,
+              order_by: str = "generated_at", descending: bool = True,
+              limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Lista auditorias (metadados + {"topics": {id: score}}). Scores em %;
+        max_final/topic_max são exclusivos ("abaixo de"), min/since inclusivos.
+        """
+        if order_by not in ORDER_COLUMNS:
+            raise ValueError(f"order_by inválido: {order_by}")
+        where, args = self._where(since, until, auditor, language, min_final, max_final,
+                                  topic_min, topic_max, schema_id)
+        sql = (f"SELECT a.* FROM audits a {where} "
+               f"ORDER BY a.{order_by} {'DESC' if descending else 'ASC'}, a.id "
+               "LIMIT ? OFFSET ?")
+        with self._lock:
+            rows = [dict(r) for r in self._db.execute(sql, args + [limit, offset])]
+            if rows:
+                ids = [r["id"] for r in rows]
+                marks = ",".join("?" * len(ids))
+                topics: Dict[int, Dict[str, Optional[float]]] = {i: {} for i in ids}
+                for r in self._db.execute(
+                        f"SELECT audit_id, topic_id, score FROM topic_scores WHERE audit_id IN ({marks})", ids):
+                    topics[r["audit_id"]][r["topic_id"]] = r["score"]
+                for r in rows:
+                    r["topics"] = topics[r["id"]]
+        return rows
+
+    def count(self, **filters) -> int:
+        """Total de auditorias para os mesmos filtros de query() (para paginação)."""
+        where, args = self._where(**filters)
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM audits a {where}", args).fetchone()[0]
+
+    def responses(self, audit_id: int) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """(answers, comments) de uma auditoria arquivada."""
+        answers: Dict[str, str] = {}
+        comments: Dict[str, str] = {}
+        with self._lock:
+            for r in self._db.execute(
+                    "SELECT question_id, value, comment FROM responses WHERE audit_id = ?", (audit_id,)):
+                if r["value"] is not None:
+                    answers[r["question_id"]] = r["value"]
+                if r["comment"]:
+                    comments[r["question_id"]] = r["comment"]
+        return answers, comments
@@ -0,0 +1,244 @@
+# app/audit_codec.py
+"""
+Formato binário versionado de uma auditoria (payload de storage.build_result).
+
+    cabeçalho  "<4sBB16sI": MAGIC, versão, flags, hash do schema, nº de perguntas
+    corpo      (zlib se FLAG_ZLIB)
+      metadata   u32 tamanho + JSON
+      respostas  códigos de calculator.CODE_*, 4 bits cada, na ordem do schema
+      comentários u32 n + n índices u32 + n tamanhos u32 + textos UTF-8 concatenados
+      scores     u16 n_tópicos + n i16 (décimos de %) + i16 final; SCORE_NONE = None
+      [ordem]    u32 n + n índices u32: ordem original das respostas (FLAG_ORDER)
+      [extras]   u32 tamanho + JSON com o que não cabe nos campos acima (FLAG_EXTRA)
+
+Todos os inteiros são little-endian. A decodificação devolve exatamente o mesmo
+JSON (mesmas chaves, valores e ordem das respostas); o que não é canônico (id fora
+do schema, valor fora da escala, scores de outro schema...) vai para os extras.
+"""
+import hashlib
+import json
+import struct
+import sys
+import zlib
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+from .model import CompiledSchema
+from .calculator import CODE_NONE, decode_answer, encode_answer
+
+AUDIT_MAGIC = b"KAUD"
+AUDIT_FORMAT_VERSION = 1
+AUDIT_EXT = ".kaud"
+
+FLAG_ZLIB = 1
+FLAG_ORDER = 2
+FLAG_EXTRA = 4
+
+SCORE_NONE = -32768
+_HEADER = struct.Struct("<4sBB16sI")
+_PAYLOAD_KEYS = ["metadata", "responses", "scores"]
+_RESPONSE_KEYS = ["id", "value", "comment"]
+_NIBBLES = [bytes((b & 0x0F, b >> 4)) for b in range(256)]
+
+def schema_hash(compiled: CompiledSchema) -> bytes:
+    """16 bytes que identificam a estrutura (ids, pesos e ordem) do schema."""
+    h = hashlib.sha256()
+    for ids, weights in ((compiled.topic_ids, compiled.topic_weights),
+                         (compiled.group_ids, compiled.group_weights),
+                         (compiled.question_ids, compiled.question_weights)):
+        h.update("\x1f".join(ids).encode("utf-8") + b"\x1e")
+        h.update(_le(weights))
+    h.update(_le(compiled.group_offsets) + _le(compiled.topic_offsets))
+    return h.digest()[:16]
+
+def is_binary_audit(data: bytes) -> bool:
+    return data[:4] == AUDIT_MAGIC
+
+def _le(arr: array) -> bytes:
+    if sys.byteorder == "big":
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+def _from_le(typecode: str, data: bytes) -> array:
+    arr = array(typecode)
+    arr.frombytes(data)
+    if sys.byteorder == "big":
+        arr.byteswap()
+    return arr
+
+def _u32_array(values) -> array:
+    arr = array("I")
+    if arr.itemsize != 4:  # plataformas onde "I" não tem 4 bytes
+        arr = array("L")
+    arr.extend(values)
+    return arr
+
+def _canonical_code(value: Any) -> int:
+    """Código da resposta se ela volta idêntica na decodificação; senão CODE_NONE."""
+    if not isinstance(value, str):
+        return CODE_NONE
+    try:
+        code = encode_answer(value)
+    except (ValueError, TypeError):
+        return CODE_NONE
+    return code if decode_answer(code) == value else CODE_NONE
+
+def _tenths(score: Any) -> Optional[int]:
+    """Score em % com 1 casa -> décimos (i16); None se não for representável sem perda."""
+    if score is None:
+        return SCORE_NONE
+    if not isinstance(score, (int, float)) or isinstance(score, bool):
+        return None
+    t = int(round(score * 10))
+    return t if -32767 <= t <= 32767 and t / 10 == score and type(score) is float else None
+
+def _score_table(compiled: CompiledSchema, scores: Any) -> Optional[Tuple[array, int]]:
+    if not isinstance(scores, dict) or list(scores) != ["topics", "final"]:
+        return None
+    topics = scores["topics"]
+    if not isinstance(topics, list) or len(topics) != len(compiled.topic_ids):
+        return None
+    table = array("h")
+    for entry, tid, w in zip(topics, compiled.topic_ids, compiled.topic_weights):
+        if not isinstance(entry, dict) or list(entry) != ["id", "weight", "score"]:
+            return None
+        if entry["id"] != tid or entry["weight"] != w or type(entry["weight"]) is not float:
+            return None
+        t = _tenths(entry["score"])
+        if t is None:
+            return None
+        table.append(t)
+    final = _tenths(scores["final"])
+    return None if final is None else (table, final)
+
+def encode_audit(payload: Dict[str, Any], compiled: CompiledSchema, compress: bool = True) -> bytes:
+    n = compiled.n_questions
+    index = compiled.question_index
+    codes = bytearray(n)
+    comment_idx: List[int] = []
+    comment_txt: List[bytes] = []
+    order: List[int] = []
+    extra: Dict[str, Any] = {}
+    extra_responses: List[List[Any]] = []
+
+    for pos, r in enumerate(payload.get("responses", [])):
+        i = index.get(r.get("id")) if isinstance(r, dict) and isinstance(r.get("id"), str) else None
+        code = _canonical_code(r.get("value")) if i is not None else CODE_NONE
+        comment = r.get("comment") if isinstance(r, dict) else None
+        if (code == CODE_NONE or codes[i] != CODE_NONE or list(r) != _RESPONSE_KEYS
+                or not (comment is None or isinstance(comment, str))):
+            extra_responses.append([pos, r])
+            continue
+        codes[i] = code
+        order.append(i)
+        if comment is not None:
+            comment_idx.append(i)
+            comment_txt.append(comment.encode("utf-8"))
+    if extra_responses:
+        extra["responses"] = extra_responses
+
+    scores = _score_table(compiled, payload.get("scores"))
+    if scores is None:
+        extra["scores"] = payload.get("scores")
+        scores = (array("h"), SCORE_NONE)
+    if list(payload) != _PAYLOAD_KEYS:
+        extra["keys"] = list(payload)
+        extra["other"] = {k: v for k, v in payload.items() if k not in _PAYLOAD_KEYS}
+        for k in _PAYLOAD_KEYS:
+            if k not in payload:
+                extra.setdefault("missing", []).append(k)
+
+    flags = 0
+    meta = json.dumps(payload.get("metadata"), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if len(codes) % 2:
+        codes.append(CODE_NONE)
+    parts = [
+        struct.pack("<I", len(meta)), meta,
+        bytes(codes[j] | (codes[j + 1] << 4) for j in range(0, len(codes), 2)),
+        struct.pack("<I", len(comment_idx)), _le(_u32_array(comment_idx)),
+        _le(_u32_array(len(t) for t in comment_txt)), b"".join(comment_txt),
+        struct.pack("<H", len(scores[0])), _le(scores[0]), struct.pack("<h", scores[1]),
+    ]
+    if order != sorted(order):
+        flags |= FLAG_ORDER
+        parts += [struct.pack("<I", len(order)), _le(_u32_array(order))]
+    if extra:
+        flags |= FLAG_EXTRA
+        blob = json.dumps(extra, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        parts += [struct.pack("<I", len(blob)), blob]
+
+    body = b"".join(parts)
+    if compress:
+        packed = zlib.compress(body, 6)
+        if len(packed) < len(body):
+            body, flags = packed, flags | FLAG_ZLIB
+    return _HEADER.pack(AUDIT_MAGIC, AUDIT_FORMAT_VERSION, flags, schema_hash(compiled), n) + body
+
+def decode_audit(data: bytes, compiled: CompiledSchema) -> Dict[str, Any]:
+    magic, version, flags, digest, n = _HEADER.unpack_from(data)
+    if magic != AUDIT_MAGIC:
+        raise ValueError("não é uma auditoria binária")
+    if version > AUDIT_FORMAT_VERSION:
+        raise ValueError(f"versão do formato não suportada: {version}")
+    if n != compiled.n_questions or digest != schema_hash(compiled):
+        raise ValueError("auditoria gravada com outro questions.json (hash do schema diferente)")
+
+    body = data[_HEADER.size:]
+    if flags & FLAG_ZLIB:
+        body = zlib.decompress(body)
+    view = memoryview(body)
+    pos = 0
+
+    def take(size: int) -> bytes:
+        nonlocal pos
+        chunk = view[pos:pos + size].tobytes()
+        if len(chunk) != size:
+            raise ValueError("auditoria binária truncada")
+        pos += size
+        return chunk
+
+    def u32() -> int:
+        return struct.unpack("<I", take(4))[0]
+
+    def u32_array(count: int) -> array:
+        return _from_le(_u32_array(()).typecode, take(4 * count))
+
+    metadata = json.loads(take(u32()).decode("utf-8"))
+    codes = b"".join(_NIBBLES[b] for b in take((n + 1) // 2))[:n]
+
+    count = u32()
+    c_idx, c_len = u32_array(count), u32_array(count)
+    comments: Dict[int, str] = {}
+    for i, size in zip(c_idx, c_len):
+        comments[i] = take(size).decode("utf-8")
+
+    n_topics = struct.unpack("<H", take(2))[0]
+    topic_scores = _from_le("h", take(2 * n_topics))
+    final = struct.unpack("<h", take(2))[0]
+
+    order = u32_array(u32()) if flags & FLAG_ORDER else [i for i, c in enumerate(codes) if c]
+    extra = json.loads(take(u32()).decode("utf-8")) if flags & FLAG_EXTRA else {}
+
+    ids = compiled.question_ids
+    responses = [{"id": ids[i], "value": decode_answer(codes[i]), "comment": comments.get(i)}
+                 for i in order]
+    for at, r in extra.get("responses", []):
+        responses.insert(at, r)
+
+    if "scores" in extra:
+        scores = extra["scores"]
+    else:
+        pct = lambda t: None if t == SCORE_NONE else t / 10  # noqa: E731
+        scores = {
+            "topics": [{"id": tid, "weight": w, "score": pct(t)}
+                       for tid, w, t in zip(compiled.topic_ids, compiled.topic_weights, topic_scores)],
+            "final": pct(final),
+        }
+
+    fields = {"metadata": metadata, "responses": responses, "scores": scores}
+    if "keys" not in extra:
+        return fields
+    fields.update(extra.get("other", {}))
+    missing = set(extra.get("missing", []))
+    return {k: fields[k] for k in extra["keys"] if k not in missing}
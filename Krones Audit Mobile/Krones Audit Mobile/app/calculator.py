@@ -1,25 +1,85 @@
 # app/calculator.py
-from typing import Dict, List, Optional, Tuple
-from .model import Topic, Group, Question
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from .model import Topic, Group, Question, CompiledSchema
 
 SCORE_MAP = {100: 1.0, 75: 0.75, 50: 0.5, 25: 0.25, 0: 0.0}
 NA_TOKENS = {"NA", "N.A.", "N.A", "N/A"}
 
+# Respostas codificadas em 1 byte (matrizes de lote, sessões, formato binário)
+CODE_NONE = 0   # sem resposta (ou valor fora da escala)
+CODE_NA = 1
+VALUE_CODES = {0: 2, 25: 3, 50: 4, 75: 5, 100: 6}
+CODE_VALUES = {c: v for v, c in VALUE_CODES.items()}
+
 def _weighted_avg(pairs: List[Tuple[float, float]]) -> Optional[float]:
     num = sum(v * w for v, w in pairs)
     den = sum(w for _, w in pairs)
     return (num / den) if den > 0 else None
 
+def answer_fraction(raw) -> Optional[float]:
+    """Converte a resposta crua ("75", "N.A.", ...) na fração do SCORE_MAP.
+    None = sem resposta, N.A. ou valor fora da escala (não entra na média)."""
+    if raw is None or str(raw).upper() in NA_TOKENS:
+        return None
+    return SCORE_MAP.get(int(raw))
+
+def encode_answer(raw) -> int:
+    """Resposta crua -> código de 1 byte (mesma semântica de answer_fraction)."""
+    if raw is None:
+        return CODE_NONE
+    if str(raw).upper() in NA_TOKENS:
+        return CODE_NA
+    return VALUE_CODES.get(int(raw), CODE_NONE)
+
+def decode_answer(code: int) -> Optional[str]:
+    """Código -> resposta no formato do app ("75", "N.A.") ou None."""
+    if code == CODE_NA:
+        return "N.A."
+    val = CODE_VALUES.get(code)
+    return None if val is None else str(val)
+
+def encode_answers(compiled: CompiledSchema, answers: Dict[str, str]) -> bytearray:
+    """Dict de respostas -> bytearray na ordem das perguntas do schema compilado."""
+    codes = bytearray(compiled.n_questions)
+    index = compiled.question_index
+    for qid, raw in answers.items():
+        i = index.get(qid)
+        if i is not None:
+            codes[i] = encode_answer(raw)
+    return codes
+
+_CODE_FRACTIONS = {c: SCORE_MAP[v] for c, v in CODE_VALUES.items()}
+
+def code_scores(compiled: CompiledSchema, codes) -> Tuple[List[Optional[float]], Optional[float]]:
+    """
+    (scores por tópico, final) de um vetor de códigos, numa passada linear sem
+    NumPy. Mesma semântica de topic_score/final_score.
+    """
+    qw, go, to = compiled.question_weights, compiled.group_offsets, compiled.topic_offsets
+    frac = _CODE_FRACTIONS
+    topics: List[Optional[float]] = []
+    f_pairs = []
+    for ti in range(len(compiled.topic_ids)):
+        t_pairs = []
+        for gi in range(to[ti], to[ti + 1]):
+            pairs = [(frac[codes[qi]], qw[qi]) for qi in range(go[gi], go[gi + 1]) if codes[qi] in frac]
+            gs = _weighted_avg(pairs)
+            if gs is not None:
+                t_pairs.append((gs, compiled.group_weights[gi]))
+        ts = _weighted_avg(t_pairs)
+        topics.append(ts)
+        if ts is not None:
+            f_pairs.append((ts, compiled.topic_weights[ti]))
+    return topics, _weighted_avg(f_pairs)
+
 def group_score(group: Group, answers: Dict[str, str]) -> Optional[float]:
     pairs = []
     for q in group.questions:
-        raw = answers.get(q.id)
-        if raw is None or str(raw).upper() in NA_TOKENS:
+        val = answer_fraction(answers.get(q.id))
+        if val is None:
             continue
-        val = int(raw)
-        if val not in SCORE_MAP:
-            continue
-        pairs.append((SCORE_MAP[val], q.weight))
+        pairs.append((val, q.weight))
     return _weighted_avg(pairs)
 
 def topic_score(topic: Topic, answers: Dict[str, str]) -> Optional[float]:
@@ -36,4 +96,242 @@ def final_score(topics: List[Topic], answers: Dict[str, str]) -> Optional[float]
         ts = topic_score(t, answers)
         if ts is not None:
             pairs.append((ts, t.weight))
-    return _weighted_avg(pairs)
\ No newline at end of file
+    return _weighted_avg(pairs)
+
+
+class _Node:
+    """Nó da árvore de pontuação (grupo, tópico ou raiz) com a soma ponderada dos filhos."""
+    __slots__ = ("weight", "parent", "num", "den", "count", "score")
+
+    def __init__(self, weight: float, parent: Optional["_Node"]):
+        self.weight = weight
+        self.parent = parent
+        self.num = 0.0
+        self.den = 0.0
+        self.count = 0
+        self.score: Optional[float] = None
+
+    def replace(self, old: Optional[float], new: Optional[float], w: float) -> Optional[float]:
+        """Troca a contribuição de um filho (old -> new, peso w). Retorna o score anterior."""
+        if old is not None:
+            self.num -= old * w
+            self.den -= w
+            self.count -= 1
+        if new is not None:
+            self.num += new * w
+            self.den += w
+            self.count += 1
+        if self.count == 0:
+            # zera o resíduo de ponto flutuante das subtrações
+            self.num = self.den = 0.0
+        prev = self.score
+        self.score = (self.num / self.den) if self.den > 0 else None
+        return prev
+
+
+class ScoreEngine:
+    """
+    Pontuação incremental: guarda as somas ponderadas por grupo/tópico/final e,
+    quando uma resposta muda, atualiza só o caminho grupo → tópico → final.
+    Mesma semântica de group_score/topic_score/final_score (N.A. e valores
+    fora da escala não entram na média).
+    """
+
+    def __init__(self, topics: List[Topic]):
+        self.topics = topics
+        self._question_group: Dict[str, Tuple[str, float]] = {}  # qid -> (gid, peso)
+        self._group_topic: Dict[str, str] = {}
+        self._weights: Dict[str, float] = {}  # gid/tid -> peso
+        for t in topics:
+            self._weights[t.id] = t.weight
+            for g in t.groups:
+                self._group_topic[g.id] = t.id
+                self._weights[g.id] = g.weight
+                for q in g.questions:
+                    self._question_group[q.id] = (g.id, q.weight)
+        self.clear()
+
+    def clear(self):
+        """Descarta todas as respostas (scores voltam a None)."""
+        self._root = _Node(1.0, None)
+        self._topics: Dict[str, _Node] = {
+            t.id: _Node(t.weight, self._root) for t in self.topics
+        }
+        self._groups: Dict[str, _Node] = {
+            gid: _Node(self._weights[gid], self._topics[tid])
+            for gid, tid in self._group_topic.items()
+        }
+        self._values: Dict[str, float] = {}  # qid -> fração contabilizada
+        self._na: set = set()  # qids marcados N.A. (fora da média e do ranking de impacto)
+        # Tabela de pesos efetivos: (qid, peso, nó do grupo, nó do tópico), na ordem do schema
+        self._impact_table: List[Tuple[str, float, _Node, _Node]] = [
+            (qid, w, self._groups[gid], self._topics[self._group_topic[gid]])
+            for qid, (gid, w) in self._question_group.items()
+        ]
+
+    def load(self, answers: Dict[str, str]):
+        """Recarrega o estado a partir de um dict completo de respostas."""
+        self.clear()
+        for qid, raw in answers.items():
+            self.set_answer(qid, raw)
+
+    def set_answer(self, qid: str, raw: Optional[str]) -> Tuple[bool, bool]:
+        """
+        Registra/altera/limpa (raw=None) a resposta de uma pergunta. Retorna
+        (score do tópico mudou, score final mudou), para a UI só refazer esses rótulos.
+        """
+        entry = self._question_group.get(qid)
+        if entry is None:
+            return False, False  # pergunta fora do schema: ignorada, como no cálculo completo
+        gid, weight = entry
+        if raw is not None and str(raw).upper() in NA_TOKENS:
+            self._na.add(qid)
+        else:
+            self._na.discard(qid)
+        new = answer_fraction(raw)
+        old = self._values.get(qid)
+        if new == old:
+            return False, False
+        if new is None:
+            del self._values[qid]
+        else:
+            self._values[qid] = new
+
+        node = self._groups[gid]
+        prev = node.replace(old, new, weight)
+        # propaga para cima só enquanto o score do nó realmente mudar
+        changed = 0  # níveis com score novo: 1 = grupo, 2 = + tópico, 3 = + final
+        while node.score != prev:
+            changed += 1
+            if node.parent is None:
+                break
+            prev = node.parent.replace(prev, node.score, node.weight)
+            node = node.parent
+        return changed >= 2, changed >= 3
+
+    # ---------- Leitura dos scores em cache ----------
+    def topic_of(self, qid: str) -> Optional[str]:
+        """Id do tópico da pergunta (None se fora do schema)."""
+        entry = self._question_group.get(qid)
+        return self._group_topic[entry[0]] if entry else None
+
+    def group_score(self, gid: str) -> Optional[float]:
+        node = self._groups.get(gid)
+        return node.score if node else None
+
+    def topic_score(self, tid: str) -> Optional[float]:
+        node = self._topics.get(tid)
+        return node.score if node else None
+
+    def final_score(self) -> Optional[float]:
+        return self._root.score
+
+    # ---------- "O que corrigir primeiro" ----------
+    def impact_ranking(self, limit: Optional[int] = None) -> "ImpactRanking":
+        """
+        Quanto o score final subiria (fração, 0.05 = +5 pontos) se cada pergunta
+        sem resposta ou abaixo de 100 passasse a 100 (só ganhos > 0), com a renormalização de
+        N.A./sem resposta em grupo, tópico e final. Uma passada pela tabela de
+        pesos efetivos usando as somas em cache: O(1) por pergunta.
+        """
+        root = self._root
+        f_num, f_den = root.num, root.den
+        base = root.score or 0.0
+        gains: List[Tuple[str, float]] = []
+        applicable = False
+        for qid, w, g, t in self._impact_table:
+            if qid in self._na:
+                continue
+            applicable = True
+            old = self._values.get(qid)
+            if old is not None and old >= 1.0:
+                continue
+            # grupo: soma a parte que falta; se estava sem resposta, entra no denominador
+            # peso 0 (pergunta, grupo ou tópico) -> denominador 0: o nó segue sem score
+            # (como em _weighted_avg) e responder não muda o final
+            g_den = g.den + (w if old is None else 0.0)
+            if g_den <= 0:
+                continue
+            g_new = (g.num + w * (1.0 - (old or 0.0))) / g_den
+            # tópico e final: troca a contribuição do filho (ou ativa o filho)
+            gs, ts = g.score, t.score
+            t_num = t.num + g.weight * (g_new - (gs or 0.0))
+            t_den = t.den + (g.weight if gs is None else 0.0)
+            if t_den <= 0:
+                continue
+            t_new = t_num / t_den
+            num = f_num + t.weight * (t_new - (ts or 0.0))
+            den = f_den + (t.weight if ts is None else 0.0)
+            if den <= 0:
+                continue
+            gain = num / den - base
+            if gain > 1e-12:  # com o final já em 100%, responder 100 não muda nada
+                gains.append((qid, gain))
+        gains.sort(key=lambda item: -item[1])  # estável: empate mantém a ordem do schema
+        return ImpactRanking(
+            gains=gains if limit is None else gains[:limit],
+            # todas as perguntas aplicáveis em 100 -> todo grupo/tópico ativo vale 1.0
+            max_score=1.0 if applicable else None,
+        )
+
+
+@dataclass
+class ImpactRanking:
+    """Resultado de ScoreEngine.impact_ranking."""
+    gains: List[Tuple[str, float]]  # (qid, ganho no score final), maior primeiro
+    max_score: Optional[float]      # score final máximo alcançável (None se tudo N.A.)
+
+
+# ---------- Pontuação vetorizada (NumPy) ----------
+@dataclass
+class BatchScores:
+    """Scores de n auditorias; NaN onde o cálculo escalar daria None."""
+    groups: Any  # (n_audits, n_groups)
+    topics: Any  # (n_audits, n_topics)
+    final: Any   # (n_audits,)
+
+def _segment_sum(np, values, offsets):
+    """Soma values[..., offsets[i]:offsets[i+1]] para cada segmento (aceita vazios)."""
+    offs = np.frombuffer(offsets, dtype=np.int32)
+    out = np.zeros(values.shape[:-1] + (len(offs) - 1,))
+    starts = offs[:-1]
+    nonempty = offs[1:] > starts
+    if nonempty.any():
+        out[..., nonempty] = np.add.reduceat(values, starts[nonempty], axis=-1)
+    return out
+
+def _ratio(np, num, den):
+    return np.divide(num, den, out=np.full_like(num, np.nan), where=den > 0)
+
+def batch_scores(compiled: CompiledSchema, codes) -> BatchScores:
+    """
+    Pontua várias auditorias de uma vez a partir de uma matriz de códigos
+    (n_audits x n_questions, ver encode_answers). Requer NumPy, que é
+    opcional: só as ferramentas de desktop usam este caminho.
+    """
+    import numpy as np
+
+    codes = np.asarray(codes, dtype=np.uint8)
+    if codes.ndim == 1:
+        codes = codes[np.newaxis, :]
+
+    fractions = np.zeros(256)
+    scored = np.zeros(256, dtype=bool)
+    for code, val in CODE_VALUES.items():
+        fractions[code] = SCORE_MAP[val]
+        scored[code] = True
+
+    qw = np.where(scored[codes], np.frombuffer(compiled.question_weights, dtype=np.float64), 0.0)
+    g_num = _segment_sum(np, qw * fractions[codes], compiled.group_offsets)
+    g_den = _segment_sum(np, qw, compiled.group_offsets)
+    gs = _ratio(np, g_num, g_den)
+
+    gw = np.where(g_den > 0, np.frombuffer(compiled.group_weights, dtype=np.float64), 0.0)
+    t_num = _segment_sum(np, np.where(g_den > 0, gs, 0.0) * gw, compiled.topic_offsets)
+    t_den = _segment_sum(np, gw, compiled.topic_offsets)
+    ts = _ratio(np, t_num, t_den)
+
+    tw = np.where(t_den > 0, np.frombuffer(compiled.topic_weights, dtype=np.float64), 0.0)
+    f_num = (np.where(t_den > 0, ts, 0.0) * tw).sum(axis=-1)
+    f_den = tw.sum(axis=-1)
+    return BatchScores(groups=gs, topics=ts, final=_ratio(np, f_num, f_den))
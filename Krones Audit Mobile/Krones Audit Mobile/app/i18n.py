@@ -1,5 +1,10 @@
 # app/i18n.py
-from typing import Dict
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+import re
+import unicodedata
 
 def get_title(title_map: Dict[str, str], lang: str) -> str:
     """Retorna o título no idioma solicitado, com fallback para qualquer disponível."""
@@ -11,4 +16,96 @@ def get_title(title_map: Dict[str, str], lang: str) -> str:
     for _, v in title_map.items():
         if v:
             return v
-    return ""
\ No newline at end of file
+    return ""
+
+def build_title_tables(topics: List[Any], languages: List[str]) -> Dict[str, Dict[str, str]]:
+    """
+    Pré-calcula {idioma: {id: título}} para tópicos, grupos e perguntas, já com
+    o fallback de get_title aplicado. Os ids não colidem entre níveis ("1", "1.1", "1.1.1").
+    """
+    tables: Dict[str, Dict[str, str]] = {lang: {} for lang in languages}
+    for lang, table in tables.items():
+        for t in topics:
+            table[t.id] = get_title(t.title, lang)
+            for g in t.groups:
+                table[g.id] = get_title(g.title, lang)
+                for q in g.questions:
+                    table[q.id] = get_title(q.title, lang)
+    return tables
+
+# ---------- Busca de perguntas (índice invertido) ----------
+_WORD = re.compile(r"\w+")
+
+def fold_text(text: str) -> str:
+    """Minúsculas e sem acentos ("Válvula" -> "valvula"), para comparar em qualquer idioma."""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+@dataclass
+class SearchIndex:
+    """
+    Índice invertido dos títulos (todos os idiomas) e ids de grupos e perguntas.
+    `terms` fica ordenado: os termos com um prefixo formam uma faixa contígua,
+    achada por bisect; `postings[i]` são as posições em `ids` que contêm terms[i].
+    """
+    ids: List[str] = field(default_factory=list)      # nós, na ordem do schema
+    topics: List[str] = field(default_factory=list)   # tópico de cada nó
+    terms: List[str] = field(default_factory=list)
+    postings: List[array] = field(default_factory=list)  # 'i', crescentes
+
+    def _prefix_matches(self, prefix: str) -> set:
+        found: set = set()
+        i = bisect_left(self.terms, prefix)
+        terms = self.terms
+        n = len(prefix)
+        while i < len(terms) and terms[i].startswith(prefix):
+            term = terms[i]
+            # só ids têm "." (_WORD não os inclui): casam por segmento inteiro,
+            # "2.3" acha 2.3 e 2.3.* mas não 2.30.*
+            if "." not in term or len(term) == n or term[n] == ".":
+                found.update(self.postings[i])
+            i += 1
+        return found
+
+    def search(self, query: str, limit: int = 50) -> List[Tuple[str, str]]:
+        """
+        [(id, tópico)] dos nós que têm, para cada palavra da consulta, algum termo
+        começando por ela (sem acento/caixa). Ids também valem, por segmento: "2.3"
+        acha 2.3 e 2.3.*, não 2.30.*.
+        """
+        words = [w for w in (fold_text(w).strip(".,;:!?()[]\"'") for w in query.split()) if w]
+        if not words:
+            return []
+        hits = None
+        for w in sorted(words, key=len, reverse=True):  # prefixos longos filtram mais
+            found = self._prefix_matches(w)
+            hits = found if hits is None else hits & found
+            if not hits:
+                return []
+        return [(self.ids[i], self.topics[i]) for i in sorted(hits)[:limit]]
+
+def build_search_index(topics: List[Any]) -> SearchIndex:
+    """Monta o SearchIndex de grupos e perguntas (títulos em todos os idiomas + id)."""
+    index = SearchIndex()
+    by_term: Dict[str, List[int]] = {}
+
+    def add(node: Any, topic_id: str):
+        pos = len(index.ids)
+        index.ids.append(node.id)
+        index.topics.append(topic_id)
+        words = {fold_text(node.id)}
+        for text in node.title.values():  # todos os idiomas do nó
+            words.update(_WORD.findall(fold_text(text or "")))
+        for w in words:
+            by_term.setdefault(w, []).append(pos)
+
+    for t in topics:
+        for g in t.groups:
+            add(g, t.id)
+            for q in g.questions:
+                add(q, t.id)
+    index.terms = sorted(by_term)
+    index.postings = [array("i", by_term[w]) for w in index.terms]
+    return index
@@ -1,41 +1,47 @@
 # app/main.py
+import time
+_IMPORT_T0 = time.perf_counter()  # fase "imports" do StartupProfiler
+
 from kivymd.app import MDApp
 from kivy.lang import Builder
 from kivy.metrics import dp
-from kivy.properties import DictProperty, StringProperty, ObjectProperty
-from kivy.uix.filechooser import FileChooserIconView  # desktop popup
-from kivymd.uix.filemanager import MDFileManager      # Android (opção B)
+from kivy.properties import DictProperty, StringProperty, ObjectProperty, BooleanProperty
 from kivy.core.window import Window
-from kivy.uix.scrollview import ScrollView
+from kivy.clock import Clock
 from kivy.factory import Factory
-from kivy.uix.popup import Popup
-from kivy.utils import platform
-from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.button import Button
-from kivy.uix.textinput import TextInput
-from kivy.uix.filechooser import FileChooserIconView
+from kivy.utils import platform, escape_markup
 
-import os, json
+import os
 
 from kivymd.uix.tab import MDTabsBase
-from kivymd.uix.boxlayout import MDBoxLayout, BoxLayout
+from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.uix.list import IconRightWidget
 from kivymd.uix.selectioncontrol import MDCheckbox
 from kivymd.uix.label import MDLabel
 from kivy.uix.floatlayout import FloatLayout
 from kivymd.uix.card import MDCard
-from kivymd.uix.dialog import MDDialog
-from kivymd.uix.textfield import MDTextField
-from kivymd.uix.button import MDFlatButton, MDRaisedButton  # KivyMD 1.x
 from kivy.uix.widget import Widget
-from kivymd.uix.snackbar import MDSnackbar
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+# Diálogos de exportação/comentário (FileChooser, MDFileManager, Popup, MDDialog,
+# MDSnackbar, TextInput...) são importados no primeiro uso, fora do caminho de startup.
 
 from pathlib import Path
-
-from .model import Schema, Topic
+from typing import Optional
+
+from .model import Schema, Topic, CompiledSchema, compile_schema
+from .calculator import ScoreEngine, NA_TOKENS
+from .storage import (build_result, AnswerJournal, JOURNAL_FILE, ExportService, EXPORT_MODES, export_filename,
+                      import_audit)
+from .profiling import StartupProfiler, TRACER, TRACE_FLAG
+from .session import SessionManager
+from .trends import TrendEngine, TRENDS_FILE
+from .registry import SchemaRegistry, SchemaInfo, DEFAULT_SCHEMA_ID, USER_SCHEMA_DIR, journal_name
 from .i18n import get_title
-from .calculator import final_score, topic_score
-from .storage import build_result
+
+STARTUP = StartupProfiler(started_at=_IMPORT_T0)  # ligado por KRONES_PROFILE_STARTUP=1
+STARTUP.record("imports", time.perf_counter() - _IMPORT_T0)
 # Em dev desktop (ignorado no Android)
 try:
     Window.size = (500, 800)
@@ -47,6 +53,107 @@ class TopicTab(MDBoxLayout, MDTabsBase):
     """Conteúdo de uma aba de Tópico para KivyMD 1.x"""
     topic: Topic
     lang: str
+    built = False  # perguntas só são montadas na primeira vez que a aba é aberta
+
+
+CHOICES = ("100", "75", "50", "25", "0", "N.A.")
+
+
+class GroupHeader(MDLabel):
+    """Cabeçalho de grupo na lista reciclada (texto com quebra de linha)."""
+
+    def __init__(self, **kwargs):
+        super().__init__(markup=True, size_hint_y=None, **kwargs)
+        self.bind(
+            width=lambda inst, width: setattr(inst, "text_size", (width - dp(16), None)),
+            texture_size=lambda inst, val: setattr(inst, "height", val[1] + dp(6)),
+        )
+
+
+class QuestionRow(RecycleDataViewBehavior, MDBoxLayout):
+    """
+    Linha de pergunta reciclada pelo RecycleView: TÍTULO + OPÇÕES + comentário.
+    Os widgets são criados uma vez por view; o estado vem do dict de dados
+    (qid, title, answer, has_comment), nunca do próprio checkbox.
+    """
+    qid = StringProperty("")
+    title = StringProperty("")
+    answer = StringProperty(None, allownone=True)
+    has_comment = BooleanProperty(False)
+
+    @TRACER.traced("QuestionRow.__init__")
+    def __init__(self, **kwargs):
+        super().__init__(
+            orientation="vertical",
+            padding=(dp(12), dp(8), dp(12), dp(8)),
+            spacing=dp(6),
+            size_hint_y=None,
+            **kwargs,
+        )
+        self.index = None
+        self._syncing = False
+        # Faz a altura do container seguir a soma da altura dos filhos
+        self.bind(minimum_height=self.setter("height"))
+
+        # ---------- TÍTULO DA PERGUNTA (com quebra de linha) ----------
+        self._title_lbl = MDLabel(theme_text_color="Primary", halign="left", size_hint_y=None)
+        self._title_lbl.bind(
+            texture_size=lambda inst, val: setattr(inst, "height", val[1] + dp(2)),
+            width=lambda inst, width: setattr(inst, "text_size", (width, None)),
+        )
+        self.add_widget(self._title_lbl)
+
+        # ---------- LINHA DE OPÇÕES (100/75/50/25/0/N.A.) ----------
+        row = MDBoxLayout(orientation="horizontal", spacing=dp(8), size_hint_y=None, height=dp(44))
+        self._boxes = {}
+        group = f"question_row_{id(self)}"  # grupo fixo por view (sobrevive à reciclagem)
+        for value in CHOICES:
+            cb = MDCheckbox(group=group, size_hint=(None, None), size=(dp(28), dp(28)))
+            cb.bind(active=lambda inst, active, value=value: self._on_choice(value, active))
+            self._boxes[value] = cb
+            lbl = MDLabel(text=value, halign="center", size_hint_x=None, width=dp(36))
+            col = MDBoxLayout(orientation="horizontal", size_hint_x=None, width=dp(64), spacing=dp(4))
+            col.add_widget(cb)
+            col.add_widget(lbl)
+            row.add_widget(col)
+
+        # Ícone de comentário à direita
+        self._comment_icon = IconRightWidget(
+            icon="comment-text-outline",
+            on_release=lambda *_: MDApp.get_running_app().open_comment_dialog(self.qid),
+        )
+        row.add_widget(self._comment_icon)
+        self.add_widget(row)
+        self.add_widget(Widget(size_hint=(1, None), height=dp(8)))
+
+    @TRACER.traced("QuestionRow.refresh_view_attrs")
+    def refresh_view_attrs(self, rv, index, data):
+        self.index = index
+        super().refresh_view_attrs(rv, index, data)
+        self._title_lbl.text = self.title
+        self._comment_icon.icon = "comment-text" if self.has_comment else "comment-text-outline"
+        current = self.answer
+        if current is not None and str(current).upper() in NA_TOKENS:
+            current = "N.A."
+        self._syncing = True
+        try:
+            for value, cb in self._boxes.items():
+                cb.active = (value == current)
+        finally:
+            self._syncing = False
+
+    def _on_choice(self, value: str, active: bool):
+        if self._syncing or not active:
+            return
+        app = MDApp.get_running_app()
+        if app.answers.get(self.qid) == value:
+            return  # compara com o estado do app, não com o da view (pode estar defasado)
+        self.answer = value
+        app.set_answer(self.qid, value)
+
+
+Factory.register("GroupHeader", cls=GroupHeader)
+Factory.register("QuestionRow", cls=QuestionRow)
 
 # ---- Dialogs para Desktop (Salvar Como...) ----
 class SaveDialog(FloatLayout):
@@ -70,19 +177,67 @@ class AuditoriaApp(MDApp):
     comments = DictProperty()  # { "1.1.1": "observação", ... }
 
     dialog = None
+    engine: ScoreEngine = None  # scores incrementais (ver calculator.ScoreEngine)
+    compiled: CompiledSchema = None  # schema achatado (índices das perguntas)
+    sessions: SessionManager = None  # auditorias abertas; answers/comments espelham a ativa
+    _rows: dict = None  # qid -> (RecycleView, índice em rv.data) das abas já montadas
+    journal: AnswerJournal = None  # diário da auditoria em andamento (sobrevive a um kill)
+    export_mode = "pretty"  # "pretty" (indent=2), "compact", "gzip" ou "binary" (ver storage.EXPORT_MODES)
+    _exporter: ExportService = None
+    _impact_label = None  # rótulo do diálogo "O que corrigir primeiro" (quando aberto)
+    _score_labels: dict = None  # topic_id -> MDLabel do card "Média do tópico"
+    _dirty_topics: set = None  # tópicos cujo rótulo precisa ser refeito no próximo frame
+    _final_dirty: bool = False  # rótulo do resultado final idem
+    _scores_trigger = None  # Clock trigger: vários toques no mesmo frame = uma atualização
+    _search_hits: dict = None  # id -> tópico dos resultados exibidos na busca
+    registry: SchemaRegistry = None  # questionários disponíveis (cabeçalhos + LRU de schemas)
+    schema_info: SchemaInfo = None  # questionário ativo (None se nenhum foi encontrado)
+    SCHEMA_SELECTED_FILE = "schema.selected"  # em user_data_dir: último questionário escolhido
+    EXPORT_MODE_FILE = "export.mode"  # em user_data_dir: formato de exportação escolhido
+    EXPORT_MODE_LABELS = {"pretty": "JSON", "compact": "JSON compacto",
+                          "gzip": "JSON compactado (gzip)", "binary": "binário"}
+
+    @property
+    def exporter(self) -> ExportService:
+        """Serviço de exportação em thread de fundo; callbacks voltam pela Clock."""
+        if self._exporter is None:
+            from .archive import AuditArchive, ARCHIVE_FILE
+            self._exporter = ExportService(
+                dispatch=lambda fn, *args: Clock.schedule_once(lambda dt: fn(*args)),
+                archive=AuditArchive(Path(self.user_data_dir) / ARCHIVE_FILE),
+                compiled=self.compiled,
+                trends=TrendEngine(Path(self.user_data_dir) / TRENDS_FILE),
+            )
+        return self._exporter
 
 
     def build(self):
         kv_path = Path(__file__).with_name("ui") / "screens.kv"
-        root = Builder.load_file(str(kv_path))
-        if root is None:
-            root = Factory.RootScreen()
+        with STARTUP.phase("Builder.load_file"):
+            root = Builder.load_file(str(kv_path))
+            if root is None:
+                root = Factory.RootScreen()
 
-        self.load_questions()
-        self.build_tabs(root.ids.tabs)
+        if (Path(self.user_data_dir) / TRACE_FLAG).exists():
+            TRACER.enabled = True
+        try:
+            mode = (Path(self.user_data_dir) / self.EXPORT_MODE_FILE).read_text(encoding="utf-8").strip()
+            if mode in EXPORT_MODES:
+                self.export_mode = mode
+        except OSError:
+            pass
+        self._dirty_topics = set()
+        self._scores_trigger = Clock.create_trigger(self._flush_scores)
+        with STARTUP.phase("schema_registry"):
+            self._open_registry()
+        self._restore_session()
+        with STARTUP.phase("load_questions"):
+            self.load_questions()
+        with STARTUP.phase("build_tabs"):
+            self.build_tabs(root.ids.tabs)
 
         # Inicializa o rótulo do resultado SEM usar self.root (ainda é None aqui)
-        final = final_score(self.schema.topics, self.answers)
+        final = self.engine.final_score()
         root.ids.final_score_label.text = (
             f"Resultado: {round(final*100,1)}%" if final is not None else "Resultado: —"
         )
@@ -91,8 +246,29 @@ class AuditoriaApp(MDApp):
 
     def on_start(self):
         # Agora self.root já existe; aqui é seguro tocar na árvore de widgets
-        self._request_android_permissions()
-        self.update_scores_ui()
+        with STARTUP.phase("on_start"):
+            self._request_android_permissions()
+            self.update_scores_ui()
+        STARTUP.dump(self.user_data_dir)
+
+    def on_pause(self):
+        # Android pode matar o app em segundo plano: garante o diário em disco
+        if self.journal:
+            self.journal.sync()
+        return True
+
+    def on_stop(self):
+        if self.journal:
+            self.journal.close()
+
+    def _restore_session(self):
+        """Reabre o diário e restaura respostas/comentários não exportados."""
+        schema_id = self.schema_info.id if self.schema_info else DEFAULT_SCHEMA_ID
+        self.journal = AnswerJournal(Path(self.user_data_dir) / journal_name(schema_id, JOURNAL_FILE))
+        answers, comments = self.journal.replay()
+        self.answers = answers
+        self.comments = comments
+        self.journal.start()
 
     def _request_android_permissions(self):
         if platform != "android":
@@ -108,6 +284,7 @@ class AuditoriaApp(MDApp):
             print(f"[PERMISSION WARNING] Não foi possível solicitar permissões: {exc}")
 
 
+    @TRACER.traced("build_tabs")
     def build_tabs(self, tabs):
         # --- Remova as abas existentes (1.x não tem clear_tabs) ---
         try:
@@ -119,10 +296,13 @@ class AuditoriaApp(MDApp):
                 if isinstance(child, MDTabsBase):
                     tabs.remove_widget(child)
 
-        # --- Crie as novas abas ---
+        self._rows = {}
+        self._score_labels = {}
+
+        # --- Crie as novas abas (só título + card; perguntas sob demanda) ---
         for topic in self.schema.topics:
             tab = TopicTab()
-            tab.title = get_title(topic.title, self.lang) or f"Tópico {topic.id}"
+            tab.title = self._title(topic.id) or f"Tópico {topic.id}"
             tab.topic = topic
             tab.lang = self.lang
             tab.orientation = "vertical"
@@ -137,40 +317,14 @@ class AuditoriaApp(MDApp):
                                 font_style="Subtitle2")
             score_card.add_widget(score_label)
             tab.add_widget(score_card)
-
-            # ---------- Scroll + PILHA (substitui MDList) ----------
-            sc = ScrollView(do_scroll_x=False, do_scroll_y=True)
-
-            pile = MDBoxLayout(orientation="vertical",
-                            spacing=dp(8),
-                            padding=(dp(8), dp(4), dp(8), dp(12)))
-            pile.size_hint_y = None
-            pile.bind(minimum_height=pile.setter("height"))
-
-            sc.add_widget(pile)
-
-            # ---------- Cabeçalhos de GRUPO + Perguntas ----------
-            for group in topic.groups:
-                group_title = get_title(group.title, self.lang) or f"Grupo {group.id}"
-
-                header = MDLabel(text=f"[b]{group_title}[/b]",
-                                markup=True,
-                                size_hint_y=None)
-                # quebra de linha automática
-                def _sync_header_width(inst, width):
-                    inst.text_size = (width - dp(16), None)
-                header.bind(
-                    width=_sync_header_width,
-                    texture_size=lambda inst, val: setattr(inst, "height", val[1] + dp(6)),
-                )
-                pile.add_widget(header)
-
-                for q in group.questions:
-                    pile.add_widget(self._build_question_row(q))
-
-            tab.add_widget(sc)
+            self._score_labels[topic.id] = score_label
             tabs.add_widget(tab)
 
+        # A aba visível na abertura é montada já; as demais em on_tab_switch
+        tab_list = tabs.get_tab_list()
+        if tab_list:
+            self._ensure_tab_built(tab_list[0].tab)
+
         # (opcional) log rápido para checagem
         try:
             total_groups = sum(len(t.groups) for t in self.schema.topics)
@@ -179,28 +333,63 @@ class AuditoriaApp(MDApp):
         except Exception:
             pass
 
-
+    @TRACER.traced("_ensure_tab_built")
+    def _ensure_tab_built(self, tab):
+        """Monta (uma única vez) os cabeçalhos de grupo e as perguntas da aba."""
+        if tab.built or not hasattr(tab, "topic"):
+            return
+        tab.built = True
+        topic = tab.topic
+
+        # ---------- Lista reciclada: só as linhas visíveis viram widgets ----------
+        rv = RecycleView(do_scroll_x=False, do_scroll_y=True)
+        layout = RecycleBoxLayout(orientation="vertical",
+                                 spacing=dp(8),
+                                 padding=(dp(8), dp(4), dp(8), dp(12)),
+                                 default_size=(None, dp(120)),
+                                 default_size_hint=(1, None),
+                                 key_viewclass="viewclass",
+                                 size_hint_y=None)
+        layout.bind(minimum_height=layout.setter("height"))
+        rv.add_widget(layout)
+
+        # ---------- Cabeçalhos de GRUPO + Perguntas ----------
+        data = []
+        for group in topic.groups:
+            data.append(self._header_data(group))
+            for q in group.questions:
+                self._rows[q.id] = (rv, len(data))
+                data.append(self._question_data(q))
+        rv.data = data
+        tab.question_list = rv
+        tab.add_widget(rv)
+
+
+    @TRACER.traced("load_questions")
     def load_questions(self):
         """
-        Carrega o schema (tópicos/grupos/perguntas) a partir de app/data/questions.json
-        e garante que o idioma atual é suportado.
+        Carrega o schema (tópicos/grupos/perguntas) do questionário ativo pelo
+        registro (LRU + cache binário em user_data_dir) e garante que o idioma
+        atual é suportado.
         """
-        from pathlib import Path
-        from .model import load_schema  # garante import local aqui também
-
-        data_path = Path(__file__).with_name("data") / "questions.json"
-        if not data_path.exists():
+        if self.schema_info is None:
             # Evita crash e informa o usuário no app
             try:
                 from kivymd.uix.snackbar import Snackbar
-                Snackbar(text=f"Arquivo não encontrado: {data_path.name}", duration=3).open()
+                Snackbar(text="Nenhum questionário encontrado", duration=3).open()
             except Exception:
                 pass
             # Cria um Schema vazio mínimo para não quebrar build_tabs
-            self.schema = type("Schema", (), {"languages": ["pt-BR"], "topics": []})()
+            self.schema = type("Schema", (), {"languages": ["pt-BR"], "topics": [], "titles": {},
+                                               "search": None})()
+            self.engine = ScoreEngine([])
+            self._open_sessions()
             return
 
-        self.schema = load_schema(data_path)
+        self.schema = self.registry.load(self.schema_info.id)
+        self.engine = ScoreEngine(self.schema.topics)
+        self.engine.load(self.answers)
+        self._open_sessions()
 
         # Se o idioma ativo não existir no arquivo, caia para o primeiro disponível
         if getattr(self, "lang", None) not in self.schema.languages and self.schema.languages:
@@ -209,85 +398,75 @@ class AuditoriaApp(MDApp):
             self.lang = "pt-BR"
 
 
-    def _build_question_row(self, q):
-        """Bloco com TÍTULO (quebra de linha) + LINHA DE OPÇÕES + comentário + divisor."""
-
-        # Contêiner vertical com altura adaptativa
-        container = MDBoxLayout(
-            orientation="vertical",
-            padding=(dp(12), dp(8), dp(12), dp(8)),
-            spacing=dp(6),
-            size_hint_y=None,
-        )
-        # Faz a altura do container seguir a soma da altura dos filhos
-        container.bind(minimum_height=container.setter("height"))
-
-        # ---------- TÍTULO DA PERGUNTA (com quebra de linha) ----------
-        title = get_title(q.title, self.lang) or q.id
-        title_lbl = MDLabel(
-            text=title,
-            theme_text_color="Primary",
-            halign="left",
-            size_hint_y=None,
-            # height será vinculada ao texture_size (para caber todo o texto)
-        )
-        # O texto quebra de linha conforme a largura disponível
-        def _sync_text_width(instance, width):
-            instance.text_size = (width, None)
-        title_lbl.bind(
-            texture_size=lambda inst, val: setattr(inst, "height", val[1] + dp(2)),
-            width=_sync_text_width
-        )
-        container.add_widget(title_lbl)
-
-        # ---------- LINHA DE OPÇÕES (100/75/50/25/0/N.A.) ----------
-        row = MDBoxLayout(
-            orientation="horizontal",
-            spacing=dp(8),
-            size_hint_y=None,
-            height=dp(44),
-        )
-
-        def add_choice(value_text, value_payload):
-            cb = MDCheckbox(group=q.id, size_hint=(None, None), size=(dp(28), dp(28)))
-            current = self.answers.get(q.id)
-            if (isinstance(value_payload, int) and current == str(value_payload)) or \
-            (isinstance(value_payload, str) and str(current).upper() in {"NA","N.A.","N/A"}):
-                cb.active = True
-
-            def on_active(inst, active):
-                if not active:
-                    return
-                self.answers[q.id] = str(value_payload)
-                self.update_scores_ui()
-            cb.bind(active=on_active)
-
-            lbl = MDLabel(text=value_text, halign="center", size_hint_x=None, width=dp(36))
-            col = MDBoxLayout(orientation="horizontal", size_hint_x=None, width=dp(64), spacing=dp(4))
-            col.add_widget(cb)
-            col.add_widget(lbl)
-            row.add_widget(col)
-
-        for v in (100, 75, 50, 25, 0):
-            add_choice(str(v), v)
-        add_choice("N.A.", "N.A.")
-
-        # Ícone de comentário à direita
-        icon = IconRightWidget(icon="comment-text-outline",
-                            on_release=lambda w, qid=q.id: self.open_comment_dialog(qid))
-        row.add_widget(icon)
+    def _open_sessions(self):
+        self.compiled = compile_schema(self.schema.topics)
+        self.sessions = SessionManager(self.compiled)
+        try:
+            site = self._site_path().read_text(encoding="utf-8").strip() or None
+        except OSError:
+            site = None
+        self.sessions.open(answers=self.answers, comments=self.comments, site=site)
 
-        container.add_widget(row)
+    def _site_path(self) -> Path:
+        """Local da auditoria do diário, para sobreviver a um reinício."""
+        return self.journal.path.with_suffix(".site")
 
-        spacer = Widget(size_hint=(1,None), height=dp(8))
-        container.add_widget(spacer)
+    def _active_site(self) -> Optional[str]:
+        return self.sessions.active.site if self.sessions.active else None
 
-        return container
+    def _remember_site(self):
+        try:
+            self._site_path().write_text(self._active_site() or "", encoding="utf-8")
+        except OSError as e:
+            print(f"[SESSION] não foi possível gravar o local: {e}")
+
+    def _title(self, node_id: str) -> str:
+        """Título já resolvido (com fallback) no idioma ativo, via tabelas do schema."""
+        return self.schema.titles.get(self.lang, {}).get(node_id, "")
+
+    def _header_text(self, group_id: str) -> str:
+        group_title = self._title(group_id) or f"Grupo {group_id}"
+        return f"[b]{group_title}[/b]"
+
+    def _header_data(self, group) -> dict:
+        return {"viewclass": "GroupHeader", "text": self._header_text(group.id), "group_id": group.id}
+
+    def _question_data(self, q) -> dict:
+        """Item de dados de uma pergunta para o RecycleView da aba."""
+        return {
+            "viewclass": "QuestionRow",
+            "qid": q.id,
+            "title": self._title(q.id) or q.id,
+            "answer": self.answers.get(q.id),
+            "has_comment": bool(self.comments.get(q.id)),
+        }
+
+    def _refresh_row(self, qid: str, **changes):
+        """Atualiza o item de dados da pergunta e redesenha só as views visíveis."""
+        ref = self._rows.get(qid)
+        if ref is None:
+            return  # aba ainda não montada: os dados saem certos ao montar
+        rv, idx = ref
+        rv.data[idx].update(changes)
+        rv.refresh_from_data()
+
+    @TRACER.traced("set_answer")
+    def set_answer(self, qid: str, value: str):
+        self.answers[qid] = value
+        topic_changed, final_changed = self.engine.set_answer(qid, value)
+        self.sessions.record_answer(qid, value)
+        self.journal.record_answer(qid, value)
+        ref = self._rows.get(qid)
+        if ref is not None:
+            ref[0].data[ref[1]]["answer"] = value  # a view visível já mostra o toque
+        self._mark_scores_dirty(self.engine.topic_of(qid) if topic_changed else None, final_changed)
 
     # ---------- Eventos ----------
-    def on_tab_switch(self, *args):
-        self.update_scores_ui()
+    def on_tab_switch(self, instance_tabs, instance_tab, instance_tab_label, tab_text):
+        # os cards já estão em dia (ver _flush_scores): só monta a aba se preciso
+        self._ensure_tab_built(instance_tab)
 
+    @TRACER.traced("toggle_language")
     def toggle_language(self):
         langs = self.schema.languages or ["pt-BR", "es"]
         if self.lang not in langs:
@@ -295,18 +474,364 @@ class AuditoriaApp(MDApp):
         else:
             idx = langs.index(self.lang)
             self.lang = langs[(idx + 1) % len(langs)]
-        tabs = self.root.ids.tabs
-        self.build_tabs(tabs)
-        self.update_scores_ui()
+        self.relabel_tabs()
+
+    def relabel_tabs(self):
+        """Troca os textos das abas já existentes para o idioma ativo, sem recriar widgets."""
+        for tab_label in self.root.ids.tabs.get_tab_list():
+            tab = tab_label.tab
+            if not hasattr(tab, "topic"):
+                continue
+            tab.title = self._title(tab.topic.id) or f"Tópico {tab.topic.id}"
+            tab.lang = self.lang
+            if not tab.built:
+                continue  # montada depois, já no idioma novo
+            rv = tab.question_list
+            for item in rv.data:
+                if "group_id" in item:
+                    item["text"] = self._header_text(item["group_id"])
+                else:
+                    item["title"] = self._title(item["qid"]) or item["qid"]
+            rv.refresh_from_data()
 
     def clear_answers(self):
-        self.answers = {}
-        self.comments = {}
+        self.load_audit({}, {})
+
+    def load_audit(self, answers: dict, comments: dict):
+        """
+        Troca a auditoria exibida (limpar ou carregar outra no mesmo schema) sem
+        recriar widgets: uma passada nos dados das listas já montadas, e as views
+        visíveis se redesenham a partir deles.
+        """
+        self.sessions.replace_active(answers, comments)
+        self._show_audit(answers, comments)
+
+    @TRACER.traced("_show_audit")
+    def _show_audit(self, answers: dict, comments: dict):
+        self.answers = dict(answers)
+        self.comments = dict(comments)
+        self.engine.load(self.answers)
+        self.journal.reset()
+        for qid, value in self.answers.items():
+            self.journal.record_answer(qid, value)
+        for qid, text in self.comments.items():
+            self.journal.record_comment(qid, text)
+        self._remember_site()
+        self._sync_rows()
+        self.update_scores_ui()
+
+    # ---------- Várias auditorias abertas ----------
+    def _cache_active_scores(self):
+        """A sessão que sai de cena leva os scores do engine (sem recalcular)."""
+        active = self.sessions.active
+        if active is not None:
+            active.cache_scores([self.engine.topic_score(tid) for tid in self.compiled.topic_ids],
+                                self.engine.final_score())
+
+    def switch_session(self, name: str):
+        """Mostra outra auditoria aberta, reaproveitando os widgets das abas."""
+        if self.sessions.active is not None and self.sessions.active.name == name:
+            return
+        self._cache_active_scores()
+        session = self.sessions.activate(name)
+        self._show_audit(session.answers(self.compiled), session.comments)
+
+    def new_session(self):
+        """Abre uma auditoria vazia; as demais continuam abertas em memória."""
+        self._cache_active_scores()
+        self.sessions.open()
+        self._show_audit({}, {})
+
+    def open_sessions_dialog(self):
+        from kivymd.uix.dialog import MDDialog
+        from kivymd.uix.button import MDFlatButton
+
+        box = MDBoxLayout(orientation="vertical", adaptive_height=True, spacing=dp(4))
+        for session in self.sessions:
+            if session is self.sessions.active:
+                final = self.engine.final_score()
+            else:
+                final = session.scores(self.compiled)[1]
+            pct = "—" if final is None else f"{round(final*100,1)}%"
+            mark = " (aberta)" if session is self.sessions.active else ""
+            site = f" - {session.site}" if session.site else ""
+            box.add_widget(MDFlatButton(
+                text=f"{session.name}{site}: {pct}{mark}",
+                on_release=lambda _, name=session.name: (dialog.dismiss(), self.switch_session(name)),
+            ))
+        dialog = MDDialog(
+            title="Auditorias abertas",
+            type="custom",
+            content_cls=box,
+            buttons=[
+                MDFlatButton(text="Nova", on_release=lambda *_: (dialog.dismiss(), self.new_session())),
+                MDFlatButton(text="Local", on_release=lambda *_: (dialog.dismiss(), self.open_site_dialog())),
+                MDFlatButton(text="Fechar", on_release=lambda *_: dialog.dismiss()),
+            ],
+        )
+        dialog.open()
+
+    # ---------- Questionários (instalação, comissionamento...) ----------
+    def _open_registry(self):
+        """Lê os cabeçalhos dos questionários e escolhe o último usado (ou o padrão)."""
+        data_dir = Path(__file__).with_name("data")
+        self.registry = SchemaRegistry(SchemaRegistry.default_dirs(data_dir, self.user_data_dir),
+                                       cache_dir=self.user_data_dir)
+        self.registry.scan()
+        selected = Path(self.user_data_dir) / self.SCHEMA_SELECTED_FILE
+        try:
+            schema_id = selected.read_text(encoding="utf-8").strip()
+        except OSError:
+            schema_id = DEFAULT_SCHEMA_ID
+        self.schema_info = (self.registry.get(schema_id) or self.registry.get(DEFAULT_SCHEMA_ID)
+                            or next(iter(self.registry), None))
+
+    def _schema_meta(self) -> dict:
+        """Identificação do questionário gravada em cada auditoria exportada."""
+        from .audit_codec import schema_hash
+        info = self.schema_info
+        return {"id": info.id if info else None, "version": info.version if info else None,
+                "hash": schema_hash(self.compiled).hex()}
+
+    @TRACER.traced("switch_schema")
+    def switch_schema(self, schema_id: str) -> bool:
+        """
+        Troca o questionário ativo: o diário do atual fica em disco e o do novo é
+        reaberto (cada questionário retoma a própria auditoria). As outras
+        auditorias abertas na memória são fechadas. O novo é carregado antes de
+        mexer no atual: se o arquivo for inválido, nada muda (retorna False).
+        """
+        info = self.registry.get(schema_id)
+        if info is None:
+            return False
+        if info is self.schema_info:
+            return True
+        try:
+            compile_schema(self.registry.load(schema_id).topics)  # fica no LRU para load_questions
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.show_snack_err(f"Questionário inválido: {e}")
+            return False
+        self.journal.close()
+        self.schema_info = info
+        try:
+            (Path(self.user_data_dir) / self.SCHEMA_SELECTED_FILE).write_text(schema_id, encoding="utf-8")
+        except OSError as e:
+            print(f"[SCHEMA] não foi possível lembrar a escolha: {e}")
+        self._restore_session()
+        self.load_questions()
+        if self._exporter is not None:
+            self._exporter.compiled = self.compiled
         self.build_tabs(self.root.ids.tabs)
         self.update_scores_ui()
+        return True
+
+    def add_schema_file(self, path: str):
+        """Copia um questions.json do usuário para user_data_dir/questionnaires e o ativa."""
+        import shutil
+        from .registry import read_schema_header
+        try:
+            info = read_schema_header(Path(path))
+            if info.id == DEFAULT_SCHEMA_ID:
+                raise ValueError(f'id "{info.id}" é o do questionário do app; defina outro "id" no cabeçalho')
+            target = Path(self.user_data_dir) / USER_SCHEMA_DIR / Path(path).name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(path, target)
+        except (OSError, ValueError) as e:
+            self.show_snack_err(f"Questionário inválido: {e}")
+            return
+        self.registry.scan()
+        if not self.switch_schema(info.id):
+            target.unlink(missing_ok=True)  # não deixa um arquivo quebrado na lista
+            self.registry.scan()
+            return
+        self.show_snack_ok(f"Questionário adicionado: {info.id}")
+
+    def open_schema_dialog(self):
+        from kivymd.uix.dialog import MDDialog
+        from kivymd.uix.button import MDFlatButton
+
+        box = MDBoxLayout(orientation="vertical", adaptive_height=True, spacing=dp(4))
+        for info in self.registry:
+            title = get_title(info.title, self.lang) or info.id
+            version = f" v{info.version}" if info.version else ""
+            mark = " (ativo)" if info is self.schema_info else ""
+            box.add_widget(MDFlatButton(
+                text=f"{title}{version}{mark}",
+                on_release=lambda _, sid=info.id: (dialog.dismiss(), self.switch_schema(sid)),
+            ))
+
+        dialog = MDDialog(
+            title="Questionários",
+            type="custom",
+            content_cls=box,
+            buttons=[
+                MDFlatButton(text="Adicionar", on_release=lambda *_: (
+                    dialog.dismiss(), self._pick_file([".json"], self.add_schema_file))),
+                MDFlatButton(text="Fechar", on_release=lambda *_: dialog.dismiss()),
+            ],
+        )
+        dialog.open()
+
+    def set_site(self, site: str):
+        """Local auditado da auditoria ativa (gravado na exportação; chave das tendências)."""
+        if self.sessions.active is None:
+            return
+        self.sessions.active.site = " ".join((site or "").split()) or None
+        self._remember_site()
+
+    def open_site_dialog(self, then=None):
+        """Pede o local da auditoria ativa; then() roda depois de salvar."""
+        from kivymd.uix.dialog import MDDialog
+        from kivymd.uix.textfield import MDTextField
+        from kivymd.uix.button import MDFlatButton, MDRaisedButton
+
+        def save(*_):
+            dialog.dismiss()
+            self.set_site(field.text)
+            if then is not None and self._active_site():
+                then()
+
+        field = MDTextField(text=self._active_site() or "",
+                            hint_text="Local auditado (ex.: Linha 3 - Enchedora)")
+        dialog = MDDialog(
+            title="Local da auditoria",
+            type="custom",
+            content_cls=field,
+            buttons=[
+                MDFlatButton(text="Cancelar", on_release=lambda *_: dialog.dismiss()),
+                MDRaisedButton(text="Salvar", on_release=save),
+            ],
+        )
+        dialog.open()
+
+    # ---------- Tendências do local (auditorias anteriores exportadas) ----------
+    TRENDS_TOP = 10  # itens por lista no diálogo
+
+    def _trends_text(self) -> str:
+        trends = self.exporter.trends
+        site = self._active_site() or ""
+        schema_id = self.schema_info.id if self.schema_info else ""
+        pct = lambda v: "—" if v is None else f"{v:.1f}%"  # noqa: E731
+        summary = next((s for s in trends.sites(schema_id) if s["site"] == site), None)
+        if summary is None:
+            return f"Nenhuma auditoria exportada para [b]{escape_markup(site)}[/b] neste questionário."
+        lines = [
+            f"[b]{escape_markup(site)}[/b]: {summary['audits']} auditorias, última em {summary['last_at']}",
+            f"Resultado: último {pct(summary['final_last'])}, anterior {pct(summary['final_prev'])}, "
+            f"média móvel {pct(summary['final_ema'])}", "",
+            "[b]Tópicos (média móvel)[/b]",
+        ]
+        for t in trends.trends(site, "topic", schema_id):
+            delta = "" if t["delta"] is None else f" ({t['delta']:+.1f})"
+            lines.append(f"{t['item_id']} {self._title(t['item_id'])}: {pct(t['ema'])}{delta}")
+        regressions = trends.regressions(site, "question", schema_id, limit=self.TRENDS_TOP)
+        if regressions:
+            lines += ["", "[b]Maiores quedas desde a auditoria anterior[/b]"]
+            lines += [f"{r['item_id']}: {pct(r['prev'])} -> {pct(r['last'])}  {self._title(r['item_id'])}"
+                      for r in regressions]
+        always_na = trends.always_na(site, schema_id)
+        if always_na:
+            lines += ["", f"[b]Sempre N.A.[/b] ({len(always_na)})"]
+            lines += [f"{qid} {self._title(qid)}" for qid in always_na[:self.TRENDS_TOP]]
+        return "\n".join(lines)
+
+    def open_trends_dialog(self):
+        from kivy.uix.scrollview import ScrollView
+        from kivymd.uix.dialog import MDDialog
+        from kivymd.uix.button import MDFlatButton
+
+        if not self._active_site():
+            # sem local não há com o que comparar: pergunta antes (e volta para cá)
+            self.open_site_dialog(then=self.open_trends_dialog)
+            return
+        label = MDLabel(markup=True, size_hint_y=None, halign="left")
+        label.bind(
+            width=lambda inst, width: setattr(inst, "text_size", (width, None)),
+            texture_size=lambda inst, val: setattr(inst, "height", val[1]),
+        )
+        label.text = self._trends_text()
+        scroll = ScrollView(size_hint_y=None, height=dp(400))
+        scroll.add_widget(label)
+        dialog = MDDialog(
+            title="Tendências",
+            type="custom",
+            content_cls=scroll,
+            buttons=[MDFlatButton(text="Fechar", on_release=lambda *_: dialog.dismiss())],
+        )
+        dialog.open()
+
+    # ---------- Retomar auditoria exportada ----------
+    IMPORT_EXTS = [".json", ".gz", ".kaud", ".journal"]
+
+    def import_audit_file(self, path: str):
+        """
+        Carrega uma exportação (JSON, .json.gz, .kaud) ou diário numa sessão nova
+        (se a atual já tem respostas) com uma única atualização da UI.
+        """
+        try:
+            result = import_audit(path, self.compiled)
+        except Exception as e:
+            self.show_snack_err(f"Erro ao importar: {e.__class__.__name__}: {e}")
+            return
+        current = self.schema_info.id if self.schema_info else DEFAULT_SCHEMA_ID
+        if result.schema_id is not None and result.schema_id != current:
+            # os ids seriam conferidos contra o questionário errado (todos "desconhecidos")
+            self.show_snack_err(f"Auditoria do questionário {result.schema_id}: "
+                                f"selecione-o antes de importar (ativo: {current})")
+            return
+        if self.answers or self.comments:
+            self._cache_active_scores()
+            name = Path(path).name.split(".")[0] or None
+            self.sessions.open(None if name is None or self.sessions.get(name) else name)
+        self.sessions.active.site = result.site  # a auditoria retomada continua no seu local
+        self.load_audit(result.answers, result.comments)
+
+        msg = f"Importadas {len(result.answers)} respostas"
+        if result.unknown or result.invalid:
+            msg += f" ({len(result.unknown)} ids desconhecidos, {len(result.invalid)} valores inválidos)"
+            print(f"[IMPORT] desconhecidos={result.unknown} inválidos={result.invalid}")
+        self.show_snack_ok(msg)
+
+    def open_import_dialog(self):
+        self._pick_file(self.IMPORT_EXTS, self.import_audit_file)
+
+    def _pick_file(self, exts, on_pick):
+        """MDFileManager filtrado por extensão; on_pick(caminho) ao escolher um arquivo."""
+        from kivymd.uix.filemanager import MDFileManager
+
+        def select(path):
+            self._fm_exit_manager()
+            if os.path.isfile(path):
+                on_pick(path)
+
+        self.file_manager = MDFileManager(exit_manager=self._fm_exit_manager, select_path=select,
+                                          ext=exts)
+        if platform == "android":
+            try:
+                self.file_manager.show_disks()
+            except Exception:
+                self.file_manager.show(os.path.expanduser("~"))
+        else:
+            self.file_manager.show(os.path.expanduser("~"))
+        self.manager_open = True
+
+    def _sync_rows(self):
+        """Reaplica answers/comments em todos os itens de pergunta já montados."""
+        touched = {}
+        for qid, (rv, idx) in self._rows.items():
+            item = rv.data[idx]
+            item["answer"] = self.answers.get(qid)
+            item["has_comment"] = bool(self.comments.get(qid))
+            touched[id(rv)] = rv
+        for rv in touched.values():
+            rv.refresh_from_data()
 
     # ---------- Comentários ----------
     def open_comment_dialog(self, qid: str):
+        from kivymd.uix.dialog import MDDialog
+        from kivymd.uix.textfield import MDTextField
+        from kivymd.uix.button import MDFlatButton, MDRaisedButton  # KivyMD 1.x
+
         initial = self.comments.get(qid, "")
         self.dialog = MDDialog(
             title="Comentário",
@@ -324,49 +849,287 @@ class AuditoriaApp(MDApp):
             return
         textfield = self.dialog.content_cls
         self.comments[qid] = textfield.text or ""
+        self.sessions.record_comment(qid, self.comments[qid])
+        self.journal.record_comment(qid, self.comments[qid])
+        self._refresh_row(qid, has_comment=bool(self.comments[qid]))
         self.dialog.dismiss()
 
     # ---------- Cálculo e UI ----------
+    @TRACER.traced("update_scores_ui")
     def update_scores_ui(self):
+        """Atualiza já o resultado final e os cards de todos os tópicos."""
         if not self.root:
             return  # evita crash se for chamada antes do build concluir
+        self._dirty_topics.update(self._score_labels)
+        self._final_dirty = True
+        self._flush_scores()
+
+    def _mark_scores_dirty(self, topic_id=None, final: bool = False):
+        """Agenda (uma vez por frame) a atualização dos rótulos cujo score mudou."""
+        if topic_id is not None:
+            self._dirty_topics.add(topic_id)
+        self._final_dirty |= final
+        # o ranking de impacto depende das respostas, mesmo sem mudança de score (ex.: N.A. em peso 0)
+        if self._dirty_topics or self._final_dirty or self._impact_label is not None:
+            self._scores_trigger()
+
+    @TRACER.traced("_flush_scores")
+    def _flush_scores(self, *_):
+        if not self.root:
+            return
+        if self._final_dirty:
+            final = self.engine.final_score()
+            self.root.ids.final_score_label.text = (
+                f"Resultado: {round(final*100,1)}%" if final is not None else "Resultado: —"
+            )
+            self._final_dirty = False
+        # Só os cards dos tópicos que mudaram, via referência direta ao rótulo
+        for tid in self._dirty_topics:
+            lbl = self._score_labels.get(tid)
+            if lbl is None:
+                continue
+            ts = self.engine.topic_score(tid)
+            lbl.text = "Média do tópico: —" if ts is None else f"Média do tópico: {round(ts*100,1)}%"
+        self._dirty_topics.clear()
+        if self._impact_label is not None:
+            self._refresh_impact()
+
+    # ---------- O que corrigir primeiro ----------
+    IMPACT_TOP = 20  # perguntas listadas no ranking
+
+    def _impact_text(self) -> str:
+        ranking = self.engine.impact_ranking(limit=self.IMPACT_TOP)
+        final = self.engine.final_score()
+        now = "—" if final is None else f"{round(final*100,1)}%"
+        best = "—" if ranking.max_score is None else f"{round(ranking.max_score*100,1)}%"
+        lines = [f"Atual: {now}   Máximo alcançável: {best}", ""]
+        for qid, gain in ranking.gains:
+            answer = self.answers.get(qid) or "sem resposta"
+            lines.append(f"[b]+{gain*100:.1f}[/b]  {qid} ({answer}) — {self._title(qid) or qid}")
+        if not ranking.gains:
+            lines.append("Nada a melhorar: todas as perguntas aplicáveis estão em 100.")
+        return "\n".join(lines)
+
+    def _refresh_impact(self):
+        self._impact_label.text = self._impact_text()
+
+    def open_impact_dialog(self):
+        """Ranking das perguntas que mais sobem o resultado final se forem a 100."""
+        from kivy.uix.scrollview import ScrollView
+        from kivymd.uix.dialog import MDDialog
+        from kivymd.uix.button import MDFlatButton
+
+        label = MDLabel(markup=True, size_hint_y=None, halign="left")
+        label.bind(
+            width=lambda inst, width: setattr(inst, "text_size", (width, None)),
+            texture_size=lambda inst, val: setattr(inst, "height", val[1]),
+        )
+        scroll = ScrollView(size_hint_y=None, height=dp(400))
+        scroll.add_widget(label)
+        self._impact_label = label
+        self._refresh_impact()
 
-        # Atualiza o resultado final
-        final = final_score(self.schema.topics, self.answers)
-        self.root.ids.final_score_label.text = (
-            f"Resultado: {round(final*100,1)}%" if final is not None else "Resultado: —"
+        def closed(*_):
+            self._impact_label = None
+
+        dialog = MDDialog(
+            title="O que corrigir primeiro",
+            type="custom",
+            content_cls=scroll,
+            buttons=[MDFlatButton(text="Fechar", on_release=lambda *_: dialog.dismiss())],
+        )
+        dialog.bind(on_dismiss=closed)
+        dialog.open()
+
+    # ---------- Busca de perguntas ----------
+    SEARCH_TOP = 30  # resultados listados por consulta
+
+    def _search_text(self, query: str) -> str:
+        index = getattr(self.schema, "search", None)
+        if index is None or not query.strip():
+            return "Digite parte do título (qualquer idioma, sem acento) ou o id."
+        hits = index.search(query, limit=self.SEARCH_TOP)
+        self._search_hits = dict(hits)
+        if not hits:
+            return "Nenhuma pergunta encontrada."
+        lines = []
+        for node_id, _ in hits:
+            title = escape_markup(" ".join((self._title(node_id) or node_id).split()))
+            if node_id not in self.compiled.question_index:
+                title = f"[b]{title}[/b]"  # grupo
+            lines.append(f"[ref={node_id}]{node_id} — {title}[/ref]")
+        return "\n".join(lines)
+
+    def open_search_dialog(self):
+        """Busca instantânea: cada tecla é uma consulta ao índice do schema."""
+        from kivy.uix.scrollview import ScrollView
+        from kivymd.uix.dialog import MDDialog
+        from kivymd.uix.button import MDFlatButton
+        from kivymd.uix.textfield import MDTextField
+
+        field = MDTextField(hint_text="Buscar pergunta", size_hint_y=None, height=dp(48))
+        label = MDLabel(markup=True, size_hint_y=None, halign="left")
+        label.bind(
+            width=lambda inst, width: setattr(inst, "text_size", (width, None)),
+            texture_size=lambda inst, val: setattr(inst, "height", val[1]),
+        )
+        label.text = self._search_text("")
+        field.bind(text=lambda _, text: setattr(label, "text", self._search_text(text)))
+        scroll = ScrollView(size_hint_y=None, height=dp(360))
+        scroll.add_widget(label)
+        box = MDBoxLayout(orientation="vertical", adaptive_height=True, spacing=dp(8))
+        box.add_widget(field)
+        box.add_widget(scroll)
+
+        dialog = MDDialog(
+            title="Buscar",
+            type="custom",
+            content_cls=box,
+            buttons=[MDFlatButton(text="Fechar", on_release=lambda *_: dialog.dismiss())],
         )
+        label.bind(on_ref_press=lambda _, node_id: (
+            dialog.dismiss(), self.jump_to(node_id, self._search_hits.get(node_id))))
+        dialog.open()
 
-        # Atualiza os cards de cada aba
+    def jump_to(self, node_id: str, topic_id: str = None):
+        """Abre a aba do tópico e rola a lista até a pergunta (ou grupo) node_id."""
+        if not self.root:
+            return
+        topic_id = topic_id or self.engine.topic_of(node_id)
         tabs = self.root.ids.tabs
-        for tab in tabs.get_tab_list():  # KivyMD 1.x
-            if not hasattr(tab, "topic"):
-                continue
-            ts = topic_score(tab.topic, self.answers)
-            txt = "Média do tópico: —" if ts is None else f"Média do tópico: {round(ts*100,1)}%"
-            score_card = tab.children[-1] if tab.children else None
-            if score_card and hasattr(score_card, "children"):
-                lbl = score_card.children[-1] if score_card.children else None
-                if isinstance(lbl, MDLabel):
-                    lbl.text = txt
+        tab = next((lbl.tab for lbl in tabs.get_tab_list() if lbl.tab.topic.id == topic_id), None)
+        if tab is None:
+            return
+        self._ensure_tab_built(tab)
+        tabs.carousel.load_slide(tab)
+        rv = tab.question_list
+        ref = self._rows.get(node_id)
+        if ref is not None:
+            idx = ref[1]
+        else:
+            idx = next((i for i, item in enumerate(rv.data) if item.get("group_id") == node_id), 0)
+        Clock.schedule_once(lambda dt: self._scroll_to_row(rv, idx), 0)
+
+    def _scroll_to_row(self, rv, idx: int, tries: int = 5):
+        """Põe o item idx no topo da lista (espera o layout da aba recém-montada)."""
+        opts = rv.layout_manager.view_opts if rv.layout_manager else []
+        if idx >= len(opts) or opts[idx] is None or opts[idx].get("pos") is None:
+            if tries > 0:
+                Clock.schedule_once(lambda dt: self._scroll_to_row(rv, idx, tries - 1), 0)
+            return
+        layout_h = rv.layout_manager.height
+        if layout_h <= rv.height:
+            return
+        top = opts[idx]["pos"][1] + opts[idx]["size"][1]
+        rv.scroll_y = min(1.0, max(0.0, (top - rv.height) / (layout_h - rv.height)))
+
+    # ---------- Diagnóstico (menu oculto: toque triplo no resultado) ----------
+    def _trace_text(self) -> str:
+        state = "ligado" if TRACER.enabled else "desligado"
+        lines = [f"Rastreamento: [b]{state}[/b] — {len(TRACER.events)}/{TRACER.events.maxlen} eventos", ""]
+        for name, calls, total_ms in TRACER.summary():
+            lines.append(f"{name}: {calls}x, {total_ms:.1f} ms (média {total_ms / calls:.2f} ms)")
+        return "\n".join(lines)
+
+    def set_tracing(self, enabled: bool):
+        """Liga/desliga já e lembra a escolha (trace.on) para medir a próxima abertura."""
+        TRACER.enabled = enabled
+        flag = Path(self.user_data_dir) / TRACE_FLAG
+        try:
+            if enabled:
+                flag.touch()
+            elif flag.exists():
+                flag.unlink()
+        except OSError as e:
+            print(f"[TRACE] não foi possível gravar {flag}: {e}")
+
+    def dump_trace(self):
+        """Grava o trace (formato Chrome) em user_data_dir; no Android copia para Documentos."""
+        try:
+            path = TRACER.dump(self.user_data_dir)
+            if platform == "android":
+                from androidstorage4kivy import SharedStorage
+                if not SharedStorage().copy_to_shared(str(path), collection="Documents", filepath=None):
+                    raise IOError("Falha ao copiar para Documentos")
+        except Exception as e:
+            self.show_snack_err(f"Erro ao exportar trace: {e}")
+            return None
+        self.show_snack_ok(f"Trace salvo: {path.name}")
+        return path
+
+    def open_trace_menu(self):
+        from kivymd.uix.dialog import MDDialog
+        from kivymd.uix.button import MDFlatButton
+
+        label = MDLabel(markup=True, size_hint_y=None, halign="left")
+        label.bind(
+            width=lambda inst, width: setattr(inst, "text_size", (width, None)),
+            texture_size=lambda inst, val: setattr(inst, "height", val[1]),
+        )
+        label.text = self._trace_text()
+
+        def toggle(*_):
+            self.set_tracing(not TRACER.enabled)
+            label.text = self._trace_text()
+
+        def clear(*_):
+            TRACER.clear()
+            label.text = self._trace_text()
+
+        dialog = MDDialog(
+            title="Diagnóstico",
+            type="custom",
+            content_cls=label,
+            buttons=[
+                MDFlatButton(text="Ligar/Desligar", on_release=toggle),
+                MDFlatButton(text="Limpar", on_release=clear),
+                MDFlatButton(text="Exportar", on_release=lambda *_: (dialog.dismiss(), self.dump_trace())),
+                MDFlatButton(text="Fechar", on_release=lambda *_: dialog.dismiss()),
+            ],
+        )
+        dialog.open()
 
     # ---------- Exportação ----------
+    def _export_mode_text(self) -> str:
+        """Formato atual e a extensão que export_filename vai usar."""
+        ext = export_filename("auditoria", self.export_mode).partition(".")[2]
+        return f"Será salvo como {self.EXPORT_MODE_LABELS[self.export_mode]} (.{ext})"
+
+    def cycle_export_mode(self) -> str:
+        """Passa para o próximo formato de storage.EXPORT_MODES e o lembra entre sessões."""
+        i = EXPORT_MODES.index(self.export_mode) if self.export_mode in EXPORT_MODES else -1
+        self.export_mode = EXPORT_MODES[(i + 1) % len(EXPORT_MODES)]
+        try:
+            (Path(self.user_data_dir) / self.EXPORT_MODE_FILE).write_text(self.export_mode, encoding="utf-8")
+        except OSError as e:
+            print(f"[EXPORT] não foi possível lembrar o formato: {e}")
+        return self.export_mode
 
     def _ask_save_android(self, payload: dict):
+        from kivymd.uix.dialog import MDDialog
+        from kivymd.uix.textfield import MDTextField
+        from kivymd.uix.button import MDFlatButton
+
         # Dialogo com TextField para o nome do arquivo
         self._name_field = MDTextField(
-            text="auditoria.json",
+            text=export_filename("auditoria.json", self.export_mode),
             hint_text="Nome do arquivo",
-            helper_text="Será salvo como JSON",
-            helper_text_mode="on_focus",
+            helper_text=self._export_mode_text(),
+            helper_text_mode="persistent",
             size_hint_x=1
         )
 
+        def next_mode(*_):
+            self.cycle_export_mode()
+            self._name_field.text = export_filename(self._name_field.text, self.export_mode)
+            self._name_field.helper_text = self._export_mode_text()
+
         self._dlg_android = MDDialog(
             title="Salvar arquivo",
             type="custom",
             content_cls=self._name_field,
             buttons=[
+                MDFlatButton(text="Formato", on_release=next_mode),
                 MDFlatButton(text="Documentos", on_release=lambda *_: self._save_android_documents(payload)),
                 MDFlatButton(text="Escolher pasta", on_release=lambda *_: self._save_android_pick_dir(payload)),
                 MDFlatButton(text="Cancelar", on_release=lambda *_: self._dlg_android.dismiss()),
@@ -374,6 +1137,7 @@ class AuditoriaApp(MDApp):
         )
         self._dlg_android.open()
     
+    @TRACER.traced("ask_save_location")
     def ask_save_location(self):
 
         """Monta o payload, salva em JSON e tenta compartilhar. Com logs e tratamento de erro."""
@@ -386,7 +1150,7 @@ class AuditoriaApp(MDApp):
             answered = len(self.answers) if hasattr(self, "answers") else 0
             print(f"[EXPORT DEBUG] topics={total_topics} groups={total_groups} questions={total_questions} answered={answered}")
             if total_topics == 0 or total_groups == 0 or total_questions == 0:
-                self.show_snackbar("Nada para exportar: schema vazio.")
+                self.show_snack_err("Nada para exportar: schema vazio.")
                 return
 
             # 2) Monta payload
@@ -395,7 +1159,10 @@ class AuditoriaApp(MDApp):
                 answers=dict(self.answers),   # garante dict “puro”
                 comments=dict(self.comments), # idem
                 language=self.lang,
-                auditor=""
+                auditor="",
+                engine=self.engine,
+                schema=self._schema_meta(),
+                site=self._active_site(),
             )
 
             print("[DEBUG] platform =", platform)
@@ -411,35 +1178,31 @@ class AuditoriaApp(MDApp):
         except Exception as e:
             tb = traceback.format_exc()
             print("[EXPORT ERROR]", tb)  # log completo no console
-            self.show_snackbar(f"Erro ao exportar: {e.__class__.__name__}: {e}")
+            self.show_snack_err(f"Erro ao exportar: {e.__class__.__name__}: {e}")
 
+    @TRACER.traced("_save_android_documents")
     def _save_android_documents(self, payload: dict):
-        try:
-            name = SaveDialog._ensure_json_name(self._name_field.text or "auditoria.json")
-            # 1) Salva privado (user_data_dir)
-            tmp_full = os.path.join(self.user_data_dir, name)
-            import json
-            with open(tmp_full, "w", encoding="utf-8") as f:
-                json.dump(payload, f, ensure_ascii=False, indent=2)
-
-            # 2) Copia p/ STORAGE COMPARTILHADO (Documentos)
+        name = export_filename(self._name_field.text or "auditoria.json", self.export_mode)
+        # 1) Salva privado (user_data_dir)  2) Copia p/ STORAGE COMPARTILHADO (Documentos)
+        tmp_full = os.path.join(self.user_data_dir, name)
+        self._dlg_android.dismiss()
+
+        def copy_to_documents(path):
             from androidstorage4kivy import SharedStorage
-            ss = SharedStorage()
-            shared_ref = ss.copy_to_shared(tmp_full, collection="Documents", filepath=None)
+            if not SharedStorage().copy_to_shared(str(path), collection="Documents", filepath=None):
+                raise IOError("Falha ao copiar para Documentos")
 
-            self._dlg_android.dismiss()
-            if shared_ref:
-                self.show_snack_ok(f"Salvo em Documentos: {name}")
-            else:
-                self.show_snack_err("Falha ao copiar para Documentos")
-        except Exception as e:
-            self._dlg_android.dismiss()
-            self.show_snack_err(f"Erro: {e}")
+        self.exporter.submit(
+            payload, tmp_full, self.export_mode, then=copy_to_documents,
+            on_done=lambda _: self.show_snack_ok(f"Salvo em Documentos: {name}"),
+            on_error=lambda e: self.show_snack_err(f"Erro: {e}"),
+        )
 
     def _save_android_pick_dir(self, payload: dict):
         self._dlg_android.dismiss()
         self._payload_cache = payload
-        self._picked_name = SaveDialog._ensure_json_name(self._name_field.text or "auditoria.json")
+        self._picked_name = export_filename(self._name_field.text or "auditoria.json", self.export_mode)
+        from kivymd.uix.filemanager import MDFileManager  # Android (opção B)
         self.manager_open = False
         self.file_manager = MDFileManager(
             exit_manager=self._fm_exit_manager,
@@ -454,19 +1217,21 @@ class AuditoriaApp(MDApp):
             self.file_manager.show(os.path.expanduser("~"))
         self.manager_open = True
 
+    @TRACER.traced("_fm_select_path_dir")
     def _fm_select_path_dir(self, path: str):
         """Usuário escolheu um diretório; tenta gravar direto (pode falhar em pastas bloqueadas)."""
         self._fm_exit_manager()
-        try:
-            full = os.path.join(path, self._picked_name)
-            import json
-            with open(full, "w", encoding="utf-8") as f:
-                json.dump(self._payload_cache, f, ensure_ascii=False, indent=2)
-            self.show_snack_ok(f"Salvo em: {self._picked_name}")
-        except Exception as e:
-            # Fallback: Documentos
+        payload = self._payload_cache
+
+        def fallback_to_documents(e):
             self.show_snack_err(f"Sem permissão na pasta; salvando em Documentos... ({e})")
-            self._save_android_documents(self._payload_cache)
+            self._save_android_documents(payload)
+
+        self.exporter.submit(
+            payload, os.path.join(path, self._picked_name), self.export_mode,
+            on_done=lambda _: self.show_snack_ok(f"Salvo em: {self._picked_name}"),
+            on_error=fallback_to_documents,
+        )
 
     def _fm_exit_manager(self, *args):
         try:
@@ -477,6 +1242,7 @@ class AuditoriaApp(MDApp):
 
     def show_snack_ok(self, text: str):
         try:
+            from kivymd.uix.snackbar import MDSnackbar
             MDSnackbar(MDLabel(text=text), y=dp(24),
                     pos_hint={"center_x": .5}, size_hint_x=.9).open()
         except Exception:
@@ -484,6 +1250,7 @@ class AuditoriaApp(MDApp):
 
     def show_snack_err(self, text: str):
         try:
+            from kivymd.uix.snackbar import MDSnackbar
             MDSnackbar(MDLabel(text=text), y=dp(24),
                     pos_hint={"center_x": .5}, size_hint_x=.9).open()
         except Exception:
@@ -492,6 +1259,12 @@ class AuditoriaApp(MDApp):
 
 
     def open_save_dialog_desktop(self, payload: dict):
+        from kivy.uix.boxlayout import BoxLayout
+        from kivy.uix.button import Button
+        from kivy.uix.filechooser import FileChooserIconView  # desktop popup
+        from kivy.uix.popup import Popup
+        from kivy.uix.textinput import TextInput
+
         root = BoxLayout(orientation="vertical", spacing=8, padding=8)
 
         fc = FileChooserIconView(path=os.path.expanduser("~"))
@@ -499,13 +1272,15 @@ class AuditoriaApp(MDApp):
         root.add_widget(fc)
 
         name_row = BoxLayout(size_hint_y=None, height=40, spacing=8)
-        name_input = TextInput(text="auditoria.json", multiline=False)
+        name_input = TextInput(text=export_filename("auditoria.json", self.export_mode), multiline=False)
         name_row.add_widget(name_input)
         root.add_widget(name_row)
 
         btn_row = BoxLayout(size_hint_y=None, height=44, spacing=8)
+        btn_mode = Button(text=self.EXPORT_MODE_LABELS[self.export_mode])
         btn_cancel = Button(text="Cancelar")
         btn_save   = Button(text="Salvar", bold=True)
+        btn_row.add_widget(btn_mode)
         btn_row.add_widget(btn_cancel)
         btn_row.add_widget(btn_save)
         root.add_widget(btn_row)
@@ -516,36 +1291,33 @@ class AuditoriaApp(MDApp):
             folder = fc.path if not fc.selection else (
                 fc.selection[0] if os.path.isdir(fc.selection[0]) else os.path.dirname(fc.selection[0])
             )
-            filename = SaveDialog._ensure_json_name(name_input.text or "auditoria.json")
-            full = os.path.join(folder, filename)
-            try:
-                with open(full, "w", encoding="utf-8") as f:
-                    json.dump(payload, f, ensure_ascii=False, indent=2)
-                popup.dismiss()
-                self.show_snack_ok(f"Salvo em: {os.path.basename(full)}")
-            except Exception as e:
-                popup.dismiss()
-                self.show_snack_err(f"Erro ao salvar: {e}")
+            filename = export_filename(name_input.text or "auditoria.json", self.export_mode)
+            popup.dismiss()
+            self.exporter.submit(
+                payload, os.path.join(folder, filename), self.export_mode,
+                on_done=lambda path: self.show_snack_ok(f"Salvo em: {os.path.basename(path)}"),
+                on_error=lambda e: self.show_snack_err(f"Erro ao salvar: {e}"),
+            )
+
+        def next_mode(*_):
+            self.cycle_export_mode()
+            btn_mode.text = self.EXPORT_MODE_LABELS[self.export_mode]
+            name_input.text = export_filename(name_input.text, self.export_mode)
 
+        btn_mode.bind(on_release=next_mode)
         btn_cancel.bind(on_release=lambda *_: popup.dismiss())
         btn_save.bind(on_release=do_save)
         popup.open()
 
+    @TRACER.traced("_save_desktop_do")
     def _save_desktop_do(self, payload: dict, path: str, filename: str):
-        try:
-            filename = SaveDialog._ensure_json_name(filename or "auditoria.json")
-            full = os.path.join(path, filename)
-            # Reusa sua rotina de serialização:
-            from .storage import save_json_raw  # crie auxiliar simples se quiser
-            # ou simplesmente:
-            import json
-            with open(full, "w", encoding="utf-8") as f:
-                json.dump(payload, f, ensure_ascii=False, indent=2)
-            self.dismiss_popup()
-            self.show_snack_ok(f"Salvo em: {os.path.basename(full)}")
-        except Exception as e:
-            self.dismiss_popup()
-            self.show_snack_err(f"Erro ao salvar: {e}")
+        filename = export_filename(filename or "auditoria.json", self.export_mode)
+        self.dismiss_popup()
+        self.exporter.submit(
+            payload, os.path.join(path, filename), self.export_mode,
+            on_done=lambda full: self.show_snack_ok(f"Salvo em: {os.path.basename(full)}"),
+            on_error=lambda e: self.show_snack_err(f"Erro ao salvar: {e}"),
+        )
 
     def dismiss_popup(self, *args):
         try:
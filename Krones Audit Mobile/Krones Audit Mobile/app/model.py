@@ -1,9 +1,15 @@
 # app/model.py
-from dataclasses import dataclass
-from typing import List, Dict, Any
+from array import array
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
+import hashlib
 import json
+import os
+import pickle
 from pathlib import Path
 
+from .i18n import build_title_tables, build_search_index, SearchIndex
+
 @dataclass
 class Question:
     id: str
@@ -28,6 +34,8 @@ class Topic:
 class Schema:
     languages: List[str]
     topics: List[Topic]
+    titles: Dict[str, Dict[str, str]] = field(default_factory=dict)  # {idioma: {id: título}}
+    search: Optional[SearchIndex] = None  # busca por título/id (i18n.SearchIndex)
 
 def load_schema(path: Path) -> Schema:
     data = json.loads(path.read_text(encoding="utf-8"))
@@ -51,4 +59,105 @@ def load_schema(path: Path) -> Schema:
             title=t["title"],
             groups=groups
         ))
-    return Schema(languages=data.get("languages", []), topics=topics)
\ No newline at end of file
+    languages = data.get("languages", [])
+    return Schema(languages=languages, topics=topics,
+                  titles=build_title_tables(topics, languages),
+                  search=build_search_index(topics))
+
+# ---------- Cache binário do schema (user_data_dir) ----------
+SCHEMA_CACHE_VERSION = 2  # incremente ao mudar os dataclasses acima
+_CACHE_MAGIC = b"KRONES-SCHEMA"
+
+def _file_digest(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+def _write_schema_cache(cache: Path, header: tuple, schema: Schema):
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache.with_suffix(".tmp")
+    with tmp.open("wb") as f:
+        pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(schema, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, cache)  # troca atômica: nunca fica um cache pela metade
+
+def load_schema_cached(path: Path, cache_dir: Optional[str]) -> Schema:
+    """
+    load_schema com cache binário em cache_dir. O cache vale enquanto tamanho+mtime
+    do JSON não mudarem; se mudarem, confere o hash do conteúdo e só reparseia o
+    JSON quando ele realmente mudou. Cache ausente/corrompido = refaz.
+    """
+    if not cache_dir:
+        return load_schema(path)
+    # o hash do caminho separa arquivos de mesmo nome em pastas diferentes (registry)
+    tag = hashlib.sha1(str(path.resolve()).encode("utf-8")).hexdigest()[:8]
+    cache = Path(cache_dir) / f"{path.stem}-{tag}.schema.cache"
+    st = path.stat()
+    stamp = (st.st_size, st.st_mtime_ns)
+    digest = None
+    try:
+        with cache.open("rb") as f:
+            magic, version, cached_stamp, cached_digest = pickle.load(f)
+            if magic == _CACHE_MAGIC and version == SCHEMA_CACHE_VERSION:
+                if cached_stamp == stamp:
+                    return pickle.load(f)
+                digest = _file_digest(path)
+                if cached_digest == digest:
+                    schema = pickle.load(f)
+                    _write_schema_cache(cache, (_CACHE_MAGIC, SCHEMA_CACHE_VERSION, stamp, digest), schema)
+                    return schema
+    except Exception:
+        pass  # sem cache utilizável: segue para o parse completo
+
+    schema = load_schema(path)
+    try:
+        _write_schema_cache(cache, (_CACHE_MAGIC, SCHEMA_CACHE_VERSION, stamp,
+                                    digest or _file_digest(path)), schema)
+    except OSError:
+        pass
+    return schema
+
+@dataclass
+class CompiledSchema:
+    """
+    Schema achatado em arrays contíguos, na ordem do questions.json.
+    Perguntas do grupo g: [group_offsets[g], group_offsets[g+1]);
+    grupos do tópico t: [topic_offsets[t], topic_offsets[t+1]).
+    """
+    question_ids: List[str]
+    question_weights: array   # 'd'
+    question_group: array     # 'i' -> índice do grupo-pai
+    group_ids: List[str]
+    group_weights: array      # 'd'
+    group_topic: array        # 'i' -> índice do tópico-pai
+    group_offsets: array      # 'i', len = n_groups + 1
+    topic_ids: List[str]
+    topic_weights: array      # 'd'
+    topic_offsets: array      # 'i', len = n_topics + 1
+    question_index: Dict[str, int]
+
+    @property
+    def n_questions(self) -> int:
+        return len(self.question_ids)
+
+def compile_schema(topics: List[Topic]) -> CompiledSchema:
+    c = CompiledSchema(
+        question_ids=[], question_weights=array("d"), question_group=array("i"),
+        group_ids=[], group_weights=array("d"), group_topic=array("i"), group_offsets=array("i", [0]),
+        topic_ids=[], topic_weights=array("d"), topic_offsets=array("i", [0]),
+        question_index={},
+    )
+    for ti, t in enumerate(topics):
+        c.topic_ids.append(t.id)
+        c.topic_weights.append(t.weight)
+        for g in t.groups:
+            gi = len(c.group_ids)
+            c.group_ids.append(g.id)
+            c.group_weights.append(g.weight)
+            c.group_topic.append(ti)
+            for q in g.questions:
+                c.question_index[q.id] = len(c.question_ids)
+                c.question_ids.append(q.id)
+                c.question_weights.append(q.weight)
+                c.question_group.append(gi)
+            c.group_offsets.append(len(c.question_ids))
+        c.topic_offsets.append(len(c.group_ids))
+    return c
@@ -0,0 +1,188 @@
+# app/profiling.py
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PROFILE_ENV = "KRONES_PROFILE_STARTUP"  # "1" liga a medição de inicialização
+PROFILE_FILE = "startup_profile.json"
+MAX_RUNS = 50  # execuções mantidas no JSON (para comparar versões)
+
+class StartupProfiler:
+    """Mede o tempo de parede de cada fase da inicialização do app."""
+
+    def __init__(self, enabled: Optional[bool] = None, started_at: Optional[float] = None):
+        if enabled is None:
+            enabled = os.environ.get(PROFILE_ENV, "") not in ("", "0")
+        self.enabled = enabled
+        self.phases: List[Tuple[str, float]] = []
+        self._t0 = time.perf_counter() if started_at is None else started_at
+
+    def record(self, name: str, seconds: float):
+        if self.enabled:
+            self.phases.append((name, seconds))
+
+    @contextmanager
+    def phase(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - t))
+
+    def dump(self, user_data_dir: str) -> Optional[Path]:
+        """Escreve as fases no log e acrescenta a execução ao JSON em user_data_dir."""
+        if not self.enabled:
+            return None
+        total = time.perf_counter() - self._t0
+        for name, sec in self.phases:
+            print(f"[STARTUP] {name}: {sec * 1000:.1f} ms")
+        print(f"[STARTUP] total: {total * 1000:.1f} ms")
+
+        run = {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "phases_ms": {name: round(sec * 1000, 2) for name, sec in self.phases},
+            "total_ms": round(total * 1000, 2),
+        }
+        path = Path(user_data_dir) / PROFILE_FILE
+        try:
+            runs = json.loads(path.read_text(encoding="utf-8")) if path.exists() else []
+        except Exception:
+            runs = []
+        runs = (runs + [run])[-MAX_RUNS:]
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(runs, ensure_ascii=False, indent=2), encoding="utf-8")
+        except OSError as e:
+            print(f"[STARTUP] não foi possível gravar {path}: {e}")
+            return None
+        return path
+
+# ---------- Rastreamento em campo (buffer circular) ----------
+TRACE_ENV = "KRONES_TRACE"  # "1" liga o rastreamento desde a abertura
+TRACE_FLAG = "trace.on"  # em user_data_dir: ligado pelo menu oculto, vale nas próximas aberturas
+TRACE_CAPACITY = 4096  # eventos mantidos; os mais antigos são descartados
+
+class _NoSpan:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+class _Span:
+    __slots__ = ("tracer", "name", "t0")
+
+    def __init__(self, tracer: "Tracer", name: str):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.tracer.add(self.name, self.t0, time.perf_counter() - self.t0)
+        return False
+
+class Tracer:
+    """
+    Durações dos caminhos quentes num buffer circular de tamanho fixo, mais
+    contagem/tempo total por nome. Desligado, cada ponto medido custa só o
+    teste de `enabled`. dump() grava no formato Chrome trace (chrome://tracing,
+    Perfetto).
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, capacity: int = TRACE_CAPACITY):
+        if enabled is None:
+            enabled = os.environ.get(TRACE_ENV, "") not in ("", "0")
+        self.enabled = enabled
+        self.events: deque = deque(maxlen=capacity)  # (nome, início s, duração s, thread)
+        self.counts: Dict[str, List[float]] = {}  # nome -> [chamadas, tempo total s]
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+
+    def add(self, name: str, start: float, seconds: float):
+        tid = threading.get_ident()
+        with self._lock:
+            self.events.append((name, start, seconds, tid))
+            c = self.counts.get(name)
+            if c is None:
+                self.counts[name] = [1, seconds]
+            else:
+                c[0] += 1
+                c[1] += seconds
+            if tid not in self._threads:
+                self._threads[tid] = threading.current_thread().name
+
+    def span(self, name: str):
+        """Context manager que mede o bloco (no-op compartilhado se desligado)."""
+        return _Span(self, name) if self.enabled else _NO_SPAN
+
+    def traced(self, name: Optional[str] = None) -> Callable:
+        """Decorador: mede cada chamada da função com o nome dado (padrão: qualname)."""
+        def wrap(fn):
+            label = name or fn.__qualname__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                t = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.add(label, t, time.perf_counter() - t)
+            return wrapper
+        return wrap
+
+    def clear(self):
+        with self._lock:
+            self.events.clear()
+            self.counts.clear()
+
+    def summary(self, top: int = 10) -> List[Tuple[str, int, float]]:
+        """[(nome, chamadas, total ms)] dos nomes que mais consumiram tempo."""
+        with self._lock:
+            rows = [(name, int(c[0]), c[1] * 1000) for name, c in self.counts.items()]
+        return sorted(rows, key=lambda r: r[2], reverse=True)[:top]
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        with self._lock:
+            events = list(self.events)
+            threads = dict(self._threads)
+            counts = {name: {"calls": int(c[0]), "total_ms": round(c[1] * 1000, 3)}
+                      for name, c in self.counts.items()}
+        pid = os.getpid()
+        trace: List[Dict[str, Any]] = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": tname}}
+            for tid, tname in threads.items()
+        ]
+        trace += [
+            {"name": name, "cat": "app", "ph": "X", "pid": pid, "tid": tid,
+             "ts": round((start - self._t0) * 1e6, 1), "dur": round(seconds * 1e6, 1)}
+            for name, start, seconds, tid in events
+        ]
+        return {"traceEvents": trace, "displayTimeUnit": "ms",
+                "otherData": {"generated_at": datetime.now().isoformat(timespec="seconds"),
+                              "capacity": self.events.maxlen, "counts": counts}}
+
+    def dump(self, directory: str) -> Path:
+        """Grava trace-AAAAMMDD-HHMMSS.json em directory e devolve o caminho."""
+        path = Path(directory) / f"trace-{datetime.now():%Y%m%d-%H%M%S}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.chrome_trace(), ensure_ascii=False), encoding="utf-8")
+        return path
+
+TRACER = Tracer()  # único do processo; ligado por KRONES_TRACE=1 ou pelo menu oculto
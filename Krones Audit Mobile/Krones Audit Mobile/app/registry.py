@@ -0,0 +1,235 @@
+# app/registry.py
+"""
+Registro dos questionários (instalação, comissionamento, manutenção...): todo
+*.json com "topics" nas pastas registradas. scan() lê só o cabeçalho de cada
+arquivo (as chaves antes de "topics"); o schema completo é carregado sob demanda
+e os recentes ficam num LRU limitado pela memória estimada.
+
+Cabeçalho opcional no topo do questions.json (sem ele: id = nome do arquivo):
+
+    {"id": "comissionamento", "version": "2026.1",
+     "title": {"PT-BR": "Comissionamento", "ES": "Puesta en marcha"},
+     "languages": [...], "topics": [...]}
+"""
+import json
+import os
+import re
+import sys
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .model import Schema, load_schema_cached
+
+SCHEMA_DIRS_ENV = "KRONES_SCHEMA_DIRS"  # pastas extras, separadas por os.pathsep
+USER_SCHEMA_DIR = "questionnaires"  # em user_data_dir: questionários do usuário
+DEFAULT_SCHEMA_ID = "questions"  # app/data/questions.json
+SCHEMA_LRU_BYTES = 32 * 1024 * 1024  # memória estimada máxima dos schemas em cache
+_HEADER_CHUNK = 16 * 1024
+_WS = re.compile(r"\s*")
+_NUMBER_CHARS = frozenset("0123456789.eE+-")
+
+@dataclass
+class SchemaInfo:
+    """Cabeçalho de um questionário (lido sem parsear os tópicos)."""
+    id: str
+    path: Path
+    version: Optional[str] = None
+    title: Dict[str, str] = field(default_factory=dict)
+    languages: List[str] = field(default_factory=list)
+    stamp: Tuple[int, int] = (0, 0)  # (tamanho, mtime_ns) na leitura do cabeçalho
+
+class _HeaderReader:
+    """Lê o JSON aos pedaços só até a chave "topics" do objeto raiz."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.decoder = json.JSONDecoder()
+
+    def _more(self) -> bool:
+        chunk = self.f.read(_HEADER_CHUNK)
+        self.buf += chunk
+        return bool(chunk)
+
+    def peek(self) -> str:
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._more():
+                raise ValueError("JSON truncado")
+
+    def expect(self, ch: str):
+        if self.peek() != ch:
+            raise ValueError(f"esperado {ch!r} na posição {self.pos}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._more():
+                    continue
+                raise ValueError("JSON inválido no cabeçalho")
+            # um número cortado no fim do pedaço ("2026." ou "1e") ainda decodifica:
+            # só confia nele quando o próximo caractere não puder continuá-lo (ou no EOF)
+            if (isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and (end == len(self.buf) or self.buf[end] in _NUMBER_CHARS) and self._more()):
+                continue
+            self.pos = end
+            return value
+
+    def header(self) -> Dict[str, Any]:
+        fields: Dict[str, Any] = {}
+        self.expect("{")
+        while self.peek() != "}":
+            key = self.value()
+            if not isinstance(key, str):
+                raise ValueError("chave inválida")
+            self.expect(":")
+            if key == "topics":
+                return fields
+            fields[key] = self.value()
+            if self.peek() == ",":
+                self.pos += 1
+        raise ValueError('sem "topics": não é um questionário')
+
+def read_schema_header(path: Path) -> SchemaInfo:
+    """SchemaInfo a partir das chaves antes de "topics" (ValueError se não for questionário)."""
+    st = path.stat()
+    with path.open("r", encoding="utf-8-sig") as f:
+        fields = _HeaderReader(f).header()
+    version = fields.get("version")
+    title = fields.get("title")
+    return SchemaInfo(
+        id=str(fields.get("id") or path.stem),
+        path=path,
+        version=None if version is None else str(version),
+        title=title if isinstance(title, dict) else {},
+        languages=list(fields.get("languages") or []),
+        stamp=(st.st_size, st.st_mtime_ns),
+    )
+
+def estimate_schema_bytes(schema: Schema) -> int:
+    """Estimativa (sys.getsizeof) da memória de um Schema: árvore, tabelas de títulos e busca."""
+    size = sys.getsizeof
+
+    def node_bytes(node) -> int:
+        return (size(node) + size(node.__dict__) + size(node.id) + size(node.title)
+                + sum(size(v) for v in node.title.values()))
+
+    total = size(schema)
+    for t in schema.topics:
+        total += node_bytes(t) + size(t.groups)
+        for g in t.groups:
+            total += node_bytes(g) + size(g.questions)
+            total += sum(node_bytes(q) for q in g.questions)
+    total += sum(size(table) for table in schema.titles.values())  # títulos já contados
+    index = getattr(schema, "search", None)
+    if index is not None:
+        total += size(index.ids) + size(index.topics) + size(index.terms) + size(index.postings)
+        total += sum(size(t) for t in index.terms) + sum(size(p) for p in index.postings)
+    return total
+
+def journal_name(schema_id: str, default: str) -> str:
+    """Arquivo do diário do questionário (o padrão mantém o nome antigo)."""
+    if schema_id == DEFAULT_SCHEMA_ID:
+        return default
+    stem, dot, ext = default.rpartition(".")
+    safe = re.sub(r"[^\w.-]", "_", schema_id)
+    return f"{stem}-{safe}{dot}{ext}"
+
+class SchemaRegistry:
+    """
+    Questionários das pastas `dirs` (as últimas têm prioridade em ids repetidos;
+    o id padrão é reservado ao questions.json da primeira pasta, a do app).
+    load() devolve o Schema completo, parseado uma vez (com o cache binário de
+    model.load_schema_cached em `cache_dir`) e guardado num LRU de até
+    `max_bytes` estimados; o schema mais recente nunca é descartado.
+    """
+
+    def __init__(self, dirs: List[Path], cache_dir: Optional[str] = None,
+                 max_bytes: int = SCHEMA_LRU_BYTES):
+        self.dirs = [Path(d) for d in dirs]
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._infos: Dict[str, SchemaInfo] = {}
+        self._lru: "OrderedDict[str, Tuple[Schema, Tuple[int, int], int]]" = OrderedDict()
+        self.cached_bytes = 0
+
+    @staticmethod
+    def default_dirs(data_dir: Path, user_data_dir: Optional[str]) -> List[Path]:
+        """app/data, pastas de KRONES_SCHEMA_DIRS e user_data_dir/questionnaires."""
+        dirs = [data_dir]
+        dirs += [Path(p) for p in os.environ.get(SCHEMA_DIRS_ENV, "").split(os.pathsep) if p]
+        if user_data_dir:
+            dirs.append(Path(user_data_dir) / USER_SCHEMA_DIR)
+        return dirs
+
+    def scan(self) -> List[SchemaInfo]:
+        """Relê os cabeçalhos; schemas em cache cujo arquivo mudou ou sumiu são descartados."""
+        infos: Dict[str, SchemaInfo] = {}
+        for d in self.dirs:
+            if not d.is_dir():
+                continue
+            for path in sorted(d.glob("*.json")):
+                try:
+                    info = read_schema_header(path)
+                except (OSError, ValueError) as e:
+                    print(f"[SCHEMA] ignorando {path.name}: {e}")
+                    continue
+                if info.id == DEFAULT_SCHEMA_ID and d != self.dirs[0]:
+                    # ex.: um questions.json do usuário sem "id" esconderia o do app
+                    print(f"[SCHEMA] ignorando {path}: id {info.id!r} reservado ao questionário do app")
+                    continue
+                if info.id in infos:
+                    print(f"[SCHEMA] {path} substitui {infos[info.id].path} (id {info.id})")
+                infos[info.id] = info
+        self._infos = infos
+        for sid, (_, stamp, _) in list(self._lru.items()):
+            info = infos.get(sid)
+            if info is None or info.stamp != stamp:
+                self._evict(sid)
+        return list(infos.values())
+
+    def __iter__(self) -> Iterator[SchemaInfo]:
+        return iter(self._infos.values())
+
+    def __len__(self) -> int:
+        return len(self._infos)
+
+    def get(self, schema_id: str) -> Optional[SchemaInfo]:
+        return self._infos.get(schema_id)
+
+    def is_cached(self, schema_id: str) -> bool:
+        return schema_id in self._lru
+
+    def load(self, schema_id: str) -> Schema:
+        info = self._infos.get(schema_id)
+        if info is None:
+            raise KeyError(f"questionário desconhecido: {schema_id}")
+        entry = self._lru.get(schema_id)
+        if entry is not None and entry[1] == info.stamp:
+            self._lru.move_to_end(schema_id)
+            return entry[0]
+        if entry is not None:
+            self._evict(schema_id)
+
+        schema = load_schema_cached(info.path, self.cache_dir)
+        if not info.languages:
+            info.languages = list(schema.languages)
+        nbytes = estimate_schema_bytes(schema)
+        self._lru[schema_id] = (schema, info.stamp, nbytes)
+        self.cached_bytes += nbytes
+        while self.cached_bytes > self.max_bytes and len(self._lru) > 1:
+            self._evict(next(iter(self._lru)))
+        return schema
+
+    def _evict(self, schema_id: str):
+        _, _, nbytes = self._lru.pop(schema_id)
+        self.cached_bytes -= nbytes
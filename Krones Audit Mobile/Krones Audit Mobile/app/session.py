@@ -0,0 +1,110 @@
+# app/session.py
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .model import CompiledSchema
+from .calculator import code_scores, decode_answer, encode_answer, encode_answers
+
+class AuditSession:
+    """
+    Uma auditoria aberta: respostas como bytearray (1 byte por pergunta, na ordem
+    do schema compilado; ver calculator.CODE_*), comentários esparsos e scores
+    em cache, invalidados quando uma resposta muda. `site` é o local auditado
+    (chave das tendências), None até o usuário informá-lo; `name` é só o rótulo.
+    """
+    __slots__ = ("name", "codes", "comments", "site", "_scores")
+
+    def __init__(self, name: str, codes: bytearray, comments: Optional[Dict[str, str]] = None,
+                 site: Optional[str] = None):
+        self.name = name
+        self.codes = codes
+        self.comments: Dict[str, str] = dict(comments or {})
+        self.site = site
+        self._scores: Optional[Tuple[List[Optional[float]], Optional[float]]] = None
+
+    def set_answer(self, index: int, raw: Optional[str]):
+        code = encode_answer(raw)
+        if self.codes[index] != code:
+            self.codes[index] = code
+            self._scores = None
+
+    def set_comment(self, qid: str, text: Optional[str]):
+        if text:
+            self.comments[qid] = text
+        else:
+            self.comments.pop(qid, None)
+
+    def answers(self, compiled: CompiledSchema) -> Dict[str, str]:
+        """Respostas no formato do app ({qid: "75" | "N.A."})."""
+        ids = compiled.question_ids
+        return {ids[i]: decode_answer(c) for i, c in enumerate(self.codes) if c}
+
+    def cache_scores(self, topics: List[Optional[float]], final: Optional[float]):
+        """Guarda scores já calculados em outro lugar (ex.: ScoreEngine da sessão ativa)."""
+        self._scores = (list(topics), final)
+
+    def scores(self, compiled: CompiledSchema) -> Tuple[List[Optional[float]], Optional[float]]:
+        """(scores por tópico na ordem do schema, final), recalculados só se algo mudou."""
+        if self._scores is None:
+            self._scores = code_scores(compiled, self.codes)
+        return self._scores
+
+
+class SessionManager:
+    """Várias auditorias abertas ao mesmo tempo (ex.: uma por máquina da linha)."""
+
+    def __init__(self, compiled: CompiledSchema):
+        self.compiled = compiled
+        self._sessions: Dict[str, AuditSession] = {}
+        self.active: Optional[AuditSession] = None
+
+    def __iter__(self) -> Iterator[AuditSession]:
+        return iter(self._sessions.values())
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, name: str) -> Optional[AuditSession]:
+        return self._sessions.get(name)
+
+    def new_name(self) -> str:
+        i = len(self._sessions) + 1
+        while f"Auditoria {i}" in self._sessions:
+            i += 1
+        return f"Auditoria {i}"
+
+    def open(self, name: Optional[str] = None, answers: Optional[Dict[str, str]] = None,
+             comments: Optional[Dict[str, str]] = None, site: Optional[str] = None) -> AuditSession:
+        """Cria (ou substitui) uma sessão e a torna ativa."""
+        name = name or self.new_name()
+        session = AuditSession(name, encode_answers(self.compiled, answers or {}), comments, site)
+        self._sessions[name] = session
+        self.active = session
+        return session
+
+    def activate(self, name: str) -> AuditSession:
+        self.active = self._sessions[name]
+        return self.active
+
+    def close(self, name: str):
+        session = self._sessions.pop(name)
+        if session is self.active:
+            self.active = next(iter(self._sessions.values()), None)
+
+    # ---------- Sessão ativa (espelha os toques da UI) ----------
+    def record_answer(self, qid: str, raw: Optional[str]):
+        i = self.compiled.question_index.get(qid)
+        if i is not None and self.active is not None:
+            self.active.set_answer(i, raw)
+
+    def record_comment(self, qid: str, text: Optional[str]):
+        if self.active is not None:
+            self.active.set_comment(qid, text)
+
+    def replace_active(self, answers: Dict[str, str], comments: Dict[str, str]):
+        """A sessão ativa passa a conter exatamente estas respostas/comentários."""
+        if self.active is None:
+            self.open(answers=answers, comments=comments)
+            return
+        self.active.codes = encode_answers(self.compiled, answers)
+        self.active.comments = dict(comments)
+        self.active._scores = None
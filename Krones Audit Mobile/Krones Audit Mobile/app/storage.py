@@ -1,30 +1,51 @@
 # app/storage.py
+import glob
+import gzip
 import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional, Tuple
 
 from .model import Topic
-from .calculator import topic_score, final_score
+from .calculator import topic_score, final_score, ScoreEngine, encode_answer, decode_answer, CODE_NONE
+from .audit_codec import AUDIT_EXT, decode_audit, encode_audit, is_binary_audit
+from .profiling import TRACER
 
 def _fmt_pct(x: Optional[float]) -> Optional[float]:
     return None if x is None else round(x * 100.0, 1)
 
+@TRACER.traced("build_result")
 def build_result(topics: List[Topic],
                  answers: Dict[str, str],
                  comments: Dict[str, str],
                  language: str,
-                 auditor: Optional[str] = None) -> Dict[str, Any]:
+                 auditor: Optional[str] = None,
+                 engine: Optional[ScoreEngine] = None,
+                 schema: Optional[Dict[str, Any]] = None,
+                 site: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Monta o payload de exportação. Com `engine`, usa os scores já em cache;
+    `schema` ({"id", "version", "hash"}) identifica o questionário usado e
+    `site` o local auditado (chave das tendências, ver trends.TrendEngine).
+    """
 
     topic_entries: List[Dict[str, Any]] = []
     for t in topics:
-        ts = topic_score(t, answers)
+        ts = engine.topic_score(t.id) if engine else topic_score(t, answers)
         topic_entries.append({
             "id": t.id,
             "weight": t.weight,
             "score": _fmt_pct(ts)
         })
-    final = final_score(topics, answers)
+    final = engine.final_score() if engine else final_score(topics, answers)
 
     responses = []
     for qid, val in answers.items():
@@ -47,15 +68,157 @@ def build_result(topics: List[Topic],
             "final": _fmt_pct(final)
         }
     }
+    if schema is not None:
+        out["metadata"]["schema"] = schema
+    if site is not None:
+        out["metadata"]["site"] = site
     return out
 
-def save_json(user_data_dir: str, payload: Dict[str, Any]) -> Path:
+# ---------- Exportação ----------
+EXPORT_MODES = ("pretty", "compact", "gzip", "binary")  # pretty = indent=2 (formato antigo)
+
+def serialize_payload(payload: Dict[str, Any], mode: str = "compact", compiled=None) -> bytes:
+    """`compiled` (model.CompiledSchema) é obrigatório no modo "binary" (ver audit_codec)."""
+    if mode not in EXPORT_MODES:
+        raise ValueError(f"Modo de exportação desconhecido: {mode}")
+    if mode == "binary":
+        if compiled is None:
+            raise ValueError("O modo binary precisa do schema compilado")
+        return encode_audit(payload, compiled)
+    if mode == "pretty":
+        text = json.dumps(payload, ensure_ascii=False, indent=2)
+    else:
+        text = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    data = text.encode("utf-8")
+    return gzip.compress(data) if mode == "gzip" else data
+
+def export_filename(name: str, mode: str = "compact") -> str:
+    """Garante a extensão certa para o modo: .json, .json.gz ou .kaud."""
+    name = (name or "").strip()
+    if name.lower().endswith(".gz"):
+        name = name[:-3]
+    if name.lower().endswith(AUDIT_EXT):
+        name = name[:-len(AUDIT_EXT)]
+    if mode == "binary":
+        return (name[:-5] if name.lower().endswith(".json") else name) + AUDIT_EXT
+    if not name.lower().endswith(".json"):
+        name = f"{name}.json"
+    return f"{name}.gz" if mode == "gzip" else name
+
+def write_export(path, payload: Dict[str, Any], mode: str = "compact", compiled=None) -> Path:
+    path = Path(path)
+    path.write_bytes(serialize_payload(payload, mode, compiled))
+    return path
+
+def read_export(path, compiled=None) -> Dict[str, Any]:
+    """Lê uma exportação em qualquer modo (.json, .json.gz ou .kaud, este com `compiled`)."""
+    data = Path(path).read_bytes()
+    if is_binary_audit(data):
+        if compiled is None:
+            raise ValueError("Auditoria binária: informe o schema compilado")
+        return decode_audit(data, compiled)
+    if data[:2] == b"\x1f\x8b":  # assinatura gzip
+        data = gzip.decompress(data)
+    return json.loads(data.decode("utf-8"))
+
+# ---------- Lote de exportações (ferramentas de desktop) ----------
+EXPORT_PATTERNS = ("*.json", "*.json.gz", "*.kaud")
+BATCHES_PER_WORKER = 4  # lotes em voo por processo em map_bounded
+
+def _apply(fn: Callable, batch: List[Any]) -> List[Any]:
+    return [fn(item) for item in batch]
+
+def map_bounded(pool: Executor, fn: Callable, items: Iterable[Any], workers: int,
+                chunksize: int = 1) -> Iterator[Any]:
+    """
+    Como pool.map (resultados em ordem), mas com no máximo
+    BATCHES_PER_WORKER * workers lotes de `chunksize` itens em voo: a memória
+    não cresce com o nº de arquivos (Executor.map submete tudo de uma vez).
+    """
+    it = iter(items)
+    pending = deque()
+
+    def submit() -> bool:
+        batch = list(islice(it, chunksize))
+        if batch:
+            pending.append(pool.submit(_apply, fn, batch))
+        return bool(batch)
+
+    for _ in range(BATCHES_PER_WORKER * workers):
+        if not submit():
+            break
+    while pending:
+        results = pending.popleft().result()
+        submit()
+        yield from results
+
+def find_exports(source: str) -> List[str]:
+    """Diretório -> exportações dele (JSON, .json.gz, .kaud); senão, padrão glob."""
+    if os.path.isdir(source):
+        return sorted(str(p) for pat in EXPORT_PATTERNS for p in Path(source).glob(pat))
+    return sorted(glob.glob(source, recursive=True))
+
+def save_json(user_data_dir: str, payload: Dict[str, Any], mode: str = "pretty") -> Path:
     dst_dir = Path(user_data_dir)
     dst_dir.mkdir(parents=True, exist_ok=True)
     stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    path = dst_dir / f"auditoria_{stamp}.json"
-    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-    return path
+    return write_export(dst_dir / export_filename(f"auditoria_{stamp}", mode), payload, mode)
+
+class ExportService:
+    """
+    Serializa e grava exportações numa thread de fundo, uma de cada vez.
+    `dispatch(fn, *args)` leva os callbacks de volta à thread de UI
+    (no app: Clock.schedule_once); `then(path)` roda ainda na thread de fundo
+    (ex.: copiar para o armazenamento compartilhado do Android). Com `archive`
+    (archive.AuditArchive), cada exportação gravada também é arquivada; com
+    `trends` (trends.TrendEngine), entra nas tendências do local;
+    `compiled` habilita o modo "binary".
+    """
+
+    def __init__(self, dispatch: Callable[..., None], archive=None, compiled=None, trends=None):
+        self._dispatch = dispatch
+        self.archive = archive
+        self.trends = trends
+        self.compiled = compiled
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, payload: Dict[str, Any], path, mode: str = "compact",
+               then: Optional[Callable[[Path], Any]] = None,
+               on_done: Optional[Callable[[Path], Any]] = None,
+               on_error: Optional[Callable[[Exception], Any]] = None):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="export", daemon=True)
+            self._thread.start()
+        self._queue.put((payload, path, mode, then, on_done, on_error))
+
+    def _run(self):
+        while True:
+            payload, path, mode, then, on_done, on_error = self._queue.get()
+            try:
+                with TRACER.span(f"export.write.{mode}"):
+                    out = write_export(path, payload, mode, self.compiled)
+                if then is not None:
+                    then(out)
+            except Exception as e:
+                print(f"[EXPORT ERROR] {path}: {e.__class__.__name__}: {e}")
+                if on_error is not None:
+                    self._dispatch(on_error, e)
+                continue
+            if self.archive is not None:
+                try:
+                    with TRACER.span("archive.add"):
+                        self.archive.add(payload, source=str(out))
+                except Exception as e:  # arquivo local não pode derrubar a exportação
+                    print(f"[ARCHIVE] falha ao arquivar {out}: {e}")
+            if self.trends is not None:
+                try:
+                    with TRACER.span("trends.add"):
+                        self.trends.add(payload, source=str(out))
+                except Exception as e:
+                    print(f"[TRENDS] falha ao atualizar tendências com {out}: {e}")
+            if on_done is not None:
+                self._dispatch(on_done, out)
 
 def share_file(path: Path) -> bool:
     """Tenta compartilhar o arquivo no Android. Retorna True/False."""
@@ -70,3 +233,239 @@ def share_file(path: Path) -> bool:
         return True
     except Exception:
         return False
+
+
+# ---------- Diário (journal) da auditoria em andamento ----------
+JOURNAL_FILE = "session.journal"
+_RECORD_OPS = ("a", "c")  # ["a", qid, valor] resposta | ["c", qid, texto] comentário | ["x"] limpa tudo
+
+def _apply_record(answers: Dict[str, str], comments: Dict[str, str], rec: List[Any]):
+    op = rec[0]
+    if op == "x":
+        answers.clear()
+        comments.clear()
+        return
+    target = answers if op == "a" else comments
+    qid, value = rec[1], rec[2]
+    if value is None:
+        target.pop(qid, None)
+    else:
+        target[qid] = value
+
+class AnswerJournal:
+    """
+    Diário append-only das respostas/comentários ainda não exportados. Cada mudança
+    vira uma linha JSON compacta; as gravações vão para uma fila e uma thread de
+    fundo grava em lote (flush_interval), com fsync no máximo a cada fsync_interval
+    segundos, para o toque nunca esperar disco. Ao abrir, replay() restaura a sessão;
+    quando o arquivo cresce demais, é compactado num snapshot do estado atual.
+    """
+
+    def __init__(self, path: Path, flush_interval: float = 0.3,
+                 fsync_interval: float = 2.0, compact_every: int = 2000):
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        # Estado espelhado pela thread de escrita (usado na compactação)
+        self._answers: Dict[str, str] = {}
+        self._comments: Dict[str, str] = {}
+        self._records = 0
+        self._torn = False  # última linha incompleta: compacta antes de voltar a anexar
+
+    def replay(self) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """Lê o diário e devolve (answers, comments). Chamar antes de start()."""
+        answers: Dict[str, str] = {}
+        comments: Dict[str, str] = {}
+        records = 0
+        try:
+            with self.path.open(encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                        _apply_record(answers, comments, rec)
+                    except (ValueError, IndexError, TypeError):
+                        self._torn = True  # linha truncada por um kill no meio da escrita
+                        continue
+                    records += 1
+        except FileNotFoundError:
+            pass
+        self._answers, self._comments = dict(answers), dict(comments)
+        self._records = records
+        return answers, comments
+
+    def start(self):
+        if self._thread is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name="answer-journal", daemon=True)
+            self._thread.start()
+
+    # ---------- API da thread de UI (não bloqueia) ----------
+    def record_answer(self, qid: str, value: Optional[str]):
+        self._queue.put(("a", qid, value))
+
+    def record_comment(self, qid: str, text: Optional[str]):
+        self._queue.put(("c", qid, text))
+
+    def reset(self):
+        """Auditoria nova: descarta tudo o que estava no diário."""
+        self._queue.put(("x",))
+
+    def sync(self, timeout: float = 2.0) -> bool:
+        """Grava e faz fsync do que estiver pendente (ex.: on_pause). Bloqueia até timeout."""
+        if self._thread is None:
+            return False
+        done = threading.Event()
+        self._queue.put(("sync", done))
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 2.0):
+        if self._thread is None:
+            return
+        self._queue.put(("stop",))
+        self._thread.join(timeout)
+        self._thread = None
+
+    # ---------- Thread de escrita ----------
+    def _run(self):
+        f = self.path.open("a", encoding="utf-8")
+        if self._torn:
+            f = self._compact(f)
+            self._torn = False
+        last_fsync = time.monotonic()
+        pending_fsync = False
+        try:
+            while True:
+                try:
+                    batch = [self._queue.get(timeout=self.fsync_interval if pending_fsync else None)]
+                except queue.Empty:
+                    os.fsync(f.fileno())
+                    last_fsync, pending_fsync = time.monotonic(), False
+                    continue
+                if batch[0][0] in _RECORD_OPS:
+                    time.sleep(self.flush_interval)  # junta os toques seguintes no mesmo write
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                lines: List[str] = []
+                waiters: List[threading.Event] = []
+                stop = False
+                for item in batch:
+                    op = item[0]
+                    if op == "sync":
+                        waiters.append(item[1])
+                    elif op == "stop":
+                        stop = True
+                    elif op == "x":
+                        lines.clear()
+                        _apply_record(self._answers, self._comments, ["x"])
+                        f = self._compact(f)
+                    else:
+                        _apply_record(self._answers, self._comments, item)
+                        lines.append(json.dumps(item, ensure_ascii=False, separators=(",", ":")))
+
+                if lines:
+                    f.write("\n".join(lines) + "\n")
+                    f.flush()
+                    self._records += len(lines)
+                    pending_fsync = True
+                live = len(self._answers) + len(self._comments)
+                if self._records > self.compact_every and self._records > 2 * live:
+                    f = self._compact(f)
+                    pending_fsync = False
+                if pending_fsync and (waiters or stop or time.monotonic() - last_fsync >= self.fsync_interval):
+                    os.fsync(f.fileno())
+                    last_fsync, pending_fsync = time.monotonic(), False
+                for done in waiters:
+                    done.set()
+                if stop:
+                    return
+        finally:
+            f.close()
+
+    def _compact(self, f):
+        """Reescreve o diário como snapshot do estado atual (troca atômica)."""
+        f.close()
+        tmp = self.path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as out:
+            for qid, value in self._answers.items():
+                out.write(json.dumps(["a", qid, value], ensure_ascii=False, separators=(",", ":")) + "\n")
+            for qid, text in self._comments.items():
+                out.write(json.dumps(["c", qid, text], ensure_ascii=False, separators=(",", ":")) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp, self.path)
+        self._records = len(self._answers) + len(self._comments)
+        return self.path.open("a", encoding="utf-8")
+
+
+# ---------- Retomar uma auditoria exportada ----------
+@dataclass
+class AuditImport:
+    """Estado lido de uma exportação/diário, já validado contra o schema."""
+    answers: Dict[str, str] = field(default_factory=dict)
+    comments: Dict[str, str] = field(default_factory=dict)
+    unknown: List[str] = field(default_factory=list)             # ids fora do schema
+    invalid: List[Tuple[str, Any]] = field(default_factory=list)  # (id, valor fora da escala)
+    site: Optional[str] = None            # metadata.site (local das tendências)
+    schema_id: Optional[str] = None       # metadata.schema: questionário em que foi gravada
+    schema_version: Optional[str] = None  # (None nas exportações antigas e nos diários)
+
+def _read_records(data: bytes, compiled) -> Tuple[Dict[str, Any], List[Tuple[Any, Any, Any]]]:
+    """(metadata, [(id, valor, comentário)]) de um .kaud, JSON de build_result (.json/.gz) ou diário."""
+    if is_binary_audit(data):
+        payload = decode_audit(data, compiled)
+    else:
+        if data[:2] == b"\x1f\x8b":
+            data = gzip.decompress(data)
+        text = data.decode("utf-8")
+        if not text.lstrip().startswith("{"):
+            # diário (JSON lines): reaplica como no replay, ignorando linha truncada
+            answers: Dict[str, str] = {}
+            comments: Dict[str, str] = {}
+            for line in text.splitlines():
+                try:
+                    _apply_record(answers, comments, json.loads(line))
+                except (ValueError, IndexError, TypeError):
+                    continue
+            return {}, ([(qid, value, comments.get(qid)) for qid, value in answers.items()]
+                        + [(qid, None, text) for qid, text in comments.items() if qid not in answers])
+        payload = json.loads(text)
+    records = [(r.get("id"), r.get("value"), r.get("comment")) for r in payload.get("responses", [])]
+    return payload.get("metadata") or {}, records
+
+def import_audit(path, compiled) -> AuditImport:
+    """
+    Lê uma auditoria salva e confere cada resposta no índice de perguntas do
+    schema compilado (compiled.question_index). Respostas voltam no formato
+    do app ("75", "N.A."; 75.0 -> "75"); ids desconhecidos e valores inválidos
+    ficam de fora e são listados no resultado, junto com o local e o
+    questionário gravados em metadata.
+    """
+    index = compiled.question_index
+    meta, records = _read_records(Path(path).read_bytes(), compiled)
+    schema = meta.get("schema") if isinstance(meta.get("schema"), dict) else {}
+    text = lambda v: None if v is None else str(v)  # noqa: E731
+    result = AuditImport(site=text(meta.get("site")) or None, schema_id=text(schema.get("id")),
+                         schema_version=text(schema.get("version")))
+    for qid, value, comment in records:
+        if not isinstance(qid, str) or qid not in index:
+            result.unknown.append(str(qid))
+            continue
+        if value is not None:
+            try:
+                code = encode_answer(value)
+            except (ValueError, TypeError):
+                code = CODE_NONE
+            if code != CODE_NONE:
+                result.answers[qid] = decode_answer(code)
+            else:
+                result.invalid.append((qid, value))
+        if comment:
+            result.comments[qid] = str(comment)
+    return result
@@ -0,0 +1,228 @@
+# app/trends.py
+"""
+Tendências entre auditorias sucessivas do mesmo local (metadata.site) e
+questionário (metadata.schema.id): agregados por local para o resultado final,
+cada tópico e cada pergunta, atualizados em O(itens da auditoria) a cada
+exportação — sem percorrer o histórico nem recalcular scores.
+
+Por item: vezes visto, vezes N.A./sem score, soma dos valores (média), média
+móvel exponencial (EMA), último e penúltimo valor. Valores em % (escala do
+payload). Auditorias mais antigas que a última do local (ex.: importação fora
+de ordem) entram só nas contagens e na média; EMA/último/penúltimo exigem ordem
+cronológica — rebuild() reprocessa tudo em ordem.
+"""
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .calculator import CODE_NA, CODE_VALUES, encode_answer
+
+TRENDS_FILE = "trends.sqlite"
+TREND_ALPHA = 0.3  # peso da auditoria mais recente na EMA (~ últimas 5-6 auditorias)
+KINDS = ("final", "topic", "question")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trend_audits (
+    id           INTEGER PRIMARY KEY,
+    site         TEXT NOT NULL,
+    schema_id    TEXT NOT NULL,
+    source       TEXT NOT NULL DEFAULT '',  -- '' = sem arquivo (NULL nunca repetiria no UNIQUE)
+    generated_at TEXT,
+    UNIQUE (source, generated_at)
+);
+CREATE INDEX IF NOT EXISTS ix_trend_audits_site ON trend_audits(site, schema_id, generated_at);
+
+CREATE TABLE IF NOT EXISTS trend_sites (
+    site       TEXT NOT NULL,
+    schema_id  TEXT NOT NULL,
+    audits     INTEGER NOT NULL,
+    last_at    TEXT,
+    last_audit INTEGER,
+    prev_audit INTEGER,
+    PRIMARY KEY (site, schema_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS trend_stats (
+    site       TEXT NOT NULL,
+    schema_id  TEXT NOT NULL,
+    kind       TEXT NOT NULL,
+    item_id    TEXT NOT NULL,
+    seen       INTEGER NOT NULL,
+    na         INTEGER NOT NULL,
+    n          INTEGER NOT NULL,
+    total      REAL NOT NULL,
+    ema        REAL,
+    last       REAL,
+    prev       REAL,
+    last_audit INTEGER,
+    PRIMARY KEY (site, schema_id, kind, item_id)
+) WITHOUT ROWID;
+"""
+
+_INSERT = (
+    "INSERT INTO trend_stats (site, schema_id, kind, item_id, seen, na, n, total, ema, last, prev, last_audit) "
+    "VALUES (:site, :schema_id, :kind, :item_id, 1, :na, :n, :total, :value, :value, NULL, :audit) "
+    "ON CONFLICT (site, schema_id, kind, item_id) DO UPDATE SET "
+    "seen = seen + 1, na = na + excluded.na, n = n + excluded.n, total = total + excluded.total"
+)
+# Auditoria mais recente do local: também avança EMA, último e penúltimo
+_UPSERT_LATEST = _INSERT + (
+    ", ema = CASE WHEN excluded.last IS NULL THEN ema WHEN ema IS NULL THEN excluded.last "
+    "ELSE ema + :alpha * (excluded.last - ema) END"
+    ", prev = CASE WHEN excluded.last IS NULL THEN prev ELSE last END"
+    ", last = COALESCE(excluded.last, last)"
+    ", last_audit = CASE WHEN excluded.last IS NULL THEN last_audit ELSE excluded.last_audit END"
+)
+
+def _question_value(raw: Any) -> Tuple[bool, Optional[float]]:
+    """(é N.A., valor em %) de uma resposta crua; valor None = sem resposta válida."""
+    try:
+        code = encode_answer(raw)
+    except (ValueError, TypeError):
+        return False, None
+    if code == CODE_NA:
+        return True, None
+    value = CODE_VALUES.get(code)
+    return False, None if value is None else float(value)
+
+def _number(value: Any) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+class TrendEngine:
+    """
+    Agregados incrementais por local (SQLite no aparelho, como archive.AuditArchive).
+
+        trends.add(payload, source="auditoria.json")   # na exportação
+        trends.regressions("Linha 3", kind="topic")    # maiores quedas desde a auditoria anterior
+    """
+
+    def __init__(self, path: Union[str, Path], alpha: float = TREND_ALPHA):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.alpha = alpha
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # ---------- Escrita ----------
+    def _insert(self, payload: Dict[str, Any], source: Optional[str]) -> Optional[int]:
+        meta = payload.get("metadata") or {}
+        site = str(meta.get("site") or "")
+        schema_id = str((meta.get("schema") or {}).get("id") or "")
+        at = meta.get("generated_at") or ""
+        cur = self._db.execute(
+            "INSERT OR IGNORE INTO trend_audits (site, schema_id, source, generated_at) VALUES (?, ?, ?, ?)",
+            (site, schema_id, source or "", at))
+        if cur.rowcount == 0:
+            return None  # mesma exportação já contada
+        audit_id = cur.lastrowid
+
+        row = self._db.execute("SELECT last_at, last_audit FROM trend_sites WHERE site = ? AND schema_id = ?",
+                               (site, schema_id)).fetchone()
+        latest = row is None or not row["last_at"] or at >= row["last_at"]
+        if row is None:
+            self._db.execute("INSERT INTO trend_sites (site, schema_id, audits, last_at, last_audit) "
+                             "VALUES (?, ?, 1, ?, ?)", (site, schema_id, at, audit_id))
+        elif latest:
+            self._db.execute("UPDATE trend_sites SET audits = audits + 1, last_at = ?, prev_audit = last_audit, "
+                             "last_audit = ? WHERE site = ? AND schema_id = ?", (at, audit_id, site, schema_id))
+        else:
+            self._db.execute("UPDATE trend_sites SET audits = audits + 1 WHERE site = ? AND schema_id = ?",
+                             (site, schema_id))
+
+        base = {"site": site, "schema_id": schema_id, "audit": audit_id, "alpha": self.alpha}
+        rows: List[Dict[str, Any]] = []
+
+        def item(kind: str, item_id: str, na: bool, value: Optional[float]):
+            rows.append({**base, "kind": kind, "item_id": item_id, "na": int(na),
+                         "n": int(value is not None), "total": value or 0.0, "value": value})
+
+        scores = payload.get("scores") or {}
+        final = _number(scores.get("final"))
+        item("final", "", final is None, final)
+        for t in scores.get("topics", []):
+            if isinstance(t, dict) and t.get("id") is not None:
+                score = _number(t.get("score"))
+                item("topic", str(t["id"]), score is None, score)
+        for r in payload.get("responses", []):
+            if isinstance(r, dict) and r.get("id") is not None:
+                na, value = _question_value(r.get("value"))
+                if na or value is not None:
+                    item("question", str(r["id"]), na, value)
+        self._db.executemany(_UPSERT_LATEST if latest else _INSERT, rows)
+        return audit_id
+
+    def add(self, payload: Dict[str, Any], source: Optional[str] = None) -> Optional[int]:
+        """Soma uma auditoria (payload de build_result); a mesma (source, generated_at) conta uma vez."""
+        with self._lock, self._db:
+            return self._insert(payload, source)
+
+    def rebuild(self, items: Iterable[Tuple[Dict[str, Any], Optional[str]]]) -> int:
+        """Apaga os agregados e reprocessa (payload, source) em ordem cronológica; devolve o total."""
+        ordered = sorted(items, key=lambda it: (it[0].get("metadata") or {}).get("generated_at") or "")
+        added = 0
+        with self._lock, self._db:
+            for table in ("trend_stats", "trend_sites", "trend_audits"):
+                self._db.execute(f"DELETE FROM {table}")
+            for payload, source in ordered:
+                added += self._insert(payload, source) is not None
+        return added
+
+    # ---------- Consulta ----------
+    @staticmethod
+    def _stat(row: sqlite3.Row) -> Dict[str, Any]:
+        d = dict(row)
+        d["mean"] = d["total"] / d["n"] if d["n"] else None
+        d["delta"] = None if d["last"] is None or d["prev"] is None else d["last"] - d["prev"]
+        return d
+
+    def sites(self, schema_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Locais com nº de auditorias, data da última e o resultado final (último, anterior, EMA, média)."""
+        sql = ("SELECT s.site, s.schema_id, s.audits, s.last_at, f.last AS final_last, f.prev AS final_prev, "
+               "f.ema AS final_ema, CASE WHEN f.n > 0 THEN f.total / f.n END AS final_mean "
+               "FROM trend_sites s LEFT JOIN trend_stats f ON f.site = s.site AND f.schema_id = s.schema_id "
+               "AND f.kind = 'final' AND f.item_id = ''")
+        args: List[Any] = []
+        if schema_id is not None:
+            sql += " WHERE s.schema_id = ?"
+            args.append(schema_id)
+        with self._lock:
+            return [dict(r) for r in self._db.execute(sql + " ORDER BY s.site, s.schema_id", args)]
+
+    def trends(self, site: str, kind: str = "topic", schema_id: str = "",
+               item_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Agregados (seen, na, n, mean, ema, last, prev, delta) dos itens do local."""
+        if kind not in KINDS:
+            raise ValueError(f"kind inválido: {kind}")
+        sql = "SELECT * FROM trend_stats WHERE site = ? AND schema_id = ? AND kind = ?"
+        args: List[Any] = [site, schema_id, kind]
+        if item_ids is not None:
+            sql += f" AND item_id IN ({','.join('?' * len(item_ids))})"
+            args += list(item_ids)
+        with self._lock:
+            return [self._stat(r) for r in self._db.execute(sql + " ORDER BY item_id", args)]
+
+    def regressions(self, site: str, kind: str = "question", schema_id: str = "",
+                    limit: int = 10) -> List[Dict[str, Any]]:
+        """Maiores quedas (último - anterior) nos itens avaliados na auditoria mais recente do local."""
+        if kind not in KINDS:
+            raise ValueError(f"kind inválido: {kind}")
+        sql = ("SELECT t.* FROM trend_stats t JOIN trend_sites s ON s.site = t.site AND s.schema_id = t.schema_id "
+               "WHERE t.site = ? AND t.schema_id = ? AND t.kind = ? AND t.last_audit = s.last_audit "
+               "AND t.prev IS NOT NULL AND t.last < t.prev ORDER BY t.last - t.prev, t.item_id LIMIT ?")
+        with self._lock:
+            return [self._stat(r) for r in self._db.execute(sql, (site, schema_id, kind, limit))]
+
+    def always_na(self, site: str, schema_id: str = "", min_audits: int = 2) -> List[str]:
+        """Perguntas marcadas N.A. em todas as (pelo menos min_audits) auditorias em que apareceram."""
+        sql = ("SELECT item_id FROM trend_stats WHERE site = ? AND schema_id = ? AND kind = 'question' "
+               "AND na = seen AND seen >= ? ORDER BY item_id")
+        with self._lock:
+            return [r["item_id"] for r in self._db.execute(sql, (site, schema_id, min_audits))]
@@ -0,0 +1,6 @@
+# tests/conftest.py
+import sys
+from pathlib import Path
+
+# permite "from app...." rodando o pytest a partir da raiz do app
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
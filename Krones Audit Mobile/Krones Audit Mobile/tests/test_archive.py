@@ -0,0 +1,112 @@
+# tests/test_archive.py
+"""AuditArchive (SQLite): ida e volta, deduplicação, filtros e migração."""
+import sqlite3
+
+import pytest
+
+from app.archive import AuditArchive
+from app.model import Question, Group, Topic, compile_schema
+from app.storage import write_export
+
+TOPICS = [Topic(t, 1, {}, [Group(f"{t}.1", 1, {}, [Question(f"{t}.1.{i}", 1, {}) for i in (1, 2)])])
+          for t in ("1", "2")]
+
+
+def payload(at, final, topics, auditor="ana", language="PT-BR", schema_id="questions", answers=None):
+    return {
+        "metadata": {"schema_version": "1.0", "generated_at": at, "auditor": auditor, "language": language,
+                     "schema": {"id": schema_id}},
+        "responses": [{"id": qid, "value": v, "comment": "obs" if v == "0" else None}
+                      for qid, v in (answers or {"1.1.1": "75", "2.1.1": "0"}).items()],
+        "scores": {"topics": [{"id": tid, "weight": 1, "score": s} for tid, s in topics.items()], "final": final},
+    }
+
+
+@pytest.fixture
+def archive(tmp_path):
+    a = AuditArchive(tmp_path / "audits.sqlite")
+    yield a
+    a.close()
+
+
+@pytest.fixture
+def filled(archive):
+    archive.add(payload("2026-01-10T08:00:00Z", 80.0, {"1": 90.0, "2": 70.0}), source="a.json")
+    archive.add(payload("2026-02-10T08:00:00Z", 55.0, {"1": 40.0, "2": 70.0}, auditor="bruno"), source="b.json")
+    archive.add(payload("2026-03-10T08:00:00Z", 65.0, {"1": 65.0, "2": None}, language="ES"), source="c.json")
+    archive.add(payload("2026-03-20T08:00:00Z", 30.0, {"1": 30.0}, schema_id="comissionamento"), source="d.json")
+    return archive
+
+
+def test_round_trip(archive):
+    audit_id = archive.add(payload("2026-01-10T08:00:00Z", 37.5, {"1": 75.0, "2": None}), source="a.json")
+    [row] = archive.query()
+    assert row["id"] == audit_id
+    assert {k: row[k] for k in ("source", "generated_at", "auditor", "language", "schema_version",
+                                "final", "schema_id")} == {
+        "source": "a.json", "generated_at": "2026-01-10T08:00:00Z", "auditor": "ana", "language": "PT-BR",
+        "schema_version": "1.0", "final": 37.5, "schema_id": "questions"}
+    assert row["topics"] == {"1": 75.0, "2": None}
+    assert archive.responses(audit_id) == ({"1.1.1": "75", "2.1.1": "0"}, {"2.1.1": "obs"})
+
+
+def test_same_source_is_replaced_not_duplicated(archive):
+    archive.add(payload("2026-01-10T08:00:00Z", 50.0, {"1": 50.0}), source="a.json")
+    archive.add(payload("2026-01-10T09:00:00Z", 60.0, {"1": 60.0}), source="a.json")  # arquivo sobrescrito
+    rows = archive.query()
+    assert [(r["final"], r["topics"]) for r in rows] == [(60.0, {"1": 60.0})]
+    assert archive._db.execute("SELECT COUNT(*) FROM topic_scores").fetchone()[0] == 1  # cascata
+
+
+def test_filters_order_and_paging(filled):
+    finals = lambda **kw: [r["final"] for r in filled.query(**kw)]  # noqa: E731
+    assert finals() == [30.0, 65.0, 55.0, 80.0]  # mais recentes primeiro
+    assert finals(since="2026-02-10T08:00:00Z", until="2026-03-20") == [65.0, 55.0]
+    assert finals(auditor="bruno") == [55.0]
+    assert finals(language="ES") == [65.0]
+    assert finals(schema_id="questions", min_final=55.0, max_final=80.0) == [65.0, 55.0]
+    assert finals(topic_max={"1": 65.0}) == [30.0, 55.0]
+    assert finals(topic_min={"1": 65.0}, topic_max={"2": 80.0}) == [80.0]
+    assert finals(topic_min={"2": 0}) == [55.0, 80.0]  # sem score no tópico não entra
+    assert finals(order_by="final", descending=False, limit=2, offset=1) == [55.0, 65.0]
+    assert filled.count() == 4 and filled.count(topic_max={"1": 65.0}) == 2
+    with pytest.raises(ValueError):
+        filled.query(order_by="final; DROP TABLE audits")
+
+
+def test_import_files(tmp_path, archive):
+    compiled = compile_schema(TOPICS)
+    p = payload("2026-01-10T08:00:00Z", 37.5, {"1": 75.0, "2": 0.0})
+    files = [write_export(tmp_path / "a.json", p, "pretty"),
+             write_export(tmp_path / "b.json.gz", p, "gzip"),
+             write_export(tmp_path / "c.kaud", p, "binary", compiled=compiled)]
+    (tmp_path / "quebrado.json").write_text("{", encoding="utf-8")
+    stats = archive.import_files(files + [tmp_path / "quebrado.json"], batch_size=2, compiled=compiled)
+    assert stats == {"imported": 3, "skipped": 0, "errors": 1}
+    assert archive.import_files(files, compiled=compiled) == {"imported": 0, "skipped": 3, "errors": 0}
+    rows = archive.query(order_by="id", descending=False)
+    assert [r["source"] for r in rows] == [str(f.resolve()) for f in files]
+    assert all(archive.responses(r["id"])[0] == {"1.1.1": "75", "2.1.1": "0"} for r in rows)
+
+
+def test_old_database_is_migrated(tmp_path):
+    path = tmp_path / "audits.sqlite"
+    db = sqlite3.connect(str(path))
+    db.executescript("""
+        CREATE TABLE audits (id INTEGER PRIMARY KEY, source TEXT UNIQUE, generated_at TEXT, auditor TEXT,
+                             language TEXT, schema_version TEXT, final REAL);
+        INSERT INTO audits (source, generated_at, auditor, language, final)
+        VALUES ('velho.json', '2025-12-01T00:00:00Z', 'ana', 'PT-BR', 42.0);
+    """)
+    db.close()
+    archive = AuditArchive(path)
+    try:
+        assert "schema_id" in {r[1] for r in archive._db.execute("PRAGMA table_info(audits)")}
+        assert archive._db.execute("SELECT 1 FROM sqlite_master WHERE name = 'ix_audits_schema'").fetchone()
+        [old] = archive.query()
+        assert (old["source"], old["final"], old["schema_id"], old["topics"]) == ("velho.json", 42.0, None, {})
+        archive.add(payload("2026-01-10T08:00:00Z", 50.0, {"1": 50.0}), source="novo.json")
+        assert [r["source"] for r in archive.query(schema_id="questions")] == ["novo.json"]
+    finally:
+        archive.close()
+    AuditArchive(path).close()  # reabrir um banco já migrado não falha
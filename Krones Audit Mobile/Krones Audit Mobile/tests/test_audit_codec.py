@@ -0,0 +1,56 @@
+# tests/test_audit_codec.py
+"""encode_audit/decode_audit devolvem exatamente o payload de build_result."""
+import random
+
+import pytest
+
+from app.audit_codec import decode_audit, encode_audit, is_binary_audit
+from app.model import Question, Group, Topic, compile_schema
+from app.storage import build_result
+
+VALUES = ["N.A.", "0", "25", "50", "75", "100"]
+
+
+def make_topics():
+    return [Topic(str(t), 1, {}, [
+        Group(f"{t}.{g}", 1, {}, [Question(f"{t}.{g}.{q}", q % 3, {}) for q in range(1, 6)])
+        for g in range(1, 4)]) for t in range(1, 4)]
+
+
+@pytest.mark.parametrize("compress", [True, False])
+@pytest.mark.parametrize("seed", range(10))
+def test_round_trip(seed, compress):
+    rng = random.Random(seed)
+    topics = make_topics()
+    compiled = compile_schema(topics)
+    ids = [q.id for t in topics for g in t.groups for q in g.questions]
+    chosen = rng.sample(ids, rng.randint(0, len(ids)))  # ordem aleatória das respostas
+    answers = {qid: rng.choice(VALUES) for qid in chosen}
+    comments = {qid: rng.choice(["ok", "vazamento na válvula", "ção ✓"]) for qid in chosen[::3]}
+    payload = build_result(topics, answers, comments, "PT-BR", site="Linha 3",
+                           schema={"id": "questions", "version": None, "hash": "x"})
+
+    data = encode_audit(payload, compiled, compress=compress)
+    assert is_binary_audit(data)
+    assert decode_audit(data, compiled) == payload
+
+
+def test_non_canonical_responses_round_trip():
+    topics = make_topics()
+    compiled = compile_schema(topics)
+    payload = build_result(topics, {"1.1.1": "75"}, {}, "ES")
+    payload["responses"] += [
+        {"id": "9.9.9", "value": "50", "comment": None},    # fora do schema
+        {"id": "1.1.2", "value": "30", "comment": None},    # fora da escala
+        {"id": "1.1.3", "value": 100, "comment": None, "x": 1},  # chave extra
+    ]
+    payload["scores"]["final"] = 12.34  # mais casas que os décimos do formato
+    assert decode_audit(encode_audit(payload, compiled), compiled) == payload
+
+
+def test_other_schema_is_rejected():
+    topics = make_topics()
+    payload = build_result(topics, {"1.1.1": "100"}, {}, "PT-BR")
+    data = encode_audit(payload, compile_schema(topics))
+    with pytest.raises(ValueError):
+        decode_audit(data, compile_schema(topics[:2]))
@@ -0,0 +1,110 @@
+# tests/test_batch.py
+"""code_scores/batch_scores (schema compilado) contra topic_score/final_score."""
+import math
+import random
+
+import pytest
+
+from app.calculator import batch_scores, code_scores, encode_answers, final_score, topic_score
+from app.model import Question, Group, Topic, compile_schema
+
+WEIGHTS = [0, 0, 0.5, 1, 1, 2]  # excel_to_json grava 0 nas células vazias
+VALUES = ["N.A.", "0", "25", "50", "75", "100"]
+
+
+def random_topics(rng: random.Random):
+    topics = []
+    for ti in range(rng.randint(1, 4)):
+        groups = []
+        for gi in range(rng.randint(0, 3)):  # tópico sem grupos também vale
+            gid = f"{ti + 1}.{gi + 1}"
+            questions = [Question(f"{gid}.{qi + 1}", rng.choice(WEIGHTS), {})
+                         for qi in range(rng.randint(0, 5))]
+            groups.append(Group(gid, rng.choice(WEIGHTS), {}, questions))
+        topics.append(Topic(str(ti + 1), rng.choice(WEIGHTS), {}, groups))
+    return topics
+
+
+def random_answers(rng: random.Random, ids):
+    kind = rng.random()
+    if kind < 0.15:
+        return {}  # nada respondido
+    if kind < 0.3:
+        return {qid: "N.A." for qid in ids}  # tudo N.A.
+    return {qid: rng.choice(VALUES) for qid in ids if rng.random() < 0.7}
+
+
+def expected(topics, answers):
+    return [topic_score(t, answers) for t in topics], final_score(topics, answers)
+
+
+def same(got, want) -> bool:
+    if want is None:
+        return got is None or (isinstance(got, float) and math.isnan(got))
+    return got is not None and abs(got - want) < 1e-9
+
+
+def test_compile_schema_layout():
+    topics = random_topics(random.Random(1))
+    c = compile_schema(topics)
+    assert c.topic_ids == [t.id for t in topics]
+    assert c.group_ids == [g.id for t in topics for g in t.groups]
+    assert c.question_ids == [q.id for t in topics for g in t.groups for q in g.questions]
+    assert {qid: i for i, qid in enumerate(c.question_ids)} == c.question_index
+    for ti, t in enumerate(topics):
+        groups = c.group_ids[c.topic_offsets[ti]:c.topic_offsets[ti + 1]]
+        assert groups == [g.id for g in t.groups]
+    for gi, gid in enumerate(c.group_ids):
+        for i in range(c.group_offsets[gi], c.group_offsets[gi + 1]):
+            assert c.question_group[i] == gi and c.question_ids[i].startswith(gid + ".")
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_code_scores_matches_full_recompute(seed):
+    rng = random.Random(seed)
+    topics = random_topics(rng)
+    compiled = compile_schema(topics)
+    for _ in range(10):
+        answers = random_answers(rng, compiled.question_ids)
+        topics_got, final_got = code_scores(compiled, encode_answers(compiled, answers))
+        topics_want, final_want = expected(topics, answers)
+        assert all(same(g, w) for g, w in zip(topics_got, topics_want))
+        assert same(final_got, final_want)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_batch_scores_matches_full_recompute(seed):
+    np = pytest.importorskip("numpy")
+    rng = random.Random(seed)
+    topics = random_topics(rng)
+    compiled = compile_schema(topics)
+    audits = [random_answers(rng, compiled.question_ids) for _ in range(20)]
+    codes = np.array([list(encode_answers(compiled, a)) for a in audits],
+                     dtype=np.uint8).reshape(len(audits), compiled.n_questions)
+    batch = batch_scores(compiled, codes)
+    assert batch.topics.shape == (len(audits), len(topics))
+    for row, answers in enumerate(audits):
+        topics_want, final_want = expected(topics, answers)
+        assert all(same(float(g), w) for g, w in zip(batch.topics[row], topics_want))
+        assert same(float(batch.final[row]), final_want)
+
+
+def test_zero_weights_and_na_have_no_score():
+    np = pytest.importorskip("numpy")
+    topics = [
+        Topic("1", 1, {}, [Group("1.1", 1, {}, [Question("1.1.1", 0, {}), Question("1.1.2", 1, {})])]),
+        Topic("2", 0, {}, [Group("2.1", 1, {}, [Question("2.1.1", 1, {})])]),
+    ]
+    compiled = compile_schema(topics)
+    cases = [
+        ({}, [None, None], None),
+        ({"1.1.1": "100", "1.1.2": "N.A.", "2.1.1": "N.A."}, [None, None], None),
+        ({"1.1.1": "0", "1.1.2": "50", "2.1.1": "100"}, [0.5, 1.0], 0.5),
+    ]
+    for answers, topics_want, final_want in cases:
+        assert expected(topics, answers) == (topics_want, final_want)
+        codes = encode_answers(compiled, answers)
+        assert code_scores(compiled, codes) == (topics_want, final_want)
+        batch = batch_scores(compiled, np.frombuffer(bytes(codes), dtype=np.uint8))
+        assert all(same(float(g), w) for g, w in zip(batch.topics[0], topics_want))
+        assert same(float(batch.final[0]), final_want)
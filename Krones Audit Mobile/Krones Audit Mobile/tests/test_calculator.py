@@ -0,0 +1,58 @@
+# tests/test_calculator.py
+"""ScoreEngine (incremental) deve bater com topic_score/final_score (recálculo completo)."""
+import random
+
+import pytest
+
+from app.calculator import ScoreEngine, final_score, topic_score
+from app.model import Question, Group, Topic
+
+WEIGHTS = [0, 0, 0.5, 1, 1, 2, 3]  # excel_to_json grava 0 nas células vazias
+VALUES = [None, "N.A.", "NA", "0", "25", "50", "75", "100"]
+
+
+def random_topics(rng: random.Random):
+    topics = []
+    for ti in range(rng.randint(1, 4)):
+        groups = []
+        for gi in range(rng.randint(1, 4)):
+            gid = f"{ti + 1}.{gi + 1}"
+            questions = [Question(f"{gid}.{qi + 1}", rng.choice(WEIGHTS), {})
+                         for qi in range(rng.randint(1, 6))]
+            groups.append(Group(gid, rng.choice(WEIGHTS), {}, questions))
+        topics.append(Topic(str(ti + 1), rng.choice(WEIGHTS), {}, groups))
+    return topics
+
+
+def assert_same(engine: ScoreEngine, topics, answers):
+    for t in topics:
+        assert engine.topic_score(t.id) == pytest.approx(topic_score(t, answers), abs=1e-9)
+    assert engine.final_score() == pytest.approx(final_score(topics, answers), abs=1e-9)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_incremental_matches_full_recompute(seed):
+    rng = random.Random(seed)
+    topics = random_topics(rng)
+    ids = [q.id for t in topics for g in t.groups for q in g.questions]
+    engine = ScoreEngine(topics)
+    answers = {}
+    for _ in range(4 * len(ids)):
+        qid, value = rng.choice(ids), rng.choice(VALUES)
+        tid = engine.topic_of(qid)
+        before = engine.topic_score(tid), engine.final_score()
+        changed = engine.set_answer(qid, value)
+        # a UI só refaz os rótulos cujo score mudou: o retorno tem de ser exato
+        assert changed == (engine.topic_score(tid) != before[0], engine.final_score() != before[1])
+        if value is None:
+            answers.pop(qid, None)
+        else:
+            answers[qid] = value
+        assert_same(engine, topics, answers)
+
+    # load() de um estado qualquer = mesma coisa que chegar nele toque a toque
+    other = ScoreEngine(topics)
+    other.load(answers)
+    assert_same(other, topics, answers)
+    engine.clear()
+    assert_same(engine, topics, {})
@@ -0,0 +1,43 @@
+# tests/test_impact.py
+"""ScoreEngine.impact_ranking comparado com o recálculo completo (final_score)."""
+from app.calculator import ScoreEngine, final_score
+from app.model import Question, Group, Topic
+
+
+def _topics(q_weights, g_weight=1.0, t_weight=1.0):
+    questions = [Question(f"1.1.{i + 1}", w, {}) for i, w in enumerate(q_weights)]
+    return [Topic("1", t_weight, {}, [Group("1.1", g_weight, {}, questions)])]
+
+
+def _expected_gain(topics, answers, qid):
+    before = final_score(topics, answers) or 0.0
+    after = final_score(topics, {**answers, qid: "100"})
+    return None if after is None else after - before
+
+
+def test_impact_matches_full_recompute():
+    topics = _topics([1, 2, 3])
+    answers = {"1.1.1": "50", "1.1.2": "N.A."}
+    engine = ScoreEngine(topics)
+    engine.load(answers)
+    gains = dict(engine.impact_ranking().gains)
+    assert set(gains) == {"1.1.1", "1.1.3"}
+    for qid, gain in gains.items():
+        assert abs(gain - _expected_gain(topics, answers, qid)) < 1e-9
+
+
+def test_zero_weight_question_is_skipped():
+    # excel_to_json grava peso 0 nas células vazias
+    topics = _topics([0, 1])
+    engine = ScoreEngine(topics)
+    engine.load({})
+    assert [qid for qid, _ in engine.impact_ranking().gains] == ["1.1.2"]
+
+
+def test_zero_weight_group_and_topic_do_not_raise():
+    for kwargs in ({"g_weight": 0}, {"t_weight": 0}):
+        topics = _topics([0, 1], **kwargs)
+        engine = ScoreEngine(topics)
+        engine.load({"1.1.1": "25"})
+        assert engine.impact_ranking().gains == []
+        assert final_score(topics, {"1.1.1": "25", "1.1.2": "100"}) is None
@@ -0,0 +1,53 @@
+# tests/test_import.py
+"""import_audit: retomar uma exportação ou diário contra o schema carregado."""
+import json
+
+from app.model import Question, Group, Topic, compile_schema
+from app.storage import build_result, import_audit, write_export
+
+TOPICS = [Topic("1", 1, {}, [Group("1.1", 1, {}, [Question(f"1.1.{i}", 1, {}) for i in range(1, 7)])])]
+
+
+def write_json(path, payload):
+    path.write_text(json.dumps(payload), encoding="utf-8")
+    return path
+
+
+def test_values_are_normalized_and_checked(tmp_path):
+    compiled = compile_schema(TOPICS)
+    payload = {"metadata": {}, "responses": [
+        {"id": "1.1.1", "value": 75.0, "comment": "vazamento"},
+        {"id": "1.1.2", "value": "na", "comment": None},
+        {"id": "1.1.3", "value": 100, "comment": None},
+        {"id": "1.1.4", "value": "30", "comment": None},   # fora da escala
+        {"id": "1.1.5", "value": "abc", "comment": None},  # não é número
+        {"id": "1.1.6", "value": None, "comment": "só comentário"},
+        {"id": "9.9.9", "value": "50", "comment": None},   # fora do schema
+    ]}
+    result = import_audit(write_json(tmp_path / "a.json", payload), compiled)
+    assert result.answers == {"1.1.1": "75", "1.1.2": "N.A.", "1.1.3": "100"}
+    assert result.comments == {"1.1.1": "vazamento", "1.1.6": "só comentário"}
+    assert result.invalid == [("1.1.4", "30"), ("1.1.5", "abc")]
+    assert result.unknown == ["9.9.9"]
+    assert (result.site, result.schema_id, result.schema_version) == (None, None, None)
+
+
+def test_site_and_schema_come_back_in_every_format(tmp_path):
+    compiled = compile_schema(TOPICS)
+    payload = build_result(TOPICS, {"1.1.1": "50", "1.1.2": "N.A."}, {"1.1.2": "parada"}, "PT-BR",
+                           schema={"id": "comissionamento", "version": "2026.1", "hash": "x"},
+                           site="Linha 3")
+    for mode, name in (("pretty", "a.json"), ("gzip", "a.json.gz"), ("binary", "a.kaud")):
+        path = write_export(tmp_path / name, payload, mode, compiled=compiled)
+        result = import_audit(path, compiled)
+        assert result.answers == {"1.1.1": "50", "1.1.2": "N.A."}
+        assert result.comments == {"1.1.2": "parada"}
+        assert (result.site, result.schema_id, result.schema_version) == ("Linha 3", "comissionamento", "2026.1")
+
+
+def test_journal_import(tmp_path):
+    path = tmp_path / "session.journal"
+    path.write_text('["a","1.1.1","25"]\n["c","1.1.2","obs"]\n["a","1.1.1","100"]\n["a","1.1', encoding="utf-8")
+    result = import_audit(path, compile_schema(TOPICS))
+    assert (result.answers, result.comments) == ({"1.1.1": "100"}, {"1.1.2": "obs"})
+    assert result.site is None and result.schema_id is None
@@ -0,0 +1,72 @@
+# tests/test_journal.py
+"""AnswerJournal: o que foi gravado volta igual no replay (inclusive após compactar)."""
+import random
+
+from app.storage import AnswerJournal
+
+
+def apply(target, qid, value):
+    if value is None:
+        target.pop(qid, None)
+    else:
+        target[qid] = value
+
+
+def reopen(path, **kwargs):
+    journal = AnswerJournal(path, **kwargs)
+    return journal, journal.replay()
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "session.journal"
+    journal, state = reopen(path, flush_interval=0)
+    assert state == ({}, {})
+    journal.start()
+    journal.record_answer("1.1.1", "75")
+    journal.record_answer("1.1.2", "N.A.")
+    journal.record_comment("1.1.1", "vazamento na válvula")
+    journal.record_answer("1.1.1", "100")
+    journal.record_answer("1.1.2", None)  # desmarcada
+    journal.close()
+
+    journal, state = reopen(path)
+    assert state == ({"1.1.1": "100"}, {"1.1.1": "vazamento na válvula"})
+    journal.start()
+    journal.reset()
+    journal.record_answer("2.1.1", "25")
+    journal.close()
+    assert reopen(path)[1] == ({"2.1.1": "25"}, {})
+
+
+def test_compaction_keeps_state(tmp_path):
+    rng = random.Random(0)
+    path = tmp_path / "session.journal"
+    journal, _ = reopen(path, flush_interval=0, compact_every=50)
+    journal.start()
+    answers, comments = {}, {}
+    for i in range(500):
+        qid = f"1.1.{rng.randint(1, 8)}"
+        if i % 7 == 0:
+            text = rng.choice([None, "ok", "ruído"])
+            journal.record_comment(qid, text)
+            apply(comments, qid, text)
+        else:
+            value = rng.choice([None, "N.A.", "0", "50", "100"])
+            journal.record_answer(qid, value)
+            apply(answers, qid, value)
+        if i % 100 == 0:
+            assert journal.sync()
+    journal.close()
+    assert reopen(path)[1] == (answers, comments)
+    assert len(path.read_text(encoding="utf-8").splitlines()) < 500
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    path = tmp_path / "session.journal"
+    path.write_text('["a","1.1.1","50"]\n["a","1.1.2","7', encoding="utf-8")  # kill no meio
+    journal, state = reopen(path, flush_interval=0)
+    assert state == ({"1.1.1": "50"}, {})
+    journal.start()
+    journal.record_answer("1.1.3", "25")
+    journal.close()
+    assert reopen(path)[1] == ({"1.1.1": "50", "1.1.3": "25"}, {})
@@ -0,0 +1,101 @@
+# tests/test_registry.py
+"""read_schema_header (leitura só do cabeçalho) e o LRU do SchemaRegistry."""
+import json
+import os
+
+import pytest
+
+import app.registry as registry
+from app.registry import SchemaRegistry, estimate_schema_bytes, read_schema_header
+
+HEADER = ('{"id": "comissionamento", "version": 2026.5, "rev": 1e3, "delta": -12, "beta": true,\n'
+          ' "note": null, "title": {"PT-BR": "Comissionamento \\u00e9 \\"novo\\"", "ES": "Puesta"},\n'
+          ' "languages": ["PT-BR", "ES"], "topics": [')
+
+
+def schema_json(schema_id, n_questions=3, **extra):
+    questions = [{"id": f"1.1.{i + 1}", "weight": 1, "title": {"PT-BR": f"Pergunta {i + 1}" * 5}}
+                 for i in range(n_questions)]
+    return json.dumps({"id": schema_id, **extra, "languages": ["PT-BR"], "topics": [
+        {"id": "1", "weight": 1, "title": {"PT-BR": "Tópico"},
+         "groups": [{"id": "1.1", "weight": 1, "title": {"PT-BR": "Grupo"}, "questions": questions}]}]})
+
+
+def test_header_survives_every_chunk_split(tmp_path, monkeypatch):
+    path = tmp_path / "comissionamento.json"
+    path.write_text(HEADER + "]}", encoding="utf-8")
+    for size in range(1, len(HEADER) + 2):
+        monkeypatch.setattr(registry, "_HEADER_CHUNK", size)
+        info = read_schema_header(path)
+        assert (info.id, info.version, info.languages) == ("comissionamento", "2026.5", ["PT-BR", "ES"]), size
+        assert info.title == {"PT-BR": 'Comissionamento é "novo"', "ES": "Puesta"}
+
+
+def test_header_defaults_and_errors(tmp_path):
+    path = tmp_path / "manutencao.json"
+    path.write_text('﻿{"topics": []}', encoding="utf-8")  # BOM, sem cabeçalho
+    info = read_schema_header(path)
+    assert (info.id, info.version, info.title) == ("manutencao", None, {})
+    for text in ('{"id": "x"}', '{"id": "x", "version": 2026.', "[]"):
+        path.write_text(text, encoding="utf-8")
+        with pytest.raises(ValueError):
+            read_schema_header(path)
+
+
+def make_registry(tmp_path, ids, max_bytes):
+    d = tmp_path / "schemas"
+    d.mkdir()
+    for sid in ids:
+        (d / f"{sid}.json").write_text(schema_json(sid), encoding="utf-8")
+    reg = SchemaRegistry([d], cache_dir=str(tmp_path / "cache"), max_bytes=max_bytes)
+    reg.scan()
+    return reg, d
+
+
+def test_lru_respects_memory_bound(tmp_path):
+    reg, _ = make_registry(tmp_path, ["a", "b", "c"], max_bytes=1 << 30)
+    size = estimate_schema_bytes(reg.load("a"))
+    reg.max_bytes = 2 * size + size // 2  # cabem dois
+    reg.load("b")
+    assert reg.load("a") is reg.load("a")  # hit no LRU; "a" passa a ser o mais recente
+    reg.load("c")
+    assert [sid for sid in ("a", "b", "c") if reg.is_cached(sid)] == ["a", "c"]  # "b" era o mais antigo
+    assert reg.cached_bytes == sum(nbytes for _, _, nbytes in reg._lru.values())  # medido na carga
+    assert reg.cached_bytes <= reg.max_bytes
+
+
+def test_most_recent_schema_is_never_evicted(tmp_path):
+    reg, _ = make_registry(tmp_path, ["a", "b"], max_bytes=1)
+    reg.load("a")
+    schema = reg.load("b")
+    assert not reg.is_cached("a") and reg.is_cached("b")
+    assert reg.cached_bytes == estimate_schema_bytes(schema)
+
+
+def test_scan_drops_changed_or_removed_files(tmp_path):
+    reg, d = make_registry(tmp_path, ["a", "b"], max_bytes=1 << 30)
+    old = reg.load("a")
+    reg.load("b")
+    (d / "a.json").write_text(schema_json("a", n_questions=5), encoding="utf-8")
+    os.utime(d / "a.json", ns=(1, 1))  # garante stamp diferente
+    (d / "b.json").unlink()
+    reg.scan()
+    assert not reg.is_cached("a") and not reg.is_cached("b") and reg.cached_bytes == 0
+    assert reg.get("b") is None
+    new = reg.load("a")
+    assert new is not old and len(new.topics[0].groups[0].questions) == 5
+    with pytest.raises(KeyError):
+        reg.load("b")
+
+
+def test_user_file_cannot_shadow_bundled_schema(tmp_path):
+    bundled, user = tmp_path / "data", tmp_path / "user"
+    bundled.mkdir()
+    user.mkdir()
+    (bundled / "questions.json").write_text(schema_json("questions"), encoding="utf-8")
+    (user / "questions.json").write_text('{"topics": []}', encoding="utf-8")  # sem "id"
+    (user / "extra.json").write_text(schema_json("extra"), encoding="utf-8")
+    reg = SchemaRegistry([bundled, user])
+    reg.scan()
+    assert reg.get("questions").path == bundled / "questions.json"
+    assert reg.get("extra").path == user / "extra.json"
@@ -0,0 +1,54 @@
+# tests/test_search.py
+"""SearchIndex.search: prefixo sem acento/caixa e ids por segmento inteiro."""
+from app.i18n import build_search_index
+from app.model import Question, Group, Topic
+
+TOPICS = [
+    Topic("1", 1, {}, [Group("1.1", 1, {"PT-BR": "Segurança elétrica", "ES": "Seguridad eléctrica"}, [
+        Question("1.1.1", 1, {"PT-BR": "Painel aterrado", "ES": "Panel puesto a tierra"}),
+        Question("1.1.2", 1, {"PT-BR": "Proteção da esteira", "ES": "Protección de la cinta"}),
+    ])]),
+    Topic("2", 1, {}, [
+        Group("2.3", 1, {"PT-BR": "Válvulas"}, [
+            Question("2.3.1", 1, {"PT-BR": "Válvula 10"}),
+            Question("2.3.10", 1, {"PT-BR": "Válvula 100"}),
+        ]),
+        Group("2.30", 1, {"PT-BR": "Bombas"}, [
+            Question("2.30.1", 1, {"PT-BR": "Válvula de alívio"}),
+            Question("2.30.10", 1, {"PT-BR": "Selo mecânico"}),
+        ]),
+    ]),
+]
+INDEX = build_search_index(TOPICS)
+
+
+def ids(query, **kw):
+    return [i for i, _ in INDEX.search(query, **kw)]
+
+
+def test_prefix_ignores_accents_and_case():
+    valves = ["2.3", "2.3.1", "2.3.10", "2.30.1"]
+    assert ids("valv") == ids("VÁLV") == ids("Válvula") == valves
+    assert ids("eletr") == ids("ELÉTRICA") == ["1.1"]
+    assert ids("protecao") == ["1.1.2"]
+
+
+def test_every_language_and_every_word():
+    assert ids("tierra") == ["1.1.1"]  # título em ES
+    assert ids("valv 10") == ["2.3.1", "2.3.10"]  # todas as palavras (E)
+    assert ids("valv selo") == []
+    assert ids("  ¿ ") == [] and ids("") == []
+
+
+def test_id_matches_whole_segments():
+    assert ids("2.3") == ["2.3", "2.3.1", "2.3.10"]
+    assert ids("2.30") == ["2.30", "2.30.1", "2.30.10"]
+    assert ids("2.3.1") == ["2.3.1"]
+    assert ids("2.3.10") == ["2.3.10"]
+    assert ids("2") == ["2.3", "2.3.1", "2.3.10", "2.30", "2.30.1", "2.30.10"]
+
+
+def test_topics_and_limit():
+    assert INDEX.search("2.3") == [("2.3", "2"), ("2.3.1", "2"), ("2.3.10", "2")]
+    assert INDEX.search("seg", limit=1) == [("1.1", "1")]
+    assert ids("valv", limit=2) == ["2.3", "2.3.1"]
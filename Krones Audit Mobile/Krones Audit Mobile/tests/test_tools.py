@@ -0,0 +1,51 @@
+# tests/test_tools.py
+"""Partes compartilhadas pelas ferramentas de lote (tools/) e seus imports como módulo."""
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.storage import BATCHES_PER_WORKER, find_exports, map_bounded
+
+
+@pytest.mark.parametrize("name", ["tools.columnar", "tools.rescore", "tools.trends"])
+def test_tools_import_as_modules(name):
+    # "python -m tools.x" ou testes: não dependem da pasta do script em sys.path
+    assert hasattr(importlib.import_module(name), "main")
+
+
+@pytest.mark.parametrize("chunksize", [1, 3, 100])
+def test_map_bounded_keeps_order_and_bounds_work(chunksize):
+    started = []
+    lock = threading.Lock()
+
+    def work(x):
+        with lock:
+            started.append(x)
+        return x * x
+
+    def items():
+        for i in range(200):
+            # nunca mais do que a janela adiantada em relação ao que já foi consumido
+            assert i <= consumed[0] + BATCHES_PER_WORKER * 2 * chunksize + chunksize
+            yield i
+
+    consumed = [0]
+    out = []
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        for value in map_bounded(pool, work, items(), workers=2, chunksize=chunksize):
+            out.append(value)
+            consumed[0] += 1
+    assert out == [i * i for i in range(200)]
+    assert sorted(started) == list(range(200))
+
+
+def test_find_exports(tmp_path):
+    for name in ("a.json", "b.json.gz", "c.kaud", "d.txt"):
+        (tmp_path / name).write_bytes(b"")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "e.kaud").write_bytes(b"")
+    assert [p.rsplit("/", 1)[-1] for p in find_exports(str(tmp_path))] == ["a.json", "b.json.gz", "c.kaud"]
+    assert find_exports(str(tmp_path / "**" / "*.kaud")) == sorted(
+        [str(tmp_path / "c.kaud"), str(tmp_path / "sub" / "e.kaud")])
@@ -0,0 +1,108 @@
+# tests/test_trends.py
+"""TrendEngine: agregados incrementais por local contra os valores esperados e o rebuild."""
+import random
+
+import pytest
+
+from app.trends import TrendEngine
+
+
+def audit(at, final, topics, answers, site="Linha 3", schema_id="questions"):
+    return {
+        "metadata": {"generated_at": at, "site": site, "schema": {"id": schema_id}},
+        "scores": {"final": final, "topics": [{"id": tid, "score": s} for tid, s in topics.items()]},
+        "responses": [{"id": qid, "value": v, "comment": None} for qid, v in answers.items()],
+    }
+
+
+AUDITS = [
+    audit("2026-01-01T00:00:00Z", 50.0, {"1": 50.0, "2": None}, {"1.1.1": "100", "1.1.2": "25", "1.1.3": "N.A."}),
+    audit("2026-02-01T00:00:00Z", 80.0, {"1": 80.0, "2": 40.0}, {"1.1.1": "100", "1.1.2": "50", "1.1.3": "N.A."}),
+    audit("2026-03-01T00:00:00Z", 60.0, {"1": 70.0, "2": 20.0}, {"1.1.1": "50", "1.1.2": "75", "1.1.3": "N.A."}),
+]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    e = TrendEngine(tmp_path / "trends.sqlite", alpha=0.3)
+    yield e
+    e.close()
+
+
+def snapshot(engine):
+    """Tudo o que a API expõe, sem os ids internos das auditorias."""
+    out = {"sites": engine.sites()}
+    for s in out["sites"]:
+        key = (s["site"], s["schema_id"])
+        for kind in ("final", "topic", "question"):
+            out[key + (kind,)] = [{k: v for k, v in row.items() if k != "last_audit"}
+                                  for row in engine.trends(s["site"], kind, s["schema_id"])]
+        out[key + ("regressions",)] = [r["item_id"] for r in engine.regressions(s["site"], "question", s["schema_id"])]
+        out[key + ("always_na",)] = engine.always_na(s["site"], s["schema_id"])
+    return out
+
+
+def test_moving_average_last_and_previous(engine):
+    for i, payload in enumerate(AUDITS):
+        assert engine.add(payload, source=f"a{i}.json") is not None
+    [site] = engine.sites("questions")
+    assert (site["site"], site["audits"], site["last_at"]) == ("Linha 3", 3, "2026-03-01T00:00:00Z")
+    # EMA: 50 -> 50 + 0.3*(80-50) = 59 -> 59 + 0.3*(60-59) = 59.3
+    assert site["final_ema"] == pytest.approx(59.3)
+    assert (site["final_last"], site["final_prev"]) == (60.0, 80.0)
+    assert site["final_mean"] == pytest.approx(190.0 / 3)
+
+    topics = {t["item_id"]: t for t in engine.trends("Linha 3", "topic", "questions")}
+    assert topics["1"]["ema"] == pytest.approx(50 + 0.3 * 30 + 0.3 * (70 - 59))
+    assert topics["1"]["delta"] == pytest.approx(-10.0)
+    # tópico 2 sem score na 1ª auditoria: conta como N.A. e a EMA começa na 2ª
+    assert (topics["2"]["seen"], topics["2"]["na"], topics["2"]["n"]) == (3, 1, 2)
+    assert topics["2"]["ema"] == pytest.approx(40 + 0.3 * (20 - 40))
+
+
+def test_regressions_and_always_na(engine):
+    for i, payload in enumerate(AUDITS):
+        engine.add(payload, source=f"a{i}.json")
+    drops = engine.regressions("Linha 3", "question", "questions")
+    assert [(r["item_id"], r["prev"], r["last"]) for r in drops] == [("1.1.1", 100.0, 50.0)]
+    assert [r["item_id"] for r in engine.regressions("Linha 3", "topic", "questions")] == ["2", "1"]
+    assert engine.always_na("Linha 3", "questions") == ["1.1.3"]
+    assert engine.always_na("Linha 3", "questions", min_audits=4) == []
+    assert engine.regressions("Outro local", "question", "questions") == []
+
+
+def test_same_export_counts_once(engine):
+    assert engine.add(AUDITS[0], source="a.json") is not None
+    assert engine.add(AUDITS[0], source="a.json") is None
+    assert engine.add(AUDITS[0]) is not None  # sem arquivo: outra chave, mas também única
+    assert engine.add(AUDITS[0]) is None
+    assert engine.sites()[0]["audits"] == 2
+
+
+def test_sites_and_schemas_are_separate(engine):
+    engine.add(AUDITS[0], source="a.json")
+    engine.add(audit("2026-01-02T00:00:00Z", 10.0, {}, {}, site="Linha 4"), source="b.json")
+    engine.add(audit("2026-01-03T00:00:00Z", 20.0, {}, {}, schema_id="comissionamento"), source="c.json")
+    assert [(s["site"], s["schema_id"], s["final_last"]) for s in engine.sites()] == [
+        ("Linha 3", "comissionamento", 20.0), ("Linha 3", "questions", 50.0), ("Linha 4", "questions", 10.0)]
+    assert [s["site"] for s in engine.sites("comissionamento")] == ["Linha 3"]
+
+
+def test_rebuild_matches_incremental_adds(tmp_path, engine):
+    extra = [audit(f"2026-0{m}-15T00:00:00Z", 10.0 * m, {"1": 5.0 * m}, {"1.1.1": "25" if m % 2 else "75"},
+                   site=f"Linha {m % 2}") for m in range(1, 8)]
+    items = [(p, f"a{i}.json") for i, p in enumerate(AUDITS + extra)]
+    chronological = sorted(items, key=lambda it: it[0]["metadata"]["generated_at"])
+    for payload, source in chronological:
+        engine.add(payload, source=source)
+
+    other = TrendEngine(tmp_path / "rebuilt.sqlite")
+    try:
+        shuffled = items[:]
+        random.Random(0).shuffle(shuffled)
+        for payload, source in shuffled:  # fora de ordem: EMA/último só corrigem no rebuild
+            other.add(payload, source=source)
+        assert other.rebuild(shuffled + shuffled[:2]) == len(items)  # repetidas contam uma vez
+        assert snapshot(other) == snapshot(engine)
+    finally:
+        other.close()
@@ -0,0 +1,205 @@
+# tools/bench.py
+"""
+Benchmarks de carga do schema, pontuação e exportação com schemas sintéticos
+(mesmo formato do questions.json). Não abre janela nem importa Kivy.
+
+Uso (a partir da raiz do app):
+    python tools/bench.py --out bench_base.json
+    python tools/bench.py --sizes 10 1000 100000 --na-ratio 0.3 --out bench_novo.json --compare bench_base.json
+
+Cada caso é medido `--repeat` vezes (vale a mediana); o pico de memória vem de
+uma execução extra com tracemalloc, separada da medição de tempo.
+"""
+import argparse
+import itertools
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.model import load_schema, compile_schema  # noqa: E402
+from app.calculator import final_score, topic_score, ScoreEngine  # noqa: E402
+from app.audit_codec import decode_audit  # noqa: E402
+from app.storage import build_result, serialize_payload  # noqa: E402
+
+SIZES = [10, 100, 1000, 10000, 100000]
+NA_RATIO = 0.1
+LANGUAGES = ["PT-BR", "ES"]
+REGRESSION = 0.25  # em --compare: +25% na mediana é regressão
+MIN_DELTA_MS = 0.1  # ...desde que piore pelo menos isso (casos de microssegundos são ruído)
+
+def synthetic_schema(n_questions: int, questions_per_group: int = 8,
+                     groups_per_topic: int = 6, seed: int = 0) -> Dict[str, Any]:
+    """Árvore no formato do questions.json com n_questions perguntas."""
+    rnd = random.Random(seed)
+    topics: List[Dict[str, Any]] = []
+    made = 0
+    ti = 0
+    while made < n_questions:
+        ti += 1
+        topic = {"id": str(ti), "weight": float(rnd.randint(1, 5)),
+                 "title": {lang: f"Tópico {ti} ({lang})" for lang in LANGUAGES}, "groups": []}
+        for gi in range(1, groups_per_topic + 1):
+            if made >= n_questions:
+                break
+            gid = f"{ti}.{gi}"
+            group = {"id": gid, "title": {lang: f"Grupo {gid} ({lang})" for lang in LANGUAGES},
+                     "weight": 1, "questions": []}
+            for qi in range(1, questions_per_group + 1):
+                if made >= n_questions:
+                    break
+                qid = f"{gid}.{qi}"
+                group["questions"].append({
+                    "id": qid, "weight": float(rnd.choice([1, 2, 3])),
+                    "title": {lang: f"Pergunta {qid} ({lang})" for lang in LANGUAGES}})
+                made += 1
+            topic["groups"].append(group)
+        topics.append(topic)
+    return {"languages": LANGUAGES, "topics": topics}
+
+def synthetic_answers(data: Dict[str, Any], na_ratio: float, seed: int = 0) -> Dict[str, str]:
+    """Responde todas as perguntas; uma fração na_ratio fica N.A."""
+    rnd = random.Random(seed + 1)
+    answers: Dict[str, str] = {}
+    for t in data["topics"]:
+        for g in t["groups"]:
+            for q in g["questions"]:
+                answers[q["id"]] = "N.A." if rnd.random() < na_ratio else rnd.choice(
+                    ["0", "25", "50", "75", "100"])
+    return answers
+
+def _time(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    runs = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t)
+    return {"median_ms": round(statistics.median(runs) * 1000, 3),
+            "min_ms": round(min(runs) * 1000, 3)}
+
+def _peak_kib(fn: Callable[[], Any]) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+def bench_size(n_questions: int, na_ratio: float, repeat: int, tmp: Path) -> Dict[str, Any]:
+    data = synthetic_schema(n_questions)
+    answers = synthetic_answers(data, na_ratio)
+    path = tmp / f"questions_{n_questions}.json"
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    schema = load_schema(path)
+    topics = schema.topics
+    engine = ScoreEngine(topics)
+    engine.load(answers)
+    payload = build_result(topics, answers, {}, "PT-BR")
+    compiled = compile_schema(topics)
+    binary = serialize_payload(payload, "binary", compiled)
+    first_qid = topics[0].groups[0].questions[0].id
+    toggle = itertools.cycle(["0", "100"])  # alterna para a resposta mudar de fato
+
+    cases: Dict[str, Callable[[], Any]] = {
+        "load_schema": lambda: load_schema(path),
+        "final_score": lambda: final_score(topics, answers),
+        "topic_score_all": lambda: [topic_score(t, answers) for t in topics],
+        "engine_load": lambda: engine.load(answers),
+        "engine_set_answer": lambda: engine.set_answer(first_qid, next(toggle)),
+        "build_result": lambda: build_result(topics, answers, {}, "PT-BR"),
+        "build_result_engine": lambda: build_result(topics, answers, {}, "PT-BR", engine=engine),
+        "serialize_pretty": lambda: serialize_payload(payload, "pretty"),
+        "serialize_compact": lambda: serialize_payload(payload, "compact"),
+        "serialize_gzip": lambda: serialize_payload(payload, "gzip"),
+        "serialize_binary": lambda: serialize_payload(payload, "binary", compiled),
+        "decode_binary": lambda: decode_audit(binary, compiled),
+        "search_prefix": lambda: schema.search.search("perg 1"),
+    }
+    results: Dict[str, Any] = {}
+    for name, fn in cases.items():
+        fn()  # aquecimento
+        r = _time(fn, repeat)
+        r["peak_kib"] = _peak_kib(fn)
+        results[name] = r
+        print(f"  {name:<22} {r['median_ms']:>10.3f} ms  {r['peak_kib']:>10.1f} KiB")
+    return {"n_questions": n_questions, "n_topics": len(topics),
+            "schema_bytes": path.stat().st_size, "cases": results}
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=Path(__file__).resolve().parent, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Lista os casos cuja mediana piorou mais que `threshold` (fração) em relação à base."""
+    base = {(s["n_questions"], name): c["median_ms"]
+            for s in baseline.get("sizes", []) for name, c in s["cases"].items()}
+    regressions = []
+    for s in current["sizes"]:
+        for name, c in s["cases"].items():
+            old = base.get((s["n_questions"], name))
+            if not old:
+                continue
+            ratio = c["median_ms"] / old
+            regressed = ratio > 1 + threshold and c["median_ms"] - old >= MIN_DELTA_MS
+            flag = "  <-- REGRESSÃO" if regressed else ""
+            print(f"  {s['n_questions']:>7} {name:<22} {old:>10.3f} -> {c['median_ms']:>10.3f} ms"
+                  f" ({(ratio - 1) * 100:+.1f}%){flag}")
+            if flag:
+                regressions.append(f"{s['n_questions']}:{name}")
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmarks de schema, pontuação e exportação.")
+    ap.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="nº de perguntas por caso")
+    ap.add_argument("--na-ratio", type=float, default=NA_RATIO, help="fração de respostas N.A.")
+    ap.add_argument("--repeat", type=int, default=5, help="repetições por medição")
+    ap.add_argument("--out", default="bench_results.json", help="arquivo JSON de resultados")
+    ap.add_argument("--compare", default=None, help="resultados anteriores para comparar")
+    ap.add_argument("--threshold", type=float, default=REGRESSION,
+                    help="piora relativa aceita em --compare (0.25 = 25%%)")
+    args = ap.parse_args(argv)
+
+    result: Dict[str, Any] = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "na_ratio": args.na_ratio,
+        "repeat": args.repeat,
+        "sizes": [],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            print(f"[{n} perguntas]")
+            result["sizes"].append(bench_size(n, args.na_ratio, args.repeat, Path(tmp)))
+
+    out = Path(args.out)
+    out.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Resultados: {out.resolve()}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        print(f"Comparação com {args.compare} (commit {baseline.get('commit')}):")
+        regressions = compare(result, baseline, args.threshold)
+        if regressions:
+            print(f"Regressões: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
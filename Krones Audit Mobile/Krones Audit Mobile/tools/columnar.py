@@ -0,0 +1,242 @@
+# tools/columnar.py
+"""
+Exporta muitas auditorias (JSON/.json.gz/.kaud) para formato colunar: uma linha
+por auditoria, uma coluna por pergunta (na ordem do questions.json) + scores por
+tópico e final. Gera CSV e/ou .npz (NumPy) sem carregar tudo em memória: as
+colunas vão para arquivos temporários e o .npz é montado em blocos no final.
+
+Uso (a partir da raiz do app):
+    python tools/columnar.py exports/ --csv frota.csv --npz frota.npz
+    python tools/columnar.py "exports/**/*.kaud" --npz frota.npz --workers 8
+
+No .npz, `codes` (uint8, auditorias x perguntas) usa os códigos de
+calculator.CODE_*: 0 = sem resposta, 1 = N.A., 2..6 = 0/25/50/75/100
+(rótulos em `code_labels`). Scores em % (float32), NaN = sem score.
+No CSV, sem resposta = célula vazia e N.A. = "N.A.".
+"""
+import argparse
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.model import load_schema, compile_schema, CompiledSchema  # noqa: E402
+from app.calculator import CODE_NONE, decode_answer, encode_answer  # noqa: E402
+from app.storage import read_export, find_exports, map_bounded  # noqa: E402
+
+QUESTIONS = Path("app/data/questions.json")
+META_COLUMNS = ("file", "generated_at", "auditor", "language")
+CODE_LABELS = ["", "N.A."] + [decode_answer(c) for c in range(2, 7)]
+NPZ_CHUNK = 1 << 20  # bytes copiados por vez ao montar o .npz
+
+# Estado de cada processo do pool
+_compiled: Optional[CompiledSchema] = None
+
+
+def _init_worker(questions_path: str):
+    global _compiled
+    _compiled = compile_schema(load_schema(Path(questions_path)).topics)
+
+
+def read_row(path: str) -> Dict[str, Any]:
+    """Uma auditoria -> metadados, códigos (bytes na ordem do schema) e scores."""
+    row: Dict[str, Any] = {"file": path, "error": None, "unknown": 0, "invalid": 0}
+    try:
+        payload = read_export(path, _compiled)
+    except Exception as e:
+        row["error"] = f"{e.__class__.__name__}: {e}"
+        return row
+
+    index = _compiled.question_index
+    codes = bytearray(_compiled.n_questions)
+    for r in payload.get("responses", []):
+        i = index.get(r.get("id"))
+        if i is None:
+            row["unknown"] += 1
+            continue
+        value = r.get("value")
+        try:
+            code = CODE_NONE if value is None else encode_answer(value)
+        except (ValueError, TypeError):
+            code = CODE_NONE
+        if value is not None and code == CODE_NONE:
+            row["invalid"] += 1
+        codes[i] = code
+
+    meta = payload.get("metadata") or {}
+    scores = payload.get("scores") or {}
+    stored = {t.get("id"): t.get("score") for t in scores.get("topics", [])}
+    row.update(
+        generated_at=meta.get("generated_at") or "",
+        auditor=meta.get("auditor") or "",
+        language=meta.get("language") or "",
+        codes=bytes(codes),
+        topics=[stored.get(tid) for tid in _compiled.topic_ids],
+        final=scores.get("final"),
+    )
+    return row
+
+
+class _NpzSpool:
+    """Colunas gravadas em arquivos temporários, linha a linha; .npz montado no fim."""
+
+    def __init__(self, np, compiled: CompiledSchema, tmp: Path):
+        self.np = np
+        self.compiled = compiled
+        self.rows = 0
+        self.codes = (tmp / "codes.bin").open("wb")
+        self.topics = (tmp / "topics.bin").open("wb")
+        self.final = (tmp / "final.bin").open("wb")
+        self.text = {name: (tmp / f"{name}.txt").open("w+", encoding="utf-8", newline="\n")
+                     for name in META_COLUMNS}
+        self.width = {name: 1 for name in META_COLUMNS}
+
+    def add(self, row: Dict[str, Any]):
+        np = self.np
+        self.codes.write(row["codes"])
+        self.topics.write(np.array([np.nan if s is None else s for s in row["topics"]],
+                                   dtype="<f4").tobytes())
+        self.final.write(np.array([np.nan if row["final"] is None else row["final"]],
+                                  dtype="<f4").tobytes())
+        for name in META_COLUMNS:
+            value = str(row[name]).replace("\n", " ")
+            self.text[name].write(value + "\n")
+            self.width[name] = max(self.width[name], len(value))
+        self.rows += 1
+
+    def _member(self, zf, name: str, dtype: str, shape: Tuple[int, ...], chunks: Iterable[bytes]):
+        fmt = self.np.lib.format
+        with zf.open(f"{name}.npy", "w", force_zip64=True) as out:
+            fmt.write_array_header_2_0(out, {"descr": fmt.dtype_to_descr(self.np.dtype(dtype)),
+                                             "fortran_order": False, "shape": shape})
+            for chunk in chunks:
+                out.write(chunk)
+
+    def _file_chunks(self, f) -> Iterable[bytes]:
+        f.flush()
+        with open(f.name, "rb") as src:
+            while True:
+                chunk = src.read(NPZ_CHUNK)
+                if not chunk:
+                    return
+                yield chunk
+
+    def _text_chunks(self, name: str, width: int) -> Iterable[bytes]:
+        f = self.text[name]
+        f.flush()
+        f.seek(0)
+        batch: List[str] = []
+        for line in f:
+            batch.append(line[:-1])
+            if len(batch) >= 4096:
+                yield self.np.array(batch, dtype=f"<U{width}").tobytes()
+                batch = []
+        if batch:
+            yield self.np.array(batch, dtype=f"<U{width}").tobytes()
+
+    def write(self, out: Path):
+        np = self.np
+        c = self.compiled
+        small = {
+            "question_ids": np.array(c.question_ids),
+            "topic_ids": np.array(c.topic_ids),
+            "code_labels": np.array(CODE_LABELS),
+        }
+        with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+            self._member(zf, "codes", "<u1", (self.rows, c.n_questions), self._file_chunks(self.codes))
+            self._member(zf, "topic_scores", "<f4", (self.rows, len(c.topic_ids)),
+                         self._file_chunks(self.topics))
+            self._member(zf, "final", "<f4", (self.rows,), self._file_chunks(self.final))
+            for name in META_COLUMNS:
+                width = self.width[name]
+                self._member(zf, name, f"<U{width}", (self.rows,), self._text_chunks(name, width))
+            for name, arr in small.items():
+                self._member(zf, name, arr.dtype.str, arr.shape, [arr.tobytes()])
+
+    def close(self):
+        for f in [self.codes, self.topics, self.final, *self.text.values()]:
+            f.close()
+
+
+def _csv_row(row: Dict[str, Any]) -> List[Any]:
+    labels = CODE_LABELS
+    return ([row[name] for name in META_COLUMNS] + [row["final"]] + list(row["topics"])
+            + [labels[c] for c in row["codes"]])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Exporta auditorias para CSV/.npz colunar.")
+    ap.add_argument("source", help="diretório com as exportações ou padrão glob")
+    ap.add_argument("--questions", default=str(QUESTIONS), help="questions.json (ordem das colunas)")
+    ap.add_argument("--csv", default=None, help="arquivo CSV de saída")
+    ap.add_argument("--npz", default=None, help="arquivo .npz de saída (requer NumPy)")
+    ap.add_argument("--workers", type=int, default=None, help="processos (padrão: nº de CPUs)")
+    args = ap.parse_args(argv)
+
+    if not args.csv and not args.npz:
+        ap.error("informe --csv e/ou --npz")
+    files = find_exports(args.source)
+    if not files:
+        print(f"Nenhuma exportação encontrada em: {args.source}")
+        return 1
+
+    compiled = compile_schema(load_schema(Path(args.questions)).topics)
+    workers = args.workers or os.cpu_count() or 1
+    chunksize = max(1, min(256, len(files) // (workers * 8)))
+    stats = {"files": 0, "errors": 0, "unknown": 0, "invalid": 0}
+
+    tmp = Path(tempfile.mkdtemp(prefix="columnar_"))
+    spool = None
+    csv_file = None
+    try:
+        if args.npz:
+            import numpy as np
+            spool = _NpzSpool(np, compiled, tmp)
+        if args.csv:
+            csv_file = open(args.csv, "w", newline="", encoding="utf-8")
+            writer = csv.writer(csv_file)
+            writer.writerow(list(META_COLUMNS) + ["final"]
+                            + [f"topic_{tid}" for tid in compiled.topic_ids]
+                            + [f"q_{qid}" for qid in compiled.question_ids])
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(args.questions,)) as pool:
+            for row in map_bounded(pool, read_row, files, workers, chunksize):
+                stats["files"] += 1
+                if row["error"]:
+                    stats["errors"] += 1
+                    print(f"[COLUNAR] ignorando {row['file']}: {row['error']}")
+                    continue
+                stats["unknown"] += row["unknown"]
+                stats["invalid"] += row["invalid"]
+                if csv_file:
+                    writer.writerow(_csv_row(row))
+                if spool:
+                    spool.add(row)
+
+        if spool:
+            spool.write(Path(args.npz))
+    finally:
+        if csv_file:
+            csv_file.close()
+        if spool:
+            spool.close()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"Arquivos: {stats['files']} | erros: {stats['errors']} | "
+          f"ids desconhecidos: {stats['unknown']} | valores inválidos: {stats['invalid']}")
+    for out in (args.csv, args.npz):
+        if out:
+            print(f"Saída: {Path(out).resolve()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,28 @@
 # tools/excel_to_json.py
+"""
+Converte planilhas-modelo (Template-questoes.xlsx e variantes) em questions.json.
+
+Uso:
+    python tools/excel_to_json.py                      # Template-questoes.xlsx -> app/data/questions.json
+    python tools/excel_to_json.py modelos/*.xlsx --out-dir saidas/ [--workers N] [--force]
+
+Cada planilha é lida uma única vez, em modo read-only (streaming), com todas as
+abas de idioma. Planilhas cujo hash de conteúdo não mudou desde a última
+geração (e cuja saída ainda existe) são puladas.
+"""
 from openpyxl import load_workbook
+import argparse
+import hashlib
 import json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 EXCEL = Path("Template-questoes.xlsx")
 OUT = Path("app/data/questions.json")
-LANG_SHEETS = ["PT-BR", "ES"]  # adicione "EN" no futuro
+LANG_SHEETS = ["PT-BR", "ES"]  # obrigatórias; PT-BR define a árvore e os pesos
+OPTIONAL_LANG_SHEETS = ["EN"]  # usadas se existirem na planilha
+CACHE_FILE = ".excel_to_json.cache"  # {planilha: {"sha256", "out"}} no diretório de saída
+CONVERTER_VERSION = 2  # incremente se a conversão mudar (invalida o cache)
 
 def read_sheet(ws):
     # Espera colunas: Item | Description | Weighthting | Comments
@@ -31,20 +48,7 @@ def build_lang_map(rows):
 def level_of(item_id: str) -> int:
     return item_id.count(".") + 1
 
-def main():
-    wb = load_workbook(EXCEL, data_only=True)
-    # Carrega todas as línguas como mapas
-    lang_maps = {}
-    for sheet in LANG_SHEETS:
-        ws = wb[sheet]
-        lang_maps[sheet] = build_lang_map(read_sheet(ws))
-
-    rows_pt = [{"Item": k, "Description": v, "Weighthting": None}
-               for k, v in lang_maps[LANG_SHEETS[0]].items()]
-    # Melhor: reler PT-BR com pesos reais
-    ws_pt = wb[LANG_SHEETS[0]]
-    rows_pt = read_sheet(ws_pt)
-
+def build_tree(rows_pt, lang_maps):
     # Monta árvore a partir de PT-BR
     topics = []
     current_topic = None
@@ -59,7 +63,6 @@ def main():
         for lang, m in lang_maps.items():
             if item in m:
                 title[lang] = m[item]
-        # Futuro EN: title["EN"] = ...
 
         if lvl == 1:
             current_topic = {
@@ -94,12 +97,89 @@ def main():
                 }
                 current_topic["groups"].append(current_group)
             current_group["questions"].append(q)
+    return topics
+
+def convert(excel: Path, out: Path) -> Path:
+    """Uma passada read-only pela planilha: cada aba de idioma é lida uma vez."""
+    wb = load_workbook(excel, read_only=True, data_only=True)
+    try:
+        langs = LANG_SHEETS + [s for s in OPTIONAL_LANG_SHEETS if s in wb.sheetnames]
+        rows_by_lang = {sheet: read_sheet(wb[sheet]) for sheet in langs}
+    finally:
+        wb.close()
+    lang_maps = {sheet: build_lang_map(rows) for sheet, rows in rows_by_lang.items()}
+    topics = build_tree(rows_by_lang[LANG_SHEETS[0]], lang_maps)
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    data = {"languages": langs, "topics": topics}
+    out.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    return out
+
+def file_hash(path: Path) -> str:
+    h = hashlib.sha256(f"v{CONVERTER_VERSION}:".encode())
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _load_cache(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def convert_many(jobs, workers=None, force=False):
+    """jobs: [(planilha, saída)]. Converte em paralelo só o que mudou; retorna (geradas, puladas)."""
+    caches = {}
+    todo = []
+    skipped = []
+    for excel, out in jobs:
+        cache_path = out.parent / CACHE_FILE
+        cache = caches.setdefault(cache_path, _load_cache(cache_path))
+        digest = file_hash(excel)
+        entry = cache.get(str(excel.resolve()))
+        if not force and out.exists() and entry == {"sha256": digest, "out": str(out.resolve())}:
+            skipped.append(out)
+            continue
+        todo.append((excel, out, digest))
+
+    done = []
+    if len(todo) == 1:
+        done.append(convert(todo[0][0], todo[0][1]))
+    elif todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            done = list(pool.map(convert, [e for e, _, _ in todo], [o for _, o, _ in todo]))
+
+    for excel, out, digest in todo:
+        cache_path = out.parent / CACHE_FILE
+        caches[cache_path][str(excel.resolve())] = {"sha256": digest, "out": str(out.resolve())}
+    for cache_path, cache in caches.items():
+        if cache_path.parent.exists():
+            cache_path.write_text(json.dumps(cache, ensure_ascii=False, indent=2), encoding="utf-8")
+    return done, skipped
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Converte planilhas-modelo em questions.json.")
+    ap.add_argument("excel", nargs="*", type=Path, help=f"planilhas .xlsx (padrão: {EXCEL})")
+    ap.add_argument("--out", type=Path, default=None, help=f"saída, com uma única planilha (padrão: {OUT})")
+    ap.add_argument("--out-dir", type=Path, default=None, help="diretório de saída: <planilha>.json")
+    ap.add_argument("--workers", type=int, default=None, help="processos (padrão: nº de CPUs)")
+    ap.add_argument("--force", action="store_true", help="reconverte mesmo sem mudança no conteúdo")
+    args = ap.parse_args(argv)
+
+    excels = args.excel or [EXCEL]
+    if args.out_dir is not None:
+        jobs = [(e, args.out_dir / f"{e.stem}.json") for e in excels]
+    elif len(excels) == 1:
+        jobs = [(excels[0], args.out or OUT)]
+    else:
+        ap.error("com várias planilhas, use --out-dir")
 
-    OUT.parent.mkdir(parents=True, exist_ok=True)
-    data = {"languages": LANG_SHEETS + (["EN"] if "EN" in wb.sheetnames else []),
-            "topics": topics}
-    OUT.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
-    print(f"Gerado: {OUT.resolve()}")
+    done, skipped = convert_many(jobs, workers=args.workers, force=args.force)
+    for out in done:
+        print(f"Gerado: {out.resolve()}")
+    for out in skipped:
+        print(f"Sem mudanças: {out.resolve()}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,144 @@
+# tools/rescore.py
+"""
+Re-pontua em lote as exportações de auditoria (storage.build_result em .json,
+.json.gz ou .kaud) com o questions.json atual, em paralelo, e grava um resumo
+CSV ou JSON.
+
+Uso (a partir da raiz do app):
+    python tools/rescore.py exports/ --out resumo.csv
+    python tools/rescore.py "exports/**/auditoria_*.kaud" --questions app/data/questions.json --out resumo.json
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.model import load_schema, compile_schema, CompiledSchema, Topic  # noqa: E402
+from app.calculator import ScoreEngine  # noqa: E402
+from app.storage import _fmt_pct, read_export, find_exports, map_bounded  # noqa: E402
+
+QUESTIONS = Path("app/data/questions.json")
+TOLERANCE = 0.05  # pontos percentuais (os scores salvos têm 1 casa decimal)
+
+# Estado de cada processo do pool (carregado uma vez no initializer)
+_topics: List[Topic] = []
+_engine: Optional[ScoreEngine] = None
+_compiled: Optional[CompiledSchema] = None
+
+
+def _init_worker(questions_path: str):
+    global _topics, _engine, _compiled
+    _topics = load_schema(Path(questions_path)).topics
+    _engine = ScoreEngine(_topics)
+    _compiled = compile_schema(_topics)  # .kaud só decodifica com o questions.json em que foi gravado
+
+
+def _differs(stored: Optional[float], fresh: Optional[float], tolerance: float) -> bool:
+    if stored is None or fresh is None:
+        return stored is not fresh
+    return abs(float(stored) - fresh) > tolerance
+
+
+def rescore_file(path: str, tolerance: float = TOLERANCE) -> Dict[str, Any]:
+    """Recalcula os scores de um arquivo e compara com os que estão salvos nele."""
+    row: Dict[str, Any] = {"file": path, "final": None, "stored_final": None,
+                           "topics": {}, "mismatch": [], "error": None}
+    try:
+        data = read_export(path, _compiled)
+        answers = {r["id"]: r.get("value") for r in data.get("responses", [])}
+        _engine.load(answers)
+    except Exception as e:
+        row["error"] = f"{e.__class__.__name__}: {e}"
+        return row
+
+    stored = data.get("scores") or {}
+    stored_topics = {t.get("id"): t.get("score") for t in stored.get("topics", [])}
+    row["final"] = _fmt_pct(_engine.final_score())
+    row["stored_final"] = stored.get("final")
+
+    for t in _topics:
+        fresh = _fmt_pct(_engine.topic_score(t.id))
+        row["topics"][t.id] = fresh
+        if _differs(stored_topics.get(t.id), fresh, tolerance):
+            row["mismatch"].append(t.id)
+    if _differs(row["stored_final"], row["final"], tolerance):
+        row["mismatch"].append("final")
+    return row
+
+
+def _write_csv(out: Path, topic_ids: List[str], rows: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    stats = {"files": 0, "mismatch": 0, "errors": 0}
+    with out.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["file", "final", "stored_final"] + [f"topic_{tid}" for tid in topic_ids]
+                   + ["mismatch", "error"])
+        for r in rows:
+            _count(stats, r)
+            w.writerow([r["file"], r["final"], r["stored_final"]]
+                       + [r["topics"].get(tid) for tid in topic_ids]
+                       + [";".join(r["mismatch"]), r["error"] or ""])
+    return stats
+
+
+def _write_json(out: Path, rows: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    # grava item a item para não acumular o resumo inteiro em memória
+    stats = {"files": 0, "mismatch": 0, "errors": 0}
+    with out.open("w", encoding="utf-8") as f:
+        f.write("[\n")
+        for i, r in enumerate(rows):
+            _count(stats, r)
+            f.write((",\n" if i else "") + json.dumps(r, ensure_ascii=False))
+        f.write("\n]\n")
+    return stats
+
+
+def _count(stats: Dict[str, int], row: Dict[str, Any]):
+    stats["files"] += 1
+    stats["mismatch"] += bool(row["mismatch"])
+    stats["errors"] += bool(row["error"])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Re-pontua exportações de auditoria em paralelo.")
+    ap.add_argument("source", help="diretório com as exportações ou padrão glob")
+    ap.add_argument("--questions", default=str(QUESTIONS), help="questions.json com os pesos atuais")
+    ap.add_argument("--out", default="resumo_rescore.csv", help="arquivo de saída (.csv ou .json)")
+    ap.add_argument("--workers", type=int, default=None, help="processos (padrão: nº de CPUs)")
+    ap.add_argument("--tolerance", type=float, default=TOLERANCE,
+                    help="diferença máxima (pontos %%) aceita entre score salvo e recalculado")
+    args = ap.parse_args(argv)
+
+    files = find_exports(args.source)
+    if not files:
+        print(f"Nenhuma exportação encontrada em: {args.source}")
+        return 1
+
+    topic_ids = [t.id for t in load_schema(Path(args.questions)).topics]
+    out = Path(args.out)
+    workers = args.workers or os.cpu_count() or 1
+    chunksize = max(1, min(256, len(files) // (workers * 8)))
+
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_init_worker,
+                             initargs=(args.questions,)) as pool:
+        rows = map_bounded(pool, partial(rescore_file, tolerance=args.tolerance), files,
+                           workers, chunksize)
+        if out.suffix.lower() == ".json":
+            stats = _write_json(out, rows)
+        else:
+            stats = _write_csv(out, topic_ids, rows)
+
+    print(f"Arquivos: {stats['files']} | divergentes: {stats['mismatch']} | erros: {stats['errors']}")
+    print(f"Resumo: {out.resolve()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
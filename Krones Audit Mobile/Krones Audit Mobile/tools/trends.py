@@ -0,0 +1,128 @@
+# tools/trends.py
+"""
+Reconstrói as tendências por local (app/trends.py) a partir das exportações e
+mostra um resumo. O app atualiza as tendências a cada exportação; use este
+comando para recriá-las do zero (ex.: auditorias copiadas de vários aparelhos).
+
+Uso (a partir da raiz do app):
+    python tools/trends.py rebuild exports/ --db trends.sqlite
+    python tools/trends.py rebuild "exports/**/*.kaud" --db trends.sqlite --workers 8
+    python tools/trends.py report --db trends.sqlite [--site "Linha 3"] [--limit 10]
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.model import load_schema, compile_schema, CompiledSchema  # noqa: E402
+from app.storage import read_export, find_exports, map_bounded  # noqa: E402
+from app.trends import TrendEngine, TRENDS_FILE  # noqa: E402
+
+QUESTIONS = Path("app/data/questions.json")
+
+# Estado de cada processo do pool
+_compiled: Optional[CompiledSchema] = None
+
+
+def _init_worker(questions_path: str):
+    global _compiled
+    if Path(questions_path).exists():
+        _compiled = compile_schema(load_schema(Path(questions_path)).topics)
+
+
+def read_payload(path: str) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+    """(caminho, payload, erro); .kaud só decodifica com o questions.json em que foi gravado."""
+    try:
+        return path, read_export(path, _compiled), None
+    except Exception as e:
+        return path, None, f"{e.__class__.__name__}: {e}"
+
+
+def rebuild(args) -> int:
+    files = find_exports(args.source)
+    if not files:
+        print(f"Nenhuma exportação encontrada em: {args.source}")
+        return 1
+    workers = args.workers or os.cpu_count() or 1
+    chunksize = max(1, min(256, len(files) // (workers * 8)))
+    items: List[Tuple[Dict[str, Any], str]] = []
+    errors = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(args.questions,)) as pool:
+        for path, payload, error in map_bounded(pool, read_payload, files, workers, chunksize):
+            if error:
+                errors += 1
+                print(f"[TENDÊNCIAS] ignorando {path}: {error}")
+                continue
+            items.append((payload, str(Path(path).resolve())))
+
+    engine = TrendEngine(args.db)
+    try:
+        added = engine.rebuild(items)
+        sites = engine.sites()
+    finally:
+        engine.close()
+    print(f"Arquivos: {len(files)} | auditorias: {added} | repetidas: {len(items) - added} | erros: {errors}")
+    print(f"Locais: {len(sites)} | banco: {Path(args.db).resolve()}")
+    return 0
+
+
+def _pct(value: Optional[float]) -> str:
+    return "—" if value is None else f"{value:.1f}%"
+
+
+def report(args) -> int:
+    if not Path(args.db).exists():
+        print(f"Banco não encontrado: {args.db}")
+        return 1
+    engine = TrendEngine(args.db)
+    try:
+        for s in engine.sites():
+            if args.site is not None and s["site"] != args.site:
+                continue
+            site, schema_id = s["site"], s["schema_id"]
+            print(f"== {site or '(sem local)'} [{schema_id or 'sem id'}]: {s['audits']} auditorias, "
+                  f"última {s['last_at']} | final {_pct(s['final_last'])} "
+                  f"(anterior {_pct(s['final_prev'])}, EMA {_pct(s['final_ema'])}, média {_pct(s['final_mean'])})")
+            for t in engine.trends(site, "topic", schema_id):
+                delta = "" if t["delta"] is None else f" {t['delta']:+.1f}"
+                print(f"   tópico {t['item_id']:<6} EMA {_pct(t['ema']):>7}  último {_pct(t['last']):>7}{delta}")
+            for r in engine.regressions(site, "question", schema_id, limit=args.limit):
+                print(f"   queda  {r['item_id']:<8} {_pct(r['prev'])} -> {_pct(r['last'])}")
+            always_na = engine.always_na(site, schema_id, min_audits=args.min_audits)
+            if always_na:
+                print(f"   sempre N.A. ({len(always_na)}): {', '.join(always_na[:args.limit])}"
+                      + (" ..." if len(always_na) > args.limit else ""))
+    finally:
+        engine.close()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Tendências por local a partir das exportações.")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    rb = sub.add_parser("rebuild", help="apaga e reconstrói as tendências a partir das exportações")
+    rb.add_argument("source", help="diretório com as exportações ou padrão glob")
+    rb.add_argument("--db", default=TRENDS_FILE, help=f"banco SQLite das tendências (padrão: {TRENDS_FILE})")
+    rb.add_argument("--questions", default=str(QUESTIONS), help="questions.json para decodificar .kaud")
+    rb.add_argument("--workers", type=int, default=None, help="processos (padrão: nº de CPUs)")
+    rb.set_defaults(func=rebuild)
+
+    rp = sub.add_parser("report", help="resumo por local: tópicos, quedas e perguntas sempre N.A.")
+    rp.add_argument("--db", default=TRENDS_FILE, help=f"banco SQLite das tendências (padrão: {TRENDS_FILE})")
+    rp.add_argument("--site", default=None, help="só este local")
+    rp.add_argument("--limit", type=int, default=10, help="itens por lista")
+    rp.add_argument("--min-audits", type=int, default=2, help="auditorias mínimas para 'sempre N.A.'")
+    rp.set_defaults(func=report)
+
+    args = ap.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+# tools/ui_bench.py
+"""
+Harness de desempenho da interface: roda o AuditoriaApp sem janela visível
+(SDL offscreen) com schemas sintéticos e mede a árvore de widgets e as
+operações de atualização. Cada tamanho roda num processo próprio (o Kivy só
+executa um App por processo).
+
+Uso (a partir da raiz do app):
+    python tools/ui_bench.py --out ui_base.json
+    python tools/ui_bench.py --sizes 100 1000 --out ui_novo.json --compare ui_base.json
+    python tools/ui_bench.py --thresholds ui_limites.json   # {"1000": {"build_all_tabs_ms": 800}, "*": {...}}
+
+Saída != 0 quando algum limite absoluto (--thresholds) ou relativo (--compare) é ultrapassado.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+APP_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(APP_ROOT))
+
+from bench import synthetic_schema, synthetic_answers, _git_commit  # noqa: E402
+
+SIZES = [100, 1000]
+NA_RATIO = 0.1
+REPEAT = 20      # chamadas de update_scores_ui / toggle_language medidas
+REBUILDS = 3     # reconstruções completas para medir o crescimento de memória
+TOLERANCE = 0.25  # em --compare: +25% é regressão
+# Limites padrão (qualquer tamanho); sobrescritos por --thresholds
+DEFAULT_LIMITS = {"update_scores_ui_ms": 5.0}
+
+# ---------- Processo filho: um App por tamanho ----------
+def _count_tree(root) -> Dict[str, int]:
+    widgets = bindings = 0
+    for w in root.walk(restrict=False):
+        widgets += 1
+        for name in w.properties():
+            bindings += len(w.get_property_observers(name))
+    return {"widgets": widgets, "bindings": bindings}
+
+def _rss_kib() -> Optional[float]:
+    """RSS atual do processo (Linux/Android); None onde /proc não existe."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def _alive_widgets() -> int:
+    from kivy.uix.widget import Widget
+    gc.collect()
+    n = 0
+    for o in gc.get_objects():
+        try:
+            n += isinstance(o, Widget)
+        except ReferenceError:  # weakproxy de objeto já coletado
+            pass
+    return n
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+def run_worker(n_questions: int, na_ratio: float, repeat: int, rebuilds: int):
+    """Executa o App headless e imprime uma linha JSON com as métricas."""
+    os.environ.setdefault("KIVY_NO_ARGS", "1")
+    os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+    os.environ.setdefault("SDL_VIDEODRIVER", "offscreen")
+    os.environ.setdefault("KIVY_GL_BACKEND", "mock")
+
+    from kivy.clock import Clock
+    from app.main import AuditoriaApp
+    from app.model import load_schema
+    from app.calculator import ScoreEngine
+
+    tmp = Path(tempfile.mkdtemp(prefix="ui_bench_"))
+    data = synthetic_schema(n_questions)
+    answers = synthetic_answers(data, na_ratio)
+    questions = tmp / "questions.json"
+    questions.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+    class BenchApp(AuditoriaApp):
+        @property
+        def user_data_dir(self):
+            return str(tmp)  # diário/cache isolados do app real
+
+        def load_questions(self):
+            self.schema = load_schema(questions)
+            self.engine = ScoreEngine(self.schema.topics)
+            self.engine.load(self.answers)
+            self._open_sessions()
+            self.lang = self.schema.languages[0]
+
+    app = BenchApp()
+    metrics: Dict[str, Any] = {"n_questions": n_questions}
+
+    def build_all(tabs):
+        app.build_tabs(tabs)
+        for label in tabs.get_tab_list():
+            app._ensure_tab_built(label.tab)
+
+    def scenario():
+        tabs = app.root.ids.tabs
+        metrics["n_tabs"] = len(tabs.get_tab_list())
+        metrics.update({f"{k}_first_tab": v for k, v in _count_tree(app.root).items()})
+
+        t = time.perf_counter()
+        build_all(tabs)
+        metrics["build_all_tabs_ms"] = _ms(time.perf_counter() - t)
+        yield
+        metrics.update(_count_tree(app.root))
+
+        for qid, raw in answers.items():
+            app.answers[qid] = raw
+        app.engine.load(answers)
+        runs = []
+        for _ in range(repeat):
+            t = time.perf_counter()
+            app.update_scores_ui()
+            runs.append(time.perf_counter() - t)
+        metrics["update_scores_ui_ms"] = _ms(statistics.median(runs))
+
+        runs = []
+        for _ in range(min(repeat, 6)):
+            t = time.perf_counter()
+            app.toggle_language()
+            runs.append(time.perf_counter() - t)
+            yield
+        metrics["toggle_language_ms"] = _ms(statistics.median(runs))
+
+        t = time.perf_counter()
+        app.clear_answers()
+        metrics["clear_answers_ms"] = _ms(time.perf_counter() - t)
+        yield
+
+        # Crescimento de memória: reconstruções completas depois de uma de aquecimento.
+        # leaked_widgets = widgets vivos que não estão mais na árvore (retidos por binds).
+        build_all(tabs)
+        yield
+        base_rss, base_alive = _rss_kib(), _alive_widgets()
+        runs = []
+        for _ in range(rebuilds):
+            t = time.perf_counter()
+            build_all(tabs)
+            runs.append(time.perf_counter() - t)
+            yield
+        alive = _alive_widgets()
+        rss = _rss_kib()
+        metrics["rebuild_ms"] = _ms(statistics.median(runs))
+        metrics["rebuild_growth_kib"] = None if rss is None else round(rss - base_rss, 1)
+        metrics["leaked_widgets_per_rebuild"] = round((alive - base_alive) / max(rebuilds, 1), 1)
+
+    gen = None
+
+    def step(dt):
+        nonlocal gen
+        try:
+            if gen is None:
+                gen = scenario()
+            next(gen)
+            Clock.schedule_once(step, 0)
+        except StopIteration:
+            app.stop()
+        except Exception as e:
+            metrics["error"] = f"{e.__class__.__name__}: {e}"
+            app.stop()
+
+    Clock.schedule_once(step, 0)
+    app.run()
+    print("UI_BENCH " + json.dumps(metrics), flush=True)
+    # O loop do Kivy (mock GL/offscreen) nem sempre encerra sozinho após stop()
+    os._exit(0)
+
+# ---------- Processo principal ----------
+def measure(n_questions: int, na_ratio: float, repeat: int, rebuilds: int,
+            timeout: float) -> Dict[str, Any]:
+    cmd = [sys.executable, str(Path(__file__).resolve()), "--worker", str(n_questions),
+           "--na-ratio", str(na_ratio), "--repeat", str(repeat), "--rebuilds", str(rebuilds)]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, cwd=str(APP_ROOT), timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"n_questions": n_questions, "error": f"timeout ({timeout:.0f}s)"}
+    for line in proc.stdout.splitlines():
+        if line.startswith("UI_BENCH "):
+            return json.loads(line[len("UI_BENCH "):])
+    tail = (proc.stderr or proc.stdout).strip().splitlines()[-5:]
+    return {"n_questions": n_questions, "error": " | ".join(tail) or f"saída {proc.returncode}"}
+
+def check_limits(results: List[Dict[str, Any]], limits: Dict[str, Dict[str, float]]) -> List[str]:
+    failures = []
+    for r in results:
+        for metric, limit in {**limits.get("*", {}), **limits.get(str(r["n_questions"]), {})}.items():
+            value = r.get(metric)
+            if value is not None and value > limit:
+                failures.append(f"{r['n_questions']}:{metric} = {value} > {limit}")
+    return failures
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    base = {b["n_questions"]: b for b in baseline.get("sizes", [])}
+    failures = []
+    for r in results:
+        old = base.get(r["n_questions"], {})
+        for metric, value in r.items():
+            prev = old.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(prev, (int, float)) or prev <= 0:
+                continue
+            if metric == "n_questions":
+                continue
+            ratio = value / prev
+            if ratio > 1 + tolerance:
+                failures.append(f"{r['n_questions']}:{metric} {prev} -> {value} ({(ratio - 1) * 100:+.1f}%)")
+    return failures
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Desempenho da interface Kivy, sem janela.")
+    ap.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="nº de perguntas por caso")
+    ap.add_argument("--na-ratio", type=float, default=NA_RATIO, help="fração de respostas N.A.")
+    ap.add_argument("--repeat", type=int, default=REPEAT, help="repetições por medição")
+    ap.add_argument("--rebuilds", type=int, default=REBUILDS, help="reconstruções para medir memória")
+    ap.add_argument("--timeout", type=float, default=600, help="tempo máximo por tamanho (s)")
+    ap.add_argument("--out", default="ui_bench_results.json", help="arquivo JSON de resultados")
+    ap.add_argument("--thresholds", default=None, help="JSON {tamanho|'*': {métrica: máximo}}")
+    ap.add_argument("--compare", default=None, help="resultados anteriores para comparar")
+    ap.add_argument("--tolerance", type=float, default=TOLERANCE,
+                    help="piora relativa aceita em --compare (0.25 = 25%%)")
+    ap.add_argument("--worker", type=int, default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.worker is not None:
+        run_worker(args.worker, args.na_ratio, args.repeat, args.rebuilds)
+        return 0
+
+    results = []
+    for n in args.sizes:
+        r = measure(n, args.na_ratio, args.repeat, args.rebuilds, args.timeout)
+        results.append(r)
+        print(f"[{n} perguntas] " + ", ".join(f"{k}={v}" for k, v in r.items() if k != "n_questions"))
+
+    out = Path(args.out)
+    out.write_text(json.dumps({
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "na_ratio": args.na_ratio,
+        "sizes": results,
+    }, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Resultados: {out.resolve()}")
+
+    limits = {"*": dict(DEFAULT_LIMITS)}
+    if args.thresholds:
+        for key, values in json.loads(Path(args.thresholds).read_text(encoding="utf-8")).items():
+            limits.setdefault(key, {}).update(values)
+    failures = [f"{r['n_questions']}: erro {r['error']}" for r in results if r.get("error")]
+    failures += check_limits(results, limits)
+    if args.compare:
+        failures += compare(results, json.loads(Path(args.compare).read_text(encoding="utf-8")),
+                            args.tolerance)
+    for f in failures:
+        print(f"  <-- REGRESSÃO {f}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())